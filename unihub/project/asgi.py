@@ -3,14 +3,24 @@ ASGI config for project project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve it with an ASGI server (e.g. ``uvicorn project.asgi:application``) to get
+live notifications: ``/notifications/stream/`` keeps a Server-Sent Events
+connection open per client, which WSGI workers can't do.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 """
 
 import os
 
+from django.conf import settings
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project.settings')
 
 application = get_asgi_application()
+
+if getattr(settings, 'TEMPLATE_WARMUP', False):
+    from student_management.template_cache import warm_up
+
+    warm_up()
@@ -0,0 +1,90 @@
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+
+# === Typed environment settings ===
+# settings.py reads its deployment config from the environment (and from a
+# .env file in development) through these helpers, so a missing variable
+# falls back to its default instead of crashing at import time, and a
+# malformed one fails with the variable's name rather than a bare ValueError
+# from somewhere inside Django's startup. Secrets have no default:
+# env_required() fails at startup instead.
+
+TRUE_VALUES = {'1', 'true', 'yes', 'on'}
+FALSE_VALUES = {'0', 'false', 'no', 'off'}
+
+
+def env_str(name, default=None):
+    value = os.environ.get(name)
+    return default if value is None or value == '' else value
+
+
+def env_required(name):
+    """A variable with no safe default, e.g. a password; fails at startup when it's missing."""
+    value = env_str(name)
+    if value is None:
+        raise ImproperlyConfigured(f"{name} must be set")
+    return value
+
+
+def env_int(name, default=None):
+    value = env_str(name)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ImproperlyConfigured(f"{name} must be an integer, got {value!r}")
+
+
+def env_float(name, default=None):
+    value = env_str(name)
+    if value is None:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        raise ImproperlyConfigured(f"{name} must be a number, got {value!r}")
+
+
+def env_bool(name, default=False):
+    value = env_str(name)
+    if value is None:
+        return default
+    if value.lower() in TRUE_VALUES:
+        return True
+    if value.lower() in FALSE_VALUES:
+        return False
+    raise ImproperlyConfigured(f"{name} must be one of {sorted(TRUE_VALUES | FALSE_VALUES)}, got {value!r}")
+
+
+def env_list(name, default=()):
+    """A comma-separated variable as a list, blanks dropped."""
+    value = env_str(name)
+    if value is None:
+        return list(default)
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+CACHE_BACKENDS = {
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+    'rediss': 'django.core.cache.backends.redis.RedisCache',
+    'memcached': 'django.core.cache.backends.memcached.PyMemcacheCache',
+}
+
+
+def env_cache(name):
+    """A CACHES entry from a URL variable, local memory when it's unset.
+
+    redis://host:6379/1 (needs the redis package) or memcached://host:11211
+    (needs pymemcache); several memcached servers are comma-separated.
+    """
+    value = env_str(name)
+    if value is None:
+        return {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+    scheme, _, rest = value.partition('://')
+    if scheme not in CACHE_BACKENDS or not rest:
+        raise ImproperlyConfigured(f"{name} must look like redis://host:6379/1 or memcached://host:11211, got {value!r}")
+    location = value if scheme.startswith('redis') else [host.strip() for host in rest.split(',') if host.strip()]
+    return {'BACKEND': CACHE_BACKENDS[scheme], 'LOCATION': location}
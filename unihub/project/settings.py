@@ -4,7 +4,9 @@ from dotenv import load_dotenv
 from datetime import timedelta
 import logging
 
-# Load environment variables
+from .env import env_bool, env_cache, env_float, env_int, env_list, env_required, env_str
+
+# Load environment variables (a .env file only fills in what the environment doesn't already set)
 load_dotenv()
 
 # Setup logging
@@ -13,8 +15,15 @@ logger = logging.getLogger(__name__)
 # Base directory
 BASE_DIR = Path(__file__).resolve().parent 
 
+# A deployment names its MySQL server in DB_HOST; without one this is a development setup
+# with a local SQLite database
+DEVELOPMENT = env_str('DB_HOST') is None
+
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = 'django-insecure-(sn$)6qjm%@basoy0ffsg0v#ne_lpuoyk67n1jp^u5sw6$v*&+'
+if DEVELOPMENT:
+    SECRET_KEY = env_str('DJANGO_SECRET_KEY', 'django-insecure-local-development-only')
+else:
+    SECRET_KEY = env_required('DJANGO_SECRET_KEY')
 
 # SECURITY WARNING: don't run with debug turned on in production!
 # DEBUG = True
@@ -45,6 +54,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'student_management.staticfiles.StaticFilesMiddleware',
+    'student_management.profiling.ProfilingMiddleware',
+    'student_management.metrics.MetricsMiddleware',
+    'student_management.queries.QueryInspectionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -54,7 +67,7 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
-
+    'student_management.routers.ReplicaRoutingMiddleware',
 ]
 
 ROOT_URLCONF = 'project.urls'
@@ -63,8 +76,15 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [],  # Optional: add custom template directories here
-        'APP_DIRS': True,
         'OPTIONS': {
+            # each template is read and compiled once per process (see student_management/template_cache.py);
+            # with DEBUG on, Django's autoreloader clears the cache whenever a template changes
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -77,31 +97,74 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'project.wsgi.application'
 
-# # Database using environment variables
-DATABASES = {
-     'default': {
-         'ENGINE': 'django.db.backends.mysql',
-         'NAME': 'Paulamie$default',
-         'USER': 'Paulamie',
-         'PASSWORD': 'senha1502',
-         'HOST': 'paulamie.mysql.pythonanywhere-services.com',
-         'PORT': '3306',
-     }
- }
-
-# Database
-# DATABASES = {
-#     'default': {
-#         'ENGINE': 'django.db.backends.mysql',
-#         'NAME': os.getenv('DB_NAME'),
-#         'USER': os.getenv('DB_USER'),
-#         'PASSWORD': os.getenv('DB_PASSWORD'),
-#         'HOST': os.getenv('DB_HOST'),
-#         'PORT': os.getenv('DB_PORT', '3306'),
-#     },
-# }
-
-logger.info(f"Connected to DB: {os.getenv('DB_NAME')} at {os.getenv('DB_HOST')}")
+# Database: MySQL when DB_HOST is set, with its name and credentials required; otherwise SQLite
+if DEVELOPMENT:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR.parent / 'db.sqlite3',
+            # take the write lock when a transaction starts, so concurrent requests wait for each other
+            # (up to the timeout) instead of failing with "database is locked"
+            'OPTIONS': {'transaction_mode': 'IMMEDIATE', 'timeout': 20},
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.mysql',
+            'NAME': env_required('DB_NAME'),
+            'USER': env_required('DB_USER'),
+            'PASSWORD': env_required('DB_PASSWORD'),
+            'HOST': env_str('DB_HOST'),
+            'PORT': env_str('DB_PORT', '3306'),
+        }
+    }
+
+# Connection management (see student_management/dbpool.py and student_management/routers.py).
+# Persistent connections with a health check before reuse by default; DB_POOL_SIZE > 0 switches
+# to a per-process pool instead, for threaded/ASGI servers.
+DB_POOL_SIZE = env_int('DB_POOL_SIZE', 0)
+DATABASES['default'].update({
+    'CONN_MAX_AGE': 0 if DB_POOL_SIZE else env_int('DB_CONN_MAX_AGE', 60),
+    'CONN_HEALTH_CHECKS': env_bool('DB_CONN_HEALTH_CHECKS', True),
+})
+if DB_POOL_SIZE and not DEVELOPMENT:
+    DATABASES['default'].update({
+        'ENGINE': 'student_management.backends.mysql_pooled',
+        'POOL': {
+            'SIZE': DB_POOL_SIZE,
+            'MAX_IDLE': env_int('DB_POOL_MAX_IDLE', 300),  # seconds before an idle connection is closed
+            'PING_AFTER': env_int('DB_POOL_PING_AFTER', 5),  # idle seconds before a connection is pinged on reuse
+        },
+    })
+
+# Read replicas: same credentials, other hosts (comma-separated)
+DATABASE_REPLICAS = []
+for number, host in enumerate(env_list('DB_REPLICA_HOSTS'), start=1):
+    DATABASES[f'replica_{number}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica_{number}')
+DATABASE_ROUTERS = ['student_management.routers.ReplicaRouter']
+DATABASE_PIN_SECONDS = env_float('DATABASE_PIN_SECONDS', 5)  # reads stay on the primary this long after a user writes
+DATABASE_REPLICA_MAX_LAG = env_float('DATABASE_REPLICA_MAX_LAG', 10)  # seconds; a replica further behind is skipped
+DATABASE_REPLICA_CHECK_SECONDS = 10  # how often each process re-checks a replica
+DATABASE_REPLICA_VIEWS = [
+    'home', 'events', 'community', 'societies', 'search_posts', 'booked_events', 'friends',
+    'search-events-list', 'search-events-detail',
+    'search-communities-list', 'search-communities-detail',
+    'search-posts-list', 'search-posts-detail',
+]
+
+logger.info("Using DB %s at %s", DATABASES['default']['NAME'], DATABASES['default'].get('HOST') or 'local')
+
+# Cache. The unread notification counters, rate limits and cached choices/pages must be shared by
+# every worker process, so deployments set CACHE_URL to a redis (redis://host:6379/1) or memcached
+# (memcached://host:11211) server; unset, each process gets its own local-memory cache, which is only
+# right for a single-process development server.
+CACHES = {'default': env_cache('CACHE_URL')}
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -136,6 +199,14 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Static and media serving (see student_management/staticfiles.py); run collectstatic on every deploy
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'student_management.staticfiles.CompressedManifestStaticFilesStorage'},
+}
+STATIC_MAX_AGE = 3600  # seconds, for names without a content hash; hashed ones are cached for a year
+MEDIA_MAX_AGE = 86400  # uploads get a fresh name, so profile pictures can be cached for a day
+
 # Custom user model
 AUTH_USER_MODEL = 'student_management.User'
 
@@ -154,21 +225,131 @@ REST_FRAMEWORK = {
         'django_filters.rest_framework.DjangoFilterBackend',
         'rest_framework.filters.SearchFilter',
     ),
+    # limits come from RATE_LIMITS, by the view's throttle_scope ('api' by default)
+    'DEFAULT_THROTTLE_CLASSES': (
+        'student_management.ratelimit.TokenBucketThrottle',
+    ),
 }
 
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'AUTH_HEADER_TYPES': ('JWT',),
+    # the user model's primary key is user_id (``id`` is only a property)
+    'USER_ID_FIELD': 'user_id',
 }
 
 # Email backend
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
-EMAIL_HOST = os.getenv('EMAIL_HOST')
-EMAIL_PORT = int(os.getenv('EMAIL_PORT'))
-EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS') == 'True'
-EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER')
-EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD')
-DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL')
+EMAIL_HOST = env_str('EMAIL_HOST', 'localhost')
+EMAIL_PORT = env_int('EMAIL_PORT', 587)
+EMAIL_USE_TLS = env_bool('EMAIL_USE_TLS', False)
+EMAIL_HOST_USER = env_str('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = env_str('EMAIL_HOST_PASSWORD', '')
+DEFAULT_FROM_EMAIL = env_str('DEFAULT_FROM_EMAIL', 'webmaster@localhost')
+
+# Real-time notifications (see student_management/notifications.py)
+NOTIFICATION_BROKER = 'student_management.notifications.InProcessBroker'
+NOTIFICATION_STREAM_KEEPALIVE = 15  # seconds between SSE keepalive comments
+NOTIFICATION_UNREAD_CACHE_TIMEOUT = 3600  # bounds drift of the cached unread counters
+NOTIFICATION_RETENTION_DAYS = 90  # read notifications older than this are pruned
+NOTIFICATION_DIGEST_WINDOWS = {'hourly': timedelta(hours=1), 'daily': timedelta(days=1)}
+NOTIFICATION_DIGEST_MAX_MESSAGES = 20  # messages quoted in one digest, the rest are only counted
+
+# Profile picture processing (see student_management/images.py)
+PROFILE_PICTURE_PROCESS_IN_BACKGROUND = True
+PROFILE_PICTURE_WORKERS = 2
+PROFILE_PICTURE_MAX_SIZE = 1024  # px, longest side of the stored picture
+PROFILE_PICTURE_THUMBNAIL_SIZE = 128  # px, square thumbnail used in lists
+PROFILE_PICTURE_QUALITY = 82  # WebP quality
+
+# Per-request profiling (see student_management/profiling.py), off unless PROFILING_ENABLED=True
+PROFILING_ENABLED = env_bool('PROFILING_ENABLED')
+PROFILING_SLOW_MS = 500  # slower requests are logged as warnings
+PROFILING_SAMPLE_RATE = 0.1  # share of requests run under cProfile (dumped only when slow)
+PROFILING_DIR = os.path.join(BASE_DIR, 'profiles')
+
+# Slow-query log and N+1 detection for development/staging (see student_management/queries.py)
+QUERY_INSPECTION_ENABLED = env_bool('QUERY_INSPECTION_ENABLED')
+QUERY_NPLUSONE_THRESHOLD = 5  # same query shape this many times in one request is reported
+QUERY_NPLUSONE_RAISE = env_bool('QUERY_NPLUSONE_RAISE')  # fail instead of logging (tests)
+QUERY_SLOW_MS = 100
+QUERY_REPORT_FILE = env_str('QUERY_REPORT_FILE')  # also write the end-of-run offender ranking here
+
+# Application metrics served at /metrics (see student_management/metrics.py)
+METRICS_TOKEN = env_str('METRICS_TOKEN')  # scrapers send "Authorization: Bearer <token>"
+METRICS_MULTIPROCESS_DIR = env_str('METRICS_MULTIPROCESS_DIR')  # set when running several worker processes
+METRICS_FLUSH_INTERVAL = 5  # seconds between a worker's writes to the multi-process directory
+METRICS_BACKLOG_CACHE_SECONDS = 60  # the unread/digest backlog gauges are recounted at most this often
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'student_management': {
+            'handlers': ['console'],
+            'level': env_str('APP_LOG_LEVEL', 'INFO'),
+        },
+    },
+}
+
+# Home feed (see student_management/posts.py)
+HOME_POSTS_PER_PAGE = 20
+HOME_COMMENTS_PER_POST = 3  # latest comments shown under each post
+COMMENTS_PAGE_SIZE = 20  # comments per "load more" request
+
+# Community listing (see student_management/communities.py)
+COMMUNITIES_PER_PAGE = 24
+COMMUNITY_REQUESTS_CACHE_TIMEOUT = 300  # approved-request interests, also dropped whenever a request is reviewed
+
+# Events listing (see student_management/events.py)
+EVENTS_PER_PAGE = 20
+EVENT_FILTERS_CACHE_TIMEOUT = 300  # society/community dropdowns, also dropped when a community is approved
+
+# Calendar feeds (see student_management/ical.py)
+CALENDAR_PAST_DAYS = 30  # how far back finished events stay in a feed
+CALENDAR_REFRESH_MINUTES = 60  # polling interval suggested to calendar apps
+CALENDAR_CACHE_TIMEOUT = 86400  # rendered events, keyed by their updated_at
+
+# Booking and venue clash checks (see student_management/scheduling.py)
+SCHEDULING_CONFLICTS_ENABLED = True
+SCHEDULING_REBUILD_SECONDS = 3600  # full rebuild of each process's interval index, between incremental syncs
+
+# Form dropdowns (see student_management/choices.py)
+FORM_CHOICES_CACHE_TIMEOUT = 3600  # also dropped whenever an interest, society or community is saved or deleted
+
+# Event archive (see student_management/archive.py, run manage.py archive_events daily)
+EVENT_ARCHIVE_AFTER_DAYS = 30  # finished events and their bookings
+BOOKING_ARCHIVE_AFTER_DAYS = 7  # cancelled bookings
+BOOKING_HISTORY_LIMIT = 20  # past events listed on the booked events page
+
+# Worker boot time budget for manage.py importtime (see student_management/management/commands/importtime.py)
+IMPORT_TIME_BUDGET_MS = env_int('IMPORT_TIME_BUDGET_MS', 1500)
+
+# Rate limits per user (per IP when anonymous) and scope (see student_management/ratelimit.py).
+# "N/period" is a bucket of N requests refilled evenly over the period: s, m, h, d, or e.g. 10m.
+RATELIMIT_ENABLED = env_bool('RATELIMIT_ENABLED', True)
+RATELIMIT_BACKEND = 'student_management.ratelimit.CacheBackend'  # MemoryBackend for tests
+RATELIMIT_CACHE = 'default'  # must be shared by all worker processes (CACHE_URL) for a site-wide limit
+RATELIMIT_IP_HEADER = env_str('RATELIMIT_IP_HEADER')  # e.g. HTTP_X_FORWARDED_FOR behind a reverse proxy
+RATE_LIMITS = {
+    'post': '10/m',
+    'comment': '20/m',
+    'friend-request': '30/h',
+    'booking': '20/m',
+    'society-join': '10/h',
+    'token': '10/m',  # JWT logins, per IP
+    'api': '600/m',  # every other API call
+}
+
+# Import every view module and compile every template while a worker boots instead of on its first
+# requests (see student_management/template_cache.py)
+TEMPLATE_WARMUP = env_bool('TEMPLATE_WARMUP', True)
+
+# Base URL used in links sent by email (account invites)
+SITE_URL = env_str('SITE_URL', 'http://localhost:8000')
 
 #session settings
 SESSION_COOKIE_AGE = 300  # cookie age in seconds (5 minutes)
@@ -12,17 +12,15 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     # path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     # path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
-    path('', include('student_management.urls')),  
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    path('', include('student_management.urls')),
+]
 
 urlpatterns += [
     path('auth/', include('djoser.urls')),
     path('auth/', include('djoser.urls.jwt')),
-] + static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
-
-if settings.DEBUG is False:
-    urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
+]
 
+# static and media files are served by StaticFilesMiddleware (student_management/staticfiles.py)
 if settings.DEBUG:
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
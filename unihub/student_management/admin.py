@@ -3,54 +3,69 @@ from django.db import models
 from django.utils import timezone
 from django.contrib import messages
 from .models import CommunityRequest, Event, Community, Society, Interest, UpdateRequest, CommunityMembership
-from django.core.files.base import ContentFile
 from .models import SocietyJoinRequest
 from .models import Notification
-import os
 from .models import Comment
+from .communities import invalidate_approved_requests
+from . import scheduling
+from .approvals import approve_community_requests, approve_society_join_requests, approve_update_requests, notify_users
 
-# Helper function for creating notifications in admin
-def create_notification(user, message, notification_type='info'):
-    Notification.objects.create(
-        user=user,
-        message=message,
-        notification_type=notification_type,
-    )
+from .notifications import save_notification
+from .digests import queue_for_digest
+from .metrics import ADMIN_ACTIONS, ADMIN_ACTION_SECONDS, NOTIFICATIONS
 
+import functools
 
+# Helper function for creating notifications in admin
+def create_notification(user, message, notification_type='info'):
+    if queue_for_digest(user, message, notification_type):
+        NOTIFICATIONS.inc(type=notification_type, delivery='digest')
+    else:
+        NOTIFICATIONS.inc(type=notification_type, delivery='immediate')
+        save_notification(user, message, notification_type)
+
+
+def track_action(action):
+    # counts and times admin actions for /metrics
+    @functools.wraps(action)
+    def wrapper(modeladmin, request, queryset):
+        with ADMIN_ACTION_SECONDS.time(action=action.__name__):
+            try:
+                result = action(modeladmin, request, queryset)
+            except Exception:
+                ADMIN_ACTIONS.inc(action=action.__name__, outcome='error')
+                raise
+        ADMIN_ACTIONS.inc(action=action.__name__, outcome='ok')
+        return result
+    return wrapper
+
+
+def report_approval(modeladmin, request, approved, errors, success_message, max_errors=20):
+    for obj, reason in errors[:max_errors]:
+        modeladmin.message_user(request, f"⚠️ Skipped '{obj}': {reason}", messages.WARNING)
+    if len(errors) > max_errors:
+        modeladmin.message_user(request, f"⚠️ {len(errors) - max_errors} more rows were skipped.", messages.WARNING)
+    if approved:
+        modeladmin.message_user(request, f"{success_message} ({approved})", messages.SUCCESS)
+
+
+@track_action
 def approve_community_request(modeladmin, request, queryset):
-    for req in queryset:
-        req.status = 'approved'
-        req.reviewed_at = timezone.now()
-        req.reviewed_by = request.user
-        req.save()
-
-        # Only create if a Community doesn't already exist
-        if not Community.objects.filter(community_name=req.community_name).exists():
-            Community.objects.create(
-                community_name=req.community_name,
-                description=req.description,
-                purpose=req.purpose,
-                com_leader=req.requester.get_full_name(),
-                is_approved=True
-            )
-
-        create_notification(req.requester, f"Your community request for '{req.community_name}' has been approved!", 'error')
-
-
-    modeladmin.message_user(request, "✅ Selected community requests were approved and communities created.", messages.SUCCESS)
+    approved, errors = approve_community_requests(queryset, request.user)
+    report_approval(modeladmin, request, approved, errors, "✅ Selected community requests were approved and communities created.")
 
 
 
+@track_action
 def reject_community_request(modeladmin, request, queryset):
+    rejected = list(queryset.select_related('requester'))
     queryset.update(status='rejected', reviewed_at=timezone.now(), reviewed_by=request.user)
+    # a request can be rejected after approval, which changes the cached interests
+    invalidate_approved_requests()
 
     # Create a notification for the user
-    for req in queryset:
-
-        create_notification(req.requester, f"Your community request for '{req.community_name}' has been rejected.", 'success')
+    notify_users([(req.requester, f"Your community request for '{req.community_name}' has been rejected.") for req in rejected], 'error')
 
-        
     modeladmin.message_user(request, "❌ Selected community requests were rejected.", messages.ERROR)
 
 
@@ -69,21 +84,32 @@ admin.site.register(CommunityRequest, CommunityRequestAdmin)
 # Community Admin Configuration
 @admin.register(Community)
 class CommunityAdmin(admin.ModelAdmin):
-    list_display = ('community_name', 'com_leader', 'is_approved')
+    list_display = ('community_name', 'leader', 'is_approved')
+    list_select_related = ('leader',)
+    raw_id_fields = ('leader',)
     search_fields = ('community_name',)
 
 # Event Admin Configuration
 
+@track_action
 def approve_event_request(modeladmin, request, queryset):
+    clashing = []
     for event in queryset:
-        event.is_approved = True
-        event.save()
+        # events approved earlier in this loop count too, the index syncs before every check
+        clashes = scheduling.approve_event(event)
+        if clashes:
+            clashing.append(f"'{event.event_name}' clashes with {scheduling.describe(clashes)}")
+            continue
 
         if hasattr(event, 'requester') and event.requester:
             create_notification(event.requester, f"Your event '{event.event_name}' has been approved!", 'success')
 
-    modeladmin.message_user(request, "✅ Selected events approved.", messages.SUCCESS)
+    if clashing:
+        modeladmin.message_user(request, "⚠️ Not approved, venue already booked: " + "; ".join(clashing), messages.WARNING)
+    else:
+        modeladmin.message_user(request, "✅ Selected events approved.", messages.SUCCESS)
 
+@track_action
 def reject_event_request(modeladmin, request, queryset):
     for event in queryset:
         event.is_approved = False
@@ -115,77 +141,22 @@ class InterestAdmin(admin.ModelAdmin):
     list_display = ('interest_name',)
 
 
+@track_action
 def approve_update_request(modeladmin, request, queryset):
-    for obj in queryset:
-        obj.status = 'approved'
-        obj.reviewed_at = timezone.now()
-        obj.reviewed_by = request.user
-
-        user = obj.user
-        field = obj.field_to_update.lower()
-
-        try:
-            if field == 'name':
-                parts = obj.new_value.strip().split(' ', 1)
-                user.first_name = parts[0]
-                user.last_name = parts[1] if len(parts) > 1 else ''
-            elif field == 'course':
-                user.course = obj.new_value
-            elif field == 'bio':
-                user.bio = obj.new_value
-            elif field == 'date_of_birth':
-                from datetime import datetime
-                try:
-                    user.date_of_birth = datetime.strptime(obj.new_value, "%Y-%m-%d").date()
-                except ValueError:
-                    messages.error(request, f"Invalid date format for {user.email}. Use YYYY-MM-DD.")
-                    continue
-            elif field == 'gender':
-                user.gender = obj.new_value
-            elif field == 'facebook':
-                user.facebook = obj.new_value
-            elif field == 'twitter':
-                user.twitter = obj.new_value
-            elif field == 'instagram':
-                user.instagram = obj.new_value
-            elif field == 'profile_picture' and obj.profile_picture:
-                filename = os.path.basename(obj.profile_picture.name)
-                obj.profile_picture.open()
-                user.profile_picture.save(
-                    filename,
-                    ContentFile(obj.profile_picture.read()),
-                    save=True
-                )
-            else:
-                continue  # skip unknown fields
-
-            user.save()
-            obj.save()
-
-            create_notification(
-                user,
-                f"Your profile update request for '{obj.field_to_update}' has been approved!",
-                'success'
-            )
-
-        except Exception as e:
-            messages.error(request, f"❌ Failed to apply update for {user.email}: {str(e)}")
-
-    modeladmin.message_user(request, "✅ Selected profile updates were approved.", messages.SUCCESS)
+    approved, errors = approve_update_requests(queryset, request.user)
+    report_approval(modeladmin, request, approved, errors, "✅ Selected profile updates were approved.")
 
 
 
 
+@track_action
 def reject_update_request(modeladmin, request, queryset):
+    rejected = list(queryset.select_related('user'))
     queryset.update(status='rejected', reviewed_at=timezone.now(), reviewed_by=request.user)
 
     # Create a notification for the user
-    for obj in queryset:
-
-        create_notification(obj.user, f"Your profile update request for '{obj.field_to_update}' has been rejected.", 'error')
-
+    notify_users([(obj.user, f"Your profile update request for '{obj.field_to_update}' has been rejected.") for obj in rejected], 'error')
 
-        
 
     modeladmin.message_user(request, "❌ Selected profile updates were rejected.", messages.ERROR)
 
@@ -208,32 +179,20 @@ class CommunityMembershipAdmin(admin.ModelAdmin):
     search_fields = ('user__first_name', 'user__last_name', 'community__community_name')
 
 # --- Society Join Request Actions ---
+@track_action
 def approve_society_join_request(modeladmin, request, queryset):
-    for join_req in queryset:
-        join_req.status = 'approved'
-        join_req.reviewed_by = request.user
-        join_req.reviewed_at = timezone.now()
-        join_req.society.members.add(join_req.user)
-        join_req.save()
-
-        # Create a notification for the user
-
-        create_notification(join_req.user, f"Your join request to the society '{join_req.society.society_name}' has been approved!", 'success')
-
-
-
-    modeladmin.message_user(request, "✅ Selected society join requests approved.", messages.SUCCESS)
+    approved, errors = approve_society_join_requests(queryset, request.user)
+    report_approval(modeladmin, request, approved, errors, "✅ Selected society join requests approved.")
 
 
+@track_action
 def reject_society_join_request(modeladmin, request, queryset):
+    rejected = list(queryset.select_related('user', 'society'))
     queryset.update(status='rejected', reviewed_by=request.user, reviewed_at=timezone.now())
 
     # Create a notification for the user
-    for join_req in queryset:
-
-        create_notification(join_req.user, f"Your join request to the society '{join_req.society.society_name}' has been rejected.", 'error')
+    notify_users([(join_req.user, f"Your join request to the society '{join_req.society.society_name}' has been rejected.") for join_req in rejected], 'error')
 
-        
 
     modeladmin.message_user(request, "❌ Selected society join requests rejected.", messages.ERROR)
 
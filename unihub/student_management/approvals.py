@@ -0,0 +1,217 @@
+from datetime import datetime
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import choices
+from .communities import invalidate_approved_requests
+from .digests import queue_for_digest
+from .images import link_file, process_update_request_picture
+from .metrics import NOTIFICATIONS
+from .models import Community, Notification, Society, User
+from .notifications import bulk_save_notifications
+
+
+# === Set-based approval workflows ===
+# Used by the admin actions: each workflow validates the selected rows in
+# Python, then applies all the valid ones with a handful of statements (one
+# UPDATE for the statuses, bulk_create/bulk_update for the side effects)
+# inside a single transaction. Rows that can't be applied are left untouched
+# and returned as (row, reason) pairs so the caller can report them.
+
+BATCH_SIZE = 500
+
+
+def notify_users(users_messages, notification_type='info'):
+    """Notify many users at once, honouring their digest preference."""
+    users_messages = list(users_messages)
+    immediate = [
+        Notification(user=user, message=message, notification_type=notification_type)
+        for user, message in users_messages
+        if not queue_for_digest(user, message, notification_type)
+    ]
+    bulk_save_notifications(immediate)
+    NOTIFICATIONS.inc(len(immediate), type=notification_type, delivery='immediate')
+    NOTIFICATIONS.inc(len(users_messages) - len(immediate), type=notification_type, delivery='digest')
+
+
+def approve_community_requests(queryset, reviewer):
+    community_name_length = Community._meta.get_field('community_name').max_length
+    errors = []
+
+    with transaction.atomic():
+        requests = list(queryset.select_related('requester').select_for_update())
+
+        valid = []
+        for req in requests:
+            if req.status == 'approved':
+                errors.append((req, "already approved"))
+            elif len(req.community_name) > community_name_length:
+                errors.append((req, f"community name is longer than {community_name_length} characters"))
+            else:
+                valid.append(req)
+        if not valid:
+            return 0, errors
+
+        queryset.model.objects.filter(pk__in=[req.pk for req in valid]).update(
+            status='approved', reviewed_at=timezone.now(), reviewed_by=reviewer,
+        )
+
+        # Only create communities that don't already exist (also across the selection)
+        existing = set(
+            Community.objects.filter(community_name__in={req.community_name for req in valid})
+            .values_list('community_name', flat=True)
+        )
+        communities = {}
+        for req in valid:
+            if req.community_name not in existing:
+                existing.add(req.community_name)
+                communities[req.community_name] = (req, Community(
+                    community_name=req.community_name,
+                    description=req.description,
+                    purpose=req.purpose,
+                    leader=req.requester,
+                    is_approved=True,
+                ))
+        Community.objects.bulk_create([community for _, community in communities.values()], batch_size=BATCH_SIZE)
+
+        # Copy each request's interests onto its new community (ids re-read: MySQL doesn't return them)
+        ids = dict(Community.objects.filter(community_name__in=communities).values_list('community_name', 'community_id'))
+        RequestInterest = queryset.model.interests.through
+        request_ids = {req.pk: ids[name] for name, (req, _) in communities.items()}
+        CommunityInterest = Community.interests.through
+        CommunityInterest.objects.bulk_create(
+            [
+                CommunityInterest(community_id=request_ids[request_id], interest_id=interest_id)
+                for request_id, interest_id in RequestInterest.objects.filter(communityrequest_id__in=request_ids)
+                .values_list('communityrequest_id', 'interest_id')
+            ],
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        transaction.on_commit(invalidate_approved_requests)
+        # bulk_create sends no post_save, so the form choices don't know about the new communities
+        transaction.on_commit(choices.invalidate_all)
+
+        notify_users(
+            [(req.requester, f"Your community request for '{req.community_name}' has been approved!") for req in valid],
+            'success',
+        )
+
+    return len(valid), errors
+
+
+def approve_society_join_requests(queryset, reviewer):
+    errors = []
+
+    with transaction.atomic():
+        join_requests = list(queryset.select_related('user', 'society').select_for_update())
+
+        valid = []
+        for join_req in join_requests:
+            if join_req.status == 'approved':
+                errors.append((join_req, "already approved"))
+            else:
+                valid.append(join_req)
+        if not valid:
+            return 0, errors
+
+        queryset.model.objects.filter(pk__in=[join_req.pk for join_req in valid]).update(
+            status='approved', reviewed_at=timezone.now(), reviewed_by=reviewer,
+        )
+
+        # Insert the Society.members rows directly; existing memberships are skipped
+        Membership = Society.members.through
+        Membership.objects.bulk_create(
+            [Membership(society_id=join_req.society_id, user_id=join_req.user_id) for join_req in valid],
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+
+        notify_users(
+            [
+                (join_req.user, f"Your join request to the society '{join_req.society.society_name}' has been approved!")
+                for join_req in valid
+            ],
+            'success',
+        )
+
+    return len(valid), errors
+
+
+def apply_update_request(user, update_request):
+    """Copy the requested change onto ``user`` (unsaved); returns the names of the changed fields."""
+    field = update_request.field_to_update.lower()
+    value = update_request.new_value
+
+    if field == 'name':
+        parts = value.strip().split(' ', 1)
+        user.first_name = parts[0]
+        user.last_name = parts[1] if len(parts) > 1 else ''
+        return ['first_name', 'last_name']
+    if field in ('course', 'bio', 'gender', 'facebook', 'twitter', 'instagram'):
+        setattr(user, field, value)
+        return [field]
+    if field == 'date_of_birth':
+        try:
+            user.date_of_birth = datetime.strptime(value, "%Y-%m-%d").date()
+        except (TypeError, ValueError):
+            raise ValueError("Invalid date format, use YYYY-MM-DD.")
+        return ['date_of_birth']
+    if field == 'profile_picture' and update_request.profile_picture:
+        if update_request.image_status == 'pending':
+            # the background worker hasn't got to it yet; processing claims it so the worker then skips it
+            process_update_request_picture(update_request.pk)
+            update_request.refresh_from_db(fields=['profile_picture', 'profile_thumbnail', 'image_status'])
+        if update_request.image_status == 'processing':
+            raise ValueError("The picture is still being processed, try again in a moment.")
+        if update_request.image_status != 'ready':
+            raise ValueError("The uploaded picture is not a valid image.")
+        user.profile_picture.name = link_file(update_request.profile_picture, 'profile_pics')
+        user.profile_thumbnail.name = link_file(update_request.profile_thumbnail, 'profile_pics/thumbs')
+        return ['profile_picture', 'profile_thumbnail']
+    raise ValueError(f"Unknown field: {field}")
+
+
+def approve_update_requests(queryset, reviewer):
+    errors = []
+
+    with transaction.atomic():
+        update_requests = list(queryset.select_related('user').select_for_update().order_by('created_at'))
+
+        # Several requests for the same user are applied in order to one instance
+        users = {}
+        changed_fields = set()
+        valid = []
+        for update_request in update_requests:
+            if update_request.status == 'approved':
+                errors.append((update_request, "already approved"))
+                continue
+            user = users.setdefault(update_request.user_id, update_request.user)
+            try:
+                changed_fields.update(apply_update_request(user, update_request))
+            except Exception as e:
+                errors.append((update_request, str(e)))
+                continue
+            valid.append(update_request)
+        if not valid:
+            return 0, errors
+
+        User.objects.bulk_update(
+            [users[user_id] for user_id in {update_request.user_id for update_request in valid}],
+            sorted(changed_fields),
+            batch_size=BATCH_SIZE,
+        )
+        queryset.model.objects.filter(pk__in=[update_request.pk for update_request in valid]).update(
+            status='approved', reviewed_at=timezone.now(), reviewed_by=reviewer,
+        )
+
+        notify_users(
+            [
+                (users[update_request.user_id], f"Your profile update request for '{update_request.field_to_update}' has been approved!")
+                for update_request in valid
+            ],
+            'success',
+        )
+
+    return len(valid), errors
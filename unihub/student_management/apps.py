@@ -1,10 +1,24 @@
 from django.apps import AppConfig
+from django.core import checks
+
+
+@checks.register(checks.Tags.caches)
+def check_rate_limit_store(app_configs, **kwargs):
+    # imported here: workers don't load the rate limiter (or DRF's throttling) until a request needs it
+    from .ratelimit import check_shared_store
+
+    return check_shared_store(app_configs, **kwargs)
 
 
 class StudentManagementConfig(AppConfig):
+    default = True
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'student_management'
 
+    def ready(self):
+        # connects the cache invalidation and scheduling index receivers
+        from . import choices, scheduling
+
 class YourAppConfig(AppConfig):
     name = 'student_management'
 
@@ -0,0 +1,100 @@
+from itertools import chain
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ArchivedBooking, ArchivedEvent, Event, EventDetails
+
+
+# === Event archive ===
+# Listings, bookings and the scheduling index only ever look at events that
+# haven't finished, but Event and EventDetails used to keep every row ever
+# written, cancelled bookings included. archive_events moves finished events
+# (with all their bookings) and old cancelled bookings into the archive
+# tables in small transactions, one batch at a time; rows keep their ids, so
+# links and exports keep working. A database can hand out an archived id
+# again (MySQL before 8.0 and SQLite reuse the highest id after it's been
+# deleted); a batch whose ids are already in the archive is rolled back with
+# ArchiveConflict instead of deleting rows it couldn't copy. Views that show
+# history read through both the hot and the archive tables with the helpers
+# below.
+
+EVENT_FIELDS = [field.attname for field in ArchivedEvent._meta.concrete_fields if field.name != 'archived_at']
+BOOKING_FIELDS = [field.attname for field in ArchivedBooking._meta.concrete_fields if field.name != 'archived_at']
+
+
+class ArchiveConflict(Exception):
+    pass
+
+
+def _copy(model, rows):
+    """Insert ``rows`` into the archive table ``model``; raises ArchiveConflict if any id is already there."""
+    ids = [row[model._meta.pk.attname] for row in rows]
+    taken = sorted(model.objects.filter(pk__in=ids).values_list('pk', flat=True))
+    if taken:
+        raise ArchiveConflict(
+            f"{model._meta.db_table} already has id(s) {', '.join(map(str, taken[:20]))}; nothing in this batch was moved."
+        )
+    model.objects.bulk_create([model(**row) for row in rows])
+
+
+def _move_bookings(bookings):
+    rows = list(bookings.values(*BOOKING_FIELDS))
+    _copy(ArchivedBooking, rows)
+    EventDetails.objects.filter(pk__in=[row['event_details_id'] for row in rows]).delete()
+    return len(rows)
+
+
+def archive_finished_events(before, batch_size=500):
+    """Move events that ended before ``before``, and their bookings. Returns (events, bookings) moved."""
+    events = bookings = 0
+    while True:
+        with transaction.atomic():
+            ids = list(Event.objects.filter(end_time__lt=before).order_by('pk').values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                break
+            _copy(ArchivedEvent, list(Event.objects.filter(pk__in=ids).values(*EVENT_FIELDS)))
+            bookings += _move_bookings(EventDetails.objects.filter(event_id__in=ids))
+            Event.objects.filter(pk__in=ids).delete()
+            events += len(ids)
+    return events, bookings
+
+
+def archive_cancelled_bookings(before, batch_size=500):
+    """Move bookings cancelled before ``before``. Returns how many were moved."""
+    moved = 0
+    while True:
+        with transaction.atomic():
+            batch = EventDetails.objects.filter(pk__in=list(
+                EventDetails.objects.filter(can_book=False, updated_at__lt=before)
+                .order_by('pk').values_list('pk', flat=True)[:batch_size]
+            ))
+            count = _move_bookings(batch)
+        if not count:
+            return moved
+        moved += count
+
+
+# --- read-through ---
+
+def find_event(event_id):
+    """The live event with this id, else its archived copy, else None."""
+    return Event.objects.filter(pk=event_id).first() or ArchivedEvent.objects.filter(pk=event_id).first()
+
+
+def past_bookings(user, limit=20):
+    """The most recent finished events ``user`` attended, from both the hot and the archive tables."""
+    live = list(
+        Event.objects.filter(eventdetails__user=user, eventdetails__can_book=True, end_time__lt=timezone.now())
+        .distinct().order_by('-start_time')[:limit]
+    )
+    archived_ids = ArchivedBooking.objects.filter(user=user, can_book=True).values('event_id')
+    archived = list(ArchivedEvent.objects.filter(pk__in=archived_ids).order_by('-start_time')[:limit])
+    return sorted(chain(live, archived), key=lambda event: event.start_time, reverse=True)[:limit]
+
+
+def archived_attendees(event_id, include_cancelled=False):
+    bookings = ArchivedBooking.objects.filter(event_id=event_id)
+    if not include_cancelled:
+        bookings = bookings.filter(can_book=True)
+    return bookings
@@ -0,0 +1,9 @@
+from django.db.backends.mysql import base
+
+from student_management.dbpool import PooledDatabaseWrapperMixin
+
+
+# MySQL with a per-process connection pool (see student_management/dbpool.py)
+class DatabaseWrapper(PooledDatabaseWrapperMixin, base.DatabaseWrapper):
+    def ping(self, conn):
+        conn.ping()
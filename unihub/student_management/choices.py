@@ -0,0 +1,73 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .events import invalidate_filter_choices
+from .models import Community, Interest, Society
+
+
+# === Cached form choices ===
+# The event and community request forms offer every interest, society and
+# community in a dropdown, which used to cost a query per select on every
+# render. The (pk, label) rows are cached here and dropped whenever one of
+# those models is saved or deleted; bulk writes (imports, set-based
+# approvals) send no signals, so they call invalidate_all() once they commit.
+# The cache is only as shared as the default cache: with a local-memory cache
+# (no CACHE_URL) other worker processes keep their copy until
+# FORM_CHOICES_CACHE_TIMEOUT. Validation still checks the submitted ids
+# against the real queryset.
+
+CACHE_KEYS = {
+    Interest: 'choices:interests',
+    Society: 'choices:approved-societies',
+    Community: 'choices:communities',
+}
+
+
+def _cached(model, queryset):
+    key = CACHE_KEYS[model]
+    rows = cache.get(key)
+    if rows is None:
+        # from the primary, even on a replica-routed page (see routers.py)
+        rows = [(obj.pk, str(obj)) for obj in queryset.using('default')]
+        cache.set(key, rows, getattr(settings, 'FORM_CHOICES_CACHE_TIMEOUT', 3600))
+    return rows
+
+
+def interests():
+    return Interest.objects.all()
+
+
+def approved_societies():
+    return Society.objects.filter(is_approved=True)
+
+
+def communities():
+    return Community.objects.all()
+
+
+QUERYSETS = {Interest: interests, Society: approved_societies, Community: communities}
+
+
+def use_cached_choices(field, model):
+    """Point a model choice field at its shared queryset and render it from the cached rows."""
+    field.queryset = QUERYSETS[model]()
+    rows = _cached(model, field.queryset)
+    # setting choices replaces the field's query-per-render iterator; clean() still uses the queryset
+    field.choices = rows if field.empty_label is None else [('', field.empty_label)] + rows
+
+
+@receiver([post_save, post_delete], sender=Interest, dispatch_uid='choices-interest')
+@receiver([post_save, post_delete], sender=Society, dispatch_uid='choices-society')
+@receiver([post_save, post_delete], sender=Community, dispatch_uid='choices-community')
+def invalidate(sender, **kwargs):
+    cache.delete(CACHE_KEYS[sender])
+    # the events page dropdowns list the same societies and communities
+    invalidate_filter_choices()
+
+
+def invalidate_all():
+    """Drop every cached choice list, after writes that bypass the signals (bulk_create, update())."""
+    cache.delete_many(list(CACHE_KEYS.values()))
+    invalidate_filter_choices()
@@ -0,0 +1,81 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Exists, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Community, CommunityMembership, CommunityRequest
+
+
+# === Community listing ===
+# The community page is one paginated queryset: each community comes with
+# its leader (join), member count and the viewer's membership (subqueries)
+# and its interests (one prefetch query for the page). Communities approved
+# before their request's interests were copied over show the interests of the
+# approved request instead; that mapping only changes when a request is
+# reviewed, so it is cached and dropped by the review paths.
+
+APPROVED_REQUESTS_CACHE_KEY = 'communities:approved-request-interests'
+
+
+def search_filter(model, search_query):
+    # Exists() on the interests table instead of a join, so matches don't duplicate rows
+    through = model.interests.through
+    owner = model._meta.get_field('interests').m2m_field_name()
+    interest_match = Exists(
+        through.objects.filter(**{owner: OuterRef('pk')}, interest__interest_name__icontains=search_query)
+    )
+    return Q(community_name__icontains=search_query) | Q(description__icontains=search_query) | interest_match
+
+
+def listing(user, search_query='', filter_option=''):
+    members = (
+        CommunityMembership.objects.filter(community=OuterRef('pk'))
+        .order_by().values('community').annotate(n=Count('pk')).values('n')
+    )
+    communities = (
+        Community.objects.filter(is_approved=True)
+        .select_related('leader')
+        .prefetch_related('interests')
+        .annotate(
+            member_count=Coalesce(Subquery(members), 0),
+            is_member=Exists(CommunityMembership.objects.filter(community=OuterRef('pk'), user=user)),
+        )
+        .order_by('community_name', 'community_id')
+    )
+    if search_query:
+        communities = communities.filter(search_filter(Community, search_query))
+    if filter_option == 'joined':
+        communities = communities.filter(is_member=True)
+    elif filter_option == 'my_requests':
+        communities = communities.filter(leader=user)
+    return communities
+
+
+def user_requests(user, search_query='', status=''):
+    requests = CommunityRequest.objects.filter(requester=user).prefetch_related('interests').order_by('-created_at')
+    if status:
+        requests = requests.filter(status=status)
+    if search_query:
+        requests = requests.filter(search_filter(CommunityRequest, search_query))
+    return requests
+
+
+def approved_request_interests():
+    """{community name: [interest names]} from approved community requests, cached."""
+    interests = cache.get(APPROVED_REQUESTS_CACHE_KEY)
+    if interests is None:
+        interests = {}
+        # from the primary, even on a replica-routed page (see routers.py); a join, as a prefetch would be routed again
+        rows = CommunityRequest.objects.using('default').filter(status='approved').values_list(
+            'community_name', 'interests__interest_name',
+        ).order_by('pk')
+        for community_name, interest_name in rows:
+            names = interests.setdefault(community_name, [])
+            if interest_name is not None:
+                names.append(interest_name)
+        cache.set(APPROVED_REQUESTS_CACHE_KEY, interests, getattr(settings, 'COMMUNITY_REQUESTS_CACHE_TIMEOUT', 300))
+    return interests
+
+
+def invalidate_approved_requests():
+    cache.delete(APPROVED_REQUESTS_CACHE_KEY)
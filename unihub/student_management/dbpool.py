@@ -0,0 +1,126 @@
+import logging
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+# === Database connection pool ===
+# With CONN_MAX_AGE each worker thread keeps its own persistent connection,
+# which is right for a few sync workers but wasteful for threaded or ASGI
+# servers, where sync_to_async threads come and go and each would open (and
+# hold) a connection of its own. The pooled backend instead runs with
+# CONN_MAX_AGE = 0 and hands connections back to a small per-process pool
+# when Django "closes" them at the end of a request; the next request on any
+# thread reuses one without the TCP/TLS/auth round trips. Connections that
+# sat idle for a while are pinged before reuse, ones idle past MAX_IDLE are
+# closed, and anything left in a transaction or after an error is closed
+# instead of being returned.
+#
+# Enabled per alias with ENGINE 'student_management.backends.mysql_pooled'
+# and DATABASES[alias]['POOL'] = {'SIZE': ..., 'MAX_IDLE': ..., 'PING_AFTER': ...}.
+
+DEFAULTS = {'SIZE': 10, 'MAX_IDLE': 300, 'PING_AFTER': 5}
+
+
+class ConnectionPool:
+    def __init__(self, size, max_idle):
+        self.size = size
+        self.max_idle = max_idle
+        self.idle = deque()  # (raw connection, returned at), most recently returned last
+        self.lock = threading.Lock()
+
+    def get(self):
+        """An idle connection and how long it sat in the pool, or (None, None)."""
+        now = time.monotonic()
+        expired = []
+        found = (None, None)
+        with self.lock:
+            while self.idle:
+                conn, returned_at = self.idle.pop()
+                if now - returned_at > self.max_idle:
+                    expired.append(conn)
+                    continue
+                found = (conn, now - returned_at)
+                break
+            # everything older than an expired connection has expired too
+            if expired:
+                expired.extend(conn for conn, _ in self.idle)
+                self.idle.clear()
+        for conn in expired:
+            close_quietly(conn)
+        return found
+
+    def put(self, conn):
+        with self.lock:
+            if len(self.idle) < self.size:
+                self.idle.append((conn, time.monotonic()))
+                return True
+        return False
+
+    def clear(self):
+        with self.lock:
+            conns = [conn for conn, _ in self.idle]
+            self.idle.clear()
+        for conn in conns:
+            close_quietly(conn)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def pool_for(alias, settings_dict):
+    with _pools_lock:
+        if alias not in _pools:
+            options = {**DEFAULTS, **settings_dict.get('POOL', {})}
+            _pools[alias] = ConnectionPool(options['SIZE'], options['MAX_IDLE'])
+        return _pools[alias]
+
+
+def close_quietly(conn):
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+
+class PooledDatabaseWrapperMixin:
+    """Borrow connections from the alias's pool instead of opening one per request."""
+
+    def ping(self, conn):
+        # backends override this with something cheaper when the driver has it
+        with conn.cursor() as cursor:
+            cursor.execute('SELECT 1')
+
+    @property
+    def pool(self):
+        return pool_for(self.alias, self.settings_dict)
+
+    def get_new_connection(self, conn_params):
+        ping_after = {**DEFAULTS, **self.settings_dict.get('POOL', {})}['PING_AFTER']
+        while True:
+            conn, idle_for = self.pool.get()
+            if conn is None:
+                return super().get_new_connection(conn_params)
+            if idle_for < ping_after:
+                return conn
+            try:
+                self.ping(conn)
+                return conn
+            except Exception:
+                logger.info("Dropping dead pooled connection for %s", self.alias)
+                close_quietly(conn)
+
+    def _close(self):
+        if self.connection is None:
+            return
+        reusable = (
+            not self.in_atomic_block
+            and not self.errors_occurred
+            and self.get_autocommit() == self.settings_dict['AUTOCOMMIT']
+        )
+        if reusable and self.pool.put(self.connection):
+            return
+        return super()._close()
@@ -0,0 +1,86 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.template.defaultfilters import linebreaksbr
+from django.utils import timezone
+
+from .models import NotificationDigest
+from .notifications import save_notification
+
+
+# === Notification digests ===
+# Users who picked an hourly or daily digest don't get a Notification row and
+# an email per action. Their notifications are coalesced per type into one
+# NotificationDigest row, and flush_due_digests() (run from cron through the
+# send_notification_digests command) turns each due digest into a single
+# notification and a single email.
+
+DEFAULT_WINDOWS = {
+    'hourly': timedelta(hours=1),
+    'daily': timedelta(days=1),
+}
+
+
+def digest_window(user):
+    windows = getattr(settings, 'NOTIFICATION_DIGEST_WINDOWS', DEFAULT_WINDOWS)
+    return windows.get(user.notification_digest)
+
+
+def queue_for_digest(user, message, notification_type='info'):
+    """Add the message to the user's open digest; False if they want it immediately."""
+    window = digest_window(user)
+    if window is None:
+        return False
+
+    max_messages = getattr(settings, 'NOTIFICATION_DIGEST_MAX_MESSAGES', 20)
+    with transaction.atomic():
+        digest, created = NotificationDigest.objects.select_for_update().get_or_create(
+            user=user,
+            notification_type=notification_type,
+            defaults={'due_at': timezone.now() + window, 'frequency': user.notification_digest},
+        )
+        # only the first few messages are quoted in the digest, the rest are counted
+        if len(digest.messages) < max_messages:
+            digest.messages.append(message)
+        digest.count += 1
+        digest.save(update_fields=['messages', 'count'])
+    return True
+
+
+def digest_message(digest):
+    noun = 'notification' if digest.count == 1 else 'notifications'
+    lines = [f"You have {digest.count} new {noun}:"]
+    lines += [f"• {message}" for message in digest.messages]
+    if digest.count > len(digest.messages):
+        lines.append(f"…and {digest.count - len(digest.messages)} more.")
+    return '\n'.join(lines)
+
+
+def digest_subject(digest):
+    # the frequency the digest was opened with; the user may have switched to "immediately" since
+    if digest.frequency:
+        return f"[UWE Hub] Your {digest.get_frequency_display().lower()}"
+    return "[UWE Hub] Your notification digest"
+
+
+def flush_due_digests(now=None, send_email=True):
+    """Send every digest whose window has closed; returns how many were sent."""
+    from .views.notifications import send_pretty_email
+
+    now = now or timezone.now()
+    sent = 0
+    due_ids = list(NotificationDigest.objects.filter(due_at__lte=now).values_list('pk', flat=True))
+    for digest_id in due_ids:
+        with transaction.atomic():
+            # lock the row so a message queued meanwhile isn't lost when it's deleted
+            digest = NotificationDigest.objects.select_for_update().select_related('user').filter(pk=digest_id).first()
+            if digest is None:
+                continue
+            message = digest_message(digest)
+            save_notification(digest.user, message, digest.notification_type)
+            digest.delete()
+        if send_email:
+            send_pretty_email(digest.user, digest_subject(digest), linebreaksbr(message))
+        sent += 1
+    return sent
@@ -0,0 +1,84 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import BooleanField, Case, Count, Exists, F, OuterRef, Q, Subquery, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Community, Event, EventDetails, Society
+
+
+# === Event listing ===
+# The events page is one paginated queryset: each upcoming event carries its
+# active booking count (a subquery over EventDetails rows that still hold a
+# place), whether it is full and whether the viewer already booked it, all
+# computed in SQL. The society/community dropdowns only change when one is
+# approved, so they are cached as plain (id, name) rows.
+
+FILTER_CHOICES_CACHE_KEY = 'events:filter-choices'
+
+
+def listing(user, search_query='', filter_option='', society_id='', community_id=''):
+    bookings = (
+        EventDetails.objects.filter(event=OuterRef('pk'), can_book=True)
+        .order_by().values('event').annotate(n=Count('pk')).values('n')
+    )
+    events = (
+        Event.objects.filter(start_time__gte=timezone.now(), is_approved=True)
+        .annotate(
+            active_bookings=Coalesce(Subquery(bookings), 0),
+            is_booked_by_me=Exists(EventDetails.objects.filter(event=OuterRef('pk'), user=user, can_book=True)),
+        )
+        .annotate(
+            is_full=Case(
+                When(maximum_capacity__gt=0, active_bookings__gte=F('maximum_capacity'), then=True),
+                default=False,
+                output_field=BooleanField(),
+            ),
+        )
+        .order_by('-start_time', '-event_id')
+    )
+    if search_query:
+        events = events.filter(
+            Q(event_name__icontains=search_query) |
+            Q(info__icontains=search_query) |
+            Q(actual_location__icontains=search_query)
+        )
+    if filter_option == 'online':
+        events = events.filter(location_type='Online')
+    elif filter_option == 'on-campus':
+        events = events.filter(location_type='On-Campus')
+    if society_id:
+        events = events.filter(society_id=society_id)
+    if community_id:
+        events = events.filter(community_id=community_id)
+    return events
+
+
+def spots_left(event):
+    # None means unlimited capacity, like maximum_capacity itself
+    if not event.maximum_capacity:
+        return None
+    return event.maximum_capacity - event.active_bookings
+
+
+def filter_choices():
+    """{'societies': [...], 'communities': [...]} of approved (id, name) rows for the dropdowns, cached."""
+    choices = cache.get(FILTER_CHOICES_CACHE_KEY)
+    if choices is None:
+        # from the primary, even on a replica-routed page (see routers.py)
+        choices = {
+            'societies': list(
+                Society.objects.using('default').filter(is_approved=True).order_by('society_name')
+                .values('society_id', 'society_name')
+            ),
+            'communities': list(
+                Community.objects.using('default').filter(is_approved=True).order_by('community_name')
+                .values('community_id', 'community_name')
+            ),
+        }
+        cache.set(FILTER_CHOICES_CACHE_KEY, choices, getattr(settings, 'EVENT_FILTERS_CACHE_TIMEOUT', 300))
+    return choices
+
+
+def invalidate_filter_choices():
+    cache.delete(FILTER_CHOICES_CACHE_KEY)
@@ -0,0 +1,90 @@
+import csv
+import json
+from itertools import chain
+
+from .archive import archived_attendees
+from .models import CommunityRequest, EventDetails, Society, SocietyJoinRequest, UpdateRequest
+
+
+# === Streaming exports ===
+# Every dataset is a (header, rows) pair where rows is a lazy values_list()
+# iterator, so an export only ever holds one chunk of rows in memory no
+# matter how large the table is. The same generators back the download
+# views and the export_data management command.
+
+CHUNK_SIZE = 2000
+
+
+class Echo:
+    """File-like object for csv.writer that hands each row back instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(header, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def jsonl_lines(header, rows):
+    for row in rows:
+        yield json.dumps(dict(zip(header, row)), default=str) + '\n'
+
+
+FORMATS = {
+    'csv': (csv_lines, 'text/csv'),
+    'jsonl': (jsonl_lines, 'application/x-ndjson'),
+}
+
+
+def society_members(society_id):
+    header = ['user_id', 'first_name', 'last_name', 'email', 'course']
+    rows = (
+        Society.members.through.objects.filter(society_id=society_id)
+        .order_by('pk')
+        .values_list('user__user_id', 'user__first_name', 'user__last_name', 'user__email', 'user__course')
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+    return header, rows
+
+
+def event_attendees(event_id, include_cancelled=False):
+    header = ['booking_id', 'user_id', 'first_name', 'last_name', 'email', 'active']
+    bookings = EventDetails.objects.filter(event_id=event_id)
+    if not include_cancelled:
+        bookings = bookings.filter(can_book=True)
+    columns = ['event_details_id', 'user__user_id', 'user__first_name', 'user__last_name', 'user__email', 'can_book']
+    # archived bookings of the event come after the live ones (see archive.py)
+    rows = chain(
+        bookings.order_by('pk').values_list(*columns).iterator(chunk_size=CHUNK_SIZE),
+        archived_attendees(event_id, include_cancelled).order_by('pk').values_list(*columns).iterator(chunk_size=CHUNK_SIZE),
+    )
+    return header, rows
+
+
+REQUEST_HISTORIES = {
+    'society-join': (
+        SocietyJoinRequest,
+        ['id', 'user__email', 'society__society_name', 'reason', 'status', 'created_at', 'reviewed_by__email', 'reviewed_at'],
+    ),
+    'community': (
+        CommunityRequest,
+        ['id', 'requester__email', 'community_name', 'status', 'created_at', 'reviewed_by__email', 'reviewed_at'],
+    ),
+    'update': (
+        UpdateRequest,
+        ['id', 'user__email', 'field_to_update', 'old_value', 'new_value', 'status', 'created_at', 'reviewed_by__email', 'reviewed_at'],
+    ),
+}
+
+
+def request_history(kind, status=None):
+    model, header = REQUEST_HISTORIES[kind]
+    requests = model.objects.all()
+    if status:
+        requests = requests.filter(status=status)
+    rows = requests.order_by('pk').values_list(*header).iterator(chunk_size=CHUNK_SIZE)
+    return header, rows
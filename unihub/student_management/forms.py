@@ -1,11 +1,12 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm
 from django.forms import ModelForm
-from .models import User, CommunityRequest, Interest, Event, UpdateRequest
+from .models import User, CommunityRequest, Interest, Event, UpdateRequest, Community, Society
 from django.core.validators import MinValueValidator
 from django.core.exceptions import ValidationError
 from django.utils import timezone
 from datetime import date
+from . import choices, scheduling
 
 
 # === User Registration Form ===
@@ -31,7 +32,7 @@ class CommunityForm(forms.ModelForm):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.fields['interests'].queryset = Interest.objects.all()
+        choices.use_cached_choices(self.fields['interests'], Interest)
 
 
 # === Update Request Form ===
@@ -86,20 +87,27 @@ class EventForm(forms.ModelForm):
         model = Event
         fields = ['event_name', 'start_time', 'end_time', 'info', 'community', 'society', 'location_type', 'actual_location','maximum_capacity','required_materials']
 
-    current_time = timezone.now()
-
     start_time = forms.DateTimeField(
         widget=forms.DateTimeInput(attrs={'type': 'datetime-local', 'step': 60}),
-        validators=[MinValueValidator(current_time, message="Start Datetime cannot be in the past.")],
-        initial=current_time.replace(second=0, microsecond=0)
     )
 
     end_time = forms.DateTimeField(
         widget=forms.DateTimeInput(attrs={'type': 'datetime-local', 'step': 60}),  # step 60 = no seconds
-        validators=[MinValueValidator(current_time, message="End Datetime cannot be in the past.")],
-        initial=current_time.replace(second=0, microsecond=0)
     )
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # "now" is when this form is built, not when the worker started
+        now = timezone.now()
+        self.fields['start_time'].validators = [MinValueValidator(now, message="Start Datetime cannot be in the past.")]
+        self.fields['end_time'].validators = [MinValueValidator(now, message="End Datetime cannot be in the past.")]
+        self.fields['start_time'].initial = self.fields['end_time'].initial = (
+            timezone.localtime(now).replace(second=0, microsecond=0)
+        )
+        #only approved societies can organise events
+        choices.use_cached_choices(self.fields['society'], Society)
+        choices.use_cached_choices(self.fields['community'], Community)
+
     def clean(self):
         cleaned_data = super().clean()
         start_time = cleaned_data.get("start_time")
@@ -107,6 +115,15 @@ class EventForm(forms.ModelForm):
 
         if start_time and end_time and end_time <= start_time:
             raise ValidationError("End Datetime must be after Start Datetime.")
+
+        # the venue must be free for the whole event
+        if start_time and end_time:
+            clashes = scheduling.venue_conflicts(
+                start_time, end_time, cleaned_data.get('location_type'), cleaned_data.get('actual_location'),
+                exclude=self.instance.pk,
+            )
+            if clashes:
+                self.add_error('actual_location', f"This venue is already booked for {scheduling.describe(clashes)}.")
         return cleaned_data
 
 
@@ -0,0 +1,188 @@
+import hashlib
+import secrets
+from datetime import timedelta, timezone as dt_timezone
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.db import router
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+
+from .models import CommunityMembership, Event, EventDetails, User
+
+
+# === Calendar feeds ===
+# Every user gets a private iCalendar URL (a signed token instead of a login,
+# since calendar apps can't hold a session; it includes a per-user key, so
+# resetting the key revokes a leaked link) with the events they booked, or
+# with scope=joined, every approved event of their societies and communities.
+# Calendar apps poll these URLs, so a poll that changed nothing has to be
+# cheap: one query lists the feed's (event id, updated_at) pairs, their hash
+# is the feed's sync token (the ETag), and an unchanged token is answered with
+# 304 Not Modified. When something did change, each event's VEVENT block is
+# cached under its own updated_at, so only new or edited events are rendered
+# again and the rest of the feed is reassembled from the cache.
+
+SCOPES = ('booked', 'joined')
+TOKEN_SALT = 'student_management.ical'
+
+
+def feed_key(user):
+    """The user's calendar feed key, created on first use."""
+    if not user.calendar_feed_key:
+        key = secrets.token_urlsafe(16)
+        # conditional, so two first requests at once agree on one key
+        if User.objects.filter(pk=user.pk, calendar_feed_key='').update(calendar_feed_key=key):
+            user.calendar_feed_key = key
+        else:
+            user.refresh_from_db(using=router.db_for_write(User), fields=['calendar_feed_key'])
+    return user.calendar_feed_key
+
+
+def reset_feed_key(user):
+    """Give the user a new feed key, which makes every feed URL issued so far stop working."""
+    user.calendar_feed_key = secrets.token_urlsafe(16)
+    user.save(update_fields=['calendar_feed_key'])
+
+
+def feed_token(user):
+    return signing.Signer(salt=TOKEN_SALT).sign(f"{user.user_id}:{feed_key(user)}")
+
+
+def user_from_token(token):
+    """The active user a feed token was issued for, or None if it is forged, malformed or revoked."""
+    try:
+        user_id, _, key = signing.Signer(salt=TOKEN_SALT).unsign(token).partition(':')
+    except signing.BadSignature:
+        return None
+    if not user_id.isdigit() or not key:
+        return None
+    user = User.objects.filter(user_id=int(user_id), is_active=True).only('user_id', 'calendar_feed_key').first()
+    if user is None or not constant_time_compare(user.calendar_feed_key, key):
+        return None
+    return user
+
+
+def feed_events(user_id, scope='booked'):
+    past = timezone.now() - timedelta(days=getattr(settings, 'CALENDAR_PAST_DAYS', 30))
+    events = Event.objects.filter(is_approved=True, end_time__gte=past)
+    booked = Q(event_id__in=EventDetails.objects.filter(user_id=user_id, can_book=True).values('event_id'))
+    if scope == 'joined':
+        return events.filter(
+            booked |
+            Q(society__members=user_id) |
+            Q(community_id__in=CommunityMembership.objects.filter(user_id=user_id).values('community_id'))
+        ).distinct()
+    return events.filter(booked)
+
+
+class Feed:
+    """The state of one user's feed: which events are in it and when each last changed."""
+
+    def __init__(self, user_id, scope='booked'):
+        self.user_id = user_id
+        self.scope = scope
+        self.versions = list(
+            feed_events(user_id, scope).order_by('start_time', 'event_id').values_list('event_id', 'updated_at')
+        )
+        digest = hashlib.sha1(f"{user_id}:{scope}".encode())
+        for event_id, updated_at in self.versions:
+            digest.update(f"|{event_id}@{updated_at.timestamp()}".encode())
+        self.sync_token = digest.hexdigest()
+
+    @property
+    def etag(self):
+        return f'"{self.sync_token}"'
+
+    def render(self):
+        key = f'ical:feed:{self.sync_token}'
+        body = cache.get(key)
+        if body is None:
+            body = render_calendar(self.versions)
+            cache.set(key, body, getattr(settings, 'CALENDAR_CACHE_TIMEOUT', 86400))
+        return body
+
+
+# --- rendering ---
+
+def render_calendar(versions):
+    timeout = getattr(settings, 'CALENDAR_CACHE_TIMEOUT', 86400)
+    keys = {event_id: f'ical:vevent:{event_id}:{updated_at.timestamp()}' for event_id, updated_at in versions}
+    blocks = cache.get_many(keys.values())
+    missing = [event_id for event_id, key in keys.items() if key not in blocks]
+    if missing:
+        rendered = {
+            keys[event.event_id]: render_event(event)
+            for event in Event.objects.filter(event_id__in=missing).select_related('society', 'community')
+        }
+        cache.set_many(rendered, timeout)
+        blocks.update(rendered)
+
+    refresh = f"PT{getattr(settings, 'CALENDAR_REFRESH_MINUTES', 60)}M"
+    lines = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:-//UniHub//Events//EN',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        'X-WR-CALNAME:UniHub events',
+        f'REFRESH-INTERVAL;VALUE=DURATION:{refresh}',
+        f'X-PUBLISHED-TTL:{refresh}',
+    ]
+    # an event deleted between the two queries simply drops out
+    events = ''.join(blocks[keys[event_id]] for event_id, _ in versions if keys[event_id] in blocks)
+    return ''.join(line + '\r\n' for line in lines) + events + 'END:VCALENDAR\r\n'
+
+
+def render_event(event):
+    host = urlsplit(getattr(settings, 'SITE_URL', '')).hostname or 'unihub'
+    organiser = event.society or event.community
+    description = event.info
+    if event.required_materials:
+        description += f"\n\nRequired materials: {event.required_materials}"
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:event-{event.event_id}@{host}',
+        f'DTSTAMP:{format_datetime(event.updated_at)}',
+        f'LAST-MODIFIED:{format_datetime(event.updated_at)}',
+        f'DTSTART:{format_datetime(event.start_time)}',
+        f'DTEND:{format_datetime(event.end_time)}',
+        f'SUMMARY:{escape_text(event.event_name)}',
+        f'DESCRIPTION:{escape_text(description)}',
+        f"LOCATION:{escape_text('Online' if event.location_type == 'Online' else event.actual_location or '')}",
+        'STATUS:CONFIRMED',
+    ]
+    if organiser is not None:
+        lines.append(f'CATEGORIES:{escape_text(str(organiser))}')
+    lines.append('END:VEVENT')
+    return ''.join(fold(line) + '\r\n' for line in lines)
+
+
+def format_datetime(value):
+    return value.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def escape_text(value):
+    return (
+        value.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+        .replace('\r\n', '\\n').replace('\n', '\\n')
+    )
+
+
+def fold(line, limit=75):
+    # RFC 5545: lines longer than 75 octets continue on the next line after a space
+    encoded = line.encode()
+    if len(encoded) <= limit:
+        return line
+    parts = []
+    while encoded:
+        cut = min(limit if not parts else limit - 1, len(encoded))
+        # never split a multi-byte character
+        while cut < len(encoded) and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(encoded[:cut].decode())
+        encoded = encoded[cut:]
+    return '\r\n '.join(parts)
@@ -0,0 +1,138 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .models import UpdateRequest
+
+logger = logging.getLogger(__name__)
+
+
+# === Profile picture pipeline ===
+# Uploaded pictures are processed off the request path: the raw upload is
+# validated, rotated according to its EXIF orientation, re-encoded as WebP
+# without any metadata (GPS, camera...) and downscaled, and a small square
+# thumbnail is generated for lists. Approving the request then links the
+# processed files into profile_pics/ instead of copying their bytes.
+#
+# Whoever processes a picture first claims it by moving image_status from
+# 'pending' to 'processing' in a single UPDATE, so the background worker and
+# an admin approving the request at the same moment never both write it.
+
+MAX_PIXELS = 40_000_000  # refuse decompression bombs before decoding them
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'PROFILE_PICTURE_WORKERS', 2),
+            thread_name_prefix='profile-pictures',
+        )
+    return _executor
+
+
+def schedule_processing(update_request):
+    """Process the request's picture once the transaction that created it commits."""
+    if getattr(settings, 'PROFILE_PICTURE_PROCESS_IN_BACKGROUND', True):
+        transaction.on_commit(lambda: get_executor().submit(_process_in_background, update_request.pk))
+    else:
+        transaction.on_commit(lambda: process_update_request_picture(update_request.pk))
+
+
+def _process_in_background(update_request_id):
+    try:
+        process_update_request_picture(update_request_id)
+    except Exception:
+        logger.exception("Processing the picture of update request %s failed", update_request_id)
+    finally:
+        # worker threads don't go through the request cycle that normally closes them
+        close_old_connections()
+
+
+def encode_webp(image, quality):
+    buffer = BytesIO()
+    image.save(buffer, 'WEBP', quality=quality, method=4)
+    return ContentFile(buffer.getvalue())
+
+
+def claim(update_request_id):
+    """Move a pending request to 'processing'; False if someone else (worker or approval) already has it."""
+    return UpdateRequest.objects.filter(pk=update_request_id, image_status='pending').update(image_status='processing') == 1
+
+
+def process_update_request_picture(update_request_id):
+    update_request = UpdateRequest.objects.filter(pk=update_request_id).first()
+    if update_request is None or not update_request.profile_picture or update_request.image_status != 'pending':
+        return update_request
+    if not claim(update_request_id):
+        update_request.refresh_from_db(fields=['profile_picture', 'profile_thumbnail', 'image_status'])
+        return update_request
+    try:
+        return _process(update_request)
+    except BaseException:
+        # unexpected failure: give the picture back so it can be retried
+        UpdateRequest.objects.filter(pk=update_request_id, image_status='processing').update(image_status='pending')
+        raise
+
+
+def _process(update_request):
+    update_request_id = update_request.pk
+    raw = update_request.profile_picture
+    max_size = getattr(settings, 'PROFILE_PICTURE_MAX_SIZE', 1024)
+    thumbnail_size = getattr(settings, 'PROFILE_PICTURE_THUMBNAIL_SIZE', 128)
+    quality = getattr(settings, 'PROFILE_PICTURE_QUALITY', 82)
+
+    try:
+        with raw.open('rb') as f:
+            image = Image.open(f)
+            if image.width * image.height > MAX_PIXELS:
+                raise ValueError("image is too large")
+            image.verify()
+        # verify() leaves the image unusable, so decode it again
+        with raw.open('rb') as f:
+            image = Image.open(f)
+            image = ImageOps.exif_transpose(image)
+            image = image.convert('RGBA' if image.mode in ('RGBA', 'LA', 'P') else 'RGB')
+            image.thumbnail((max_size, max_size))
+            thumbnail = ImageOps.fit(image, (thumbnail_size, thumbnail_size))
+    except (UnidentifiedImageError, OSError, ValueError, Image.DecompressionBombError) as e:
+        logger.warning("Rejected picture of update request %s: %s", update_request_id, e)
+        UpdateRequest.objects.filter(pk=update_request_id).update(image_status='failed')
+        update_request.image_status = 'failed'
+        return update_request
+
+    stem = os.path.splitext(os.path.basename(raw.name))[0]
+    raw_name = raw.name
+    # re-encoding only copies pixels, so EXIF/XMP metadata is dropped here
+    update_request.profile_picture.save(f'{stem}.webp', encode_webp(image, quality), save=False)
+    update_request.profile_thumbnail.save(f'{stem}_thumb.webp', encode_webp(thumbnail, quality), save=False)
+    update_request.image_status = 'ready'
+    update_request.save(update_fields=['profile_picture', 'profile_thumbnail', 'image_status'])
+    raw.storage.delete(raw_name)
+    return update_request
+
+
+def link_file(field_file, upload_to):
+    """Make ``field_file`` available under ``upload_to`` without rewriting its bytes.
+
+    On local storage this is a hard link, so both the request and the user
+    point at the same inode; other storages fall back to a chunked copy.
+    """
+    storage = field_file.storage
+    target = storage.get_available_name(os.path.join(upload_to, os.path.basename(field_file.name)))
+    try:
+        source_path, target_path = storage.path(field_file.name), storage.path(target)
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        os.link(source_path, target_path)
+    except (NotImplementedError, OSError):
+        with storage.open(field_file.name, 'rb') as f:
+            target = storage.save(target, f)
+    return target
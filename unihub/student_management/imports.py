@@ -0,0 +1,355 @@
+import codecs
+import csv
+import json
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import islice
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.tokens import default_token_generator
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from . import choices, scheduling
+from .models import Community, Event, Interest, Society, User
+
+
+# === Bulk imports ===
+# Rows are streamed from CSV or JSONL, validated a chunk at a time without
+# touching the database (clean_fields() only), then written with one
+# bulk_create per model and chunk. Many-to-many links (interests) go straight
+# into the through tables. Invalid rows, including lines that aren't JSON
+# objects, are skipped and reported with their line number instead of
+# aborting the whole file. A file that isn't UTF-8 is imported up to the first
+# line that doesn't decode, which is reported the same way.
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+class ImportResult:
+    def __init__(self):
+        self.created = 0
+        self.skipped = 0
+        self.errors = []  # (line number, message)
+        self.invites = []  # (email, uid, token) for users created without a password
+
+    def error(self, line, message):
+        self.skipped += 1
+        self.errors.append((line, message))
+
+    def valid_rows(self, rows):
+        """Pass through (line, dict) pairs, recording the lines read_rows() couldn't parse."""
+        for line, row in rows:
+            if isinstance(row, InvalidRow):
+                self.error(line, row.message)
+            else:
+                yield line, row
+
+
+# the decoder can't resynchronise reliably, so the rest of the file is dropped
+NOT_UTF8 = "not valid UTF-8 text; this line and the rest of the file were skipped"
+
+
+class InvalidRow:
+    """Stands in for a line that couldn't be parsed into a row."""
+
+    def __init__(self, message):
+        self.message = message
+
+
+def decode_lines(stream):
+    """Decode a binary stream a line at a time, so a bad byte is pinned to its line."""
+    for line_number, line in enumerate(stream, start=1):
+        if line_number == 1:
+            line = line.removeprefix(codecs.BOM_UTF8)
+        yield line.decode('utf-8')
+
+
+def read_rows(stream, file_format):
+    """Yield (line number, dict) pairs from a CSV or JSONL text/binary stream.
+
+    Lines that can't be parsed come out as (line number, InvalidRow).
+    """
+    if file_format not in ('csv', 'jsonl'):
+        raise ValueError(f"Unsupported format: {file_format}")
+    lines = decode_lines(stream) if isinstance(stream.read(0), bytes) else stream
+    if file_format == 'csv':
+        reader = csv.DictReader(lines)
+        try:
+            for row in reader:
+                # line_num is the physical line the row ended on, header included
+                yield reader.line_num, row
+        except UnicodeDecodeError:
+            yield reader.line_num + 1, InvalidRow(NOT_UTF8)
+        return
+    line_number = 0
+    try:
+        for line_number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_number, InvalidRow(f"invalid JSON: {e.msg}")
+                continue
+            if not isinstance(row, dict):
+                yield line_number, InvalidRow(f"expected a JSON object, got {type(row).__name__}")
+                continue
+            yield line_number, row
+    except UnicodeDecodeError:
+        yield line_number + 1, InvalidRow(NOT_UTF8)
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def split_names(value):
+    """Interests come as a list in JSONL and as 'a;b;c' in CSV."""
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(';')
+    return [name.strip() for name in value if name and name.strip()]
+
+
+def resolve_interests(names):
+    """Map interest names to ids, creating the missing ones in one INSERT."""
+    names = set(names)
+    if not names:
+        return {}
+    known = dict(Interest.objects.filter(interest_name__in=names).values_list('interest_name', 'interest_id'))
+    missing = names - known.keys()
+    if missing:
+        Interest.objects.bulk_create([Interest(interest_name=name) for name in missing])
+        # bulk_create sends no post_save, which is what normally refreshes the form choices
+        transaction.on_commit(choices.invalidate_all)
+        known.update(Interest.objects.filter(interest_name__in=missing).values_list('interest_name', 'interest_id'))
+    return known
+
+
+def link_interests(through, owner_field, owner_ids, interest_names_by_key, interest_ids):
+    links = [
+        through(**{owner_field: owner_ids[key], 'interest_id': interest_ids[name]})
+        for key, names in interest_names_by_key.items()
+        if key in owner_ids
+        for name in names
+    ]
+    through.objects.bulk_create(links, batch_size=DEFAULT_CHUNK_SIZE, ignore_conflicts=True)
+
+
+# === Users ===
+
+def _setup_worker():
+    django.setup()
+
+
+def hash_passwords(passwords, workers=None):
+    """Hash passwords across a process pool; each hash is deliberately slow.
+
+    ``workers=0`` hashes them in this process instead, for web requests, which
+    shouldn't fork a pool of Django processes; None starts one per CPU.
+    """
+    if workers == 0:
+        return [make_password(password) for password in passwords]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_setup_worker) as pool:
+        return list(pool.map(make_password, passwords, chunksize=64))
+
+
+def import_users(rows, chunk_size=DEFAULT_CHUNK_SIZE, hash_workers=0):
+    """Create users; rows without a password get an unusable one and an invite token.
+
+    Passwords are hashed in this process unless ``hash_workers`` asks for a pool (see hash_passwords()).
+    """
+    result = ImportResult()
+    seen = set()
+    # a single unusable hash is fine for every invited user, it can never match
+    unusable_password = make_password(None)
+
+    for chunk in chunked(result.valid_rows(rows), chunk_size):
+        users, interests_by_email, passwords = [], {}, []
+        emails = {User.objects.normalize_email((row.get('email') or '').strip()) for _, row in chunk}
+        existing = set(User.objects.filter(email__in=emails).values_list('email', flat=True))
+
+        for line, row in chunk:
+            email = User.objects.normalize_email((row.get('email') or '').strip())
+            if email in existing or email in seen:
+                result.error(line, f"user {email} already exists")
+                continue
+            user = User(
+                email=email,
+                first_name=(row.get('first_name') or '').strip(),
+                last_name=(row.get('last_name') or '').strip(),
+                course=(row.get('course') or '').strip(),
+                password=unusable_password,
+            )
+            try:
+                user.clean_fields(exclude=['password', 'last_login'])
+                if not user.first_name or not user.last_name:
+                    raise ValidationError("first_name and last_name are required")
+            except ValidationError as e:
+                result.error(line, '; '.join(e.messages))
+                continue
+            seen.add(email)
+            users.append(user)
+            passwords.append(row.get('password') or None)
+            interests_by_email[email] = split_names(row.get('interests'))
+
+        to_hash = [(user, password) for user, password in zip(users, passwords) if password]
+        if to_hash:
+            for (user, _), hashed in zip(to_hash, hash_passwords([p for _, p in to_hash], hash_workers)):
+                user.password = hashed
+
+        with transaction.atomic():
+            User.objects.bulk_create(users, batch_size=chunk_size)
+            # bulk_create doesn't return primary keys on every backend (MySQL)
+            ids = dict(User.objects.filter(email__in=[u.email for u in users]).values_list('email', 'user_id'))
+            interest_ids = resolve_interests(name for names in interests_by_email.values() for name in names)
+            link_interests(User.interests.through, 'user_id', ids, interests_by_email, interest_ids)
+        result.created += len(users)
+
+        for user in users:
+            if user.password == unusable_password:
+                user.pk = ids[user.email]
+                result.invites.append((
+                    user.email,
+                    urlsafe_base64_encode(force_bytes(user.pk)),
+                    default_token_generator.make_token(user),
+                ))
+    return result
+
+
+# === Societies, interests and events ===
+
+def import_interests(rows, chunk_size=DEFAULT_CHUNK_SIZE):
+    result = ImportResult()
+    for chunk in chunked(result.valid_rows(rows), chunk_size):
+        names = []
+        for line, row in chunk:
+            name = (row.get('interest_name') or '').strip()
+            if not name:
+                result.error(line, "interest_name is required")
+            else:
+                names.append(name)
+        existing = set(Interest.objects.filter(interest_name__in=names).values_list('interest_name', flat=True))
+        new_names = set(names) - existing
+        Interest.objects.bulk_create([Interest(interest_name=name) for name in new_names])
+        if new_names:
+            transaction.on_commit(choices.invalidate_all)
+        result.created += len(new_names)
+        result.skipped += len(names) - len(new_names)
+    return result
+
+
+def import_societies(rows, chunk_size=DEFAULT_CHUNK_SIZE):
+    result = ImportResult()
+    seen = set()
+    for chunk in chunked(result.valid_rows(rows), chunk_size):
+        names = {(row.get('society_name') or '').strip() for _, row in chunk}
+        existing = set(Society.objects.filter(society_name__in=names).values_list('society_name', flat=True))
+        societies, interests_by_name = [], {}
+
+        for line, row in chunk:
+            name = (row.get('society_name') or '').strip()
+            if name in existing or name in seen:
+                result.error(line, f"society {name} already exists")
+                continue
+            society = Society(
+                society_name=name,
+                soc_leader=(row.get('soc_leader') or '').strip(),
+                society_location=(row.get('society_location') or '').strip(),
+                description=(row.get('description') or '').strip(),
+                event_info=row.get('event_info') or None,
+                is_approved=str(row.get('is_approved', '')).lower() in ('1', 'true', 'yes'),
+            )
+            try:
+                society.clean_fields()
+            except ValidationError as e:
+                result.error(line, '; '.join(e.messages))
+                continue
+            seen.add(name)
+            societies.append(society)
+            interests_by_name[name] = split_names(row.get('interests'))
+
+        with transaction.atomic():
+            Society.objects.bulk_create(societies, batch_size=chunk_size)
+            if societies:
+                transaction.on_commit(choices.invalidate_all)
+            ids = dict(
+                Society.objects.filter(society_name__in=[s.society_name for s in societies])
+                .values_list('society_name', 'society_id')
+            )
+            interest_ids = resolve_interests(name for names in interests_by_name.values() for name in names)
+            link_interests(Society.interests.through, 'society_id', ids, interests_by_name, interest_ids)
+        result.created += len(societies)
+    return result
+
+
+def parse_datetime(value):
+    parsed = datetime.fromisoformat(value.strip())
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def import_events(rows, chunk_size=DEFAULT_CHUNK_SIZE):
+    result = ImportResult()
+    for chunk in chunked(result.valid_rows(rows), chunk_size):
+        society_names = {row.get('society') for _, row in chunk if row.get('society')}
+        community_names = {row.get('community') for _, row in chunk if row.get('community')}
+        societies = dict(Society.objects.filter(society_name__in=society_names).values_list('society_name', 'society_id'))
+        communities = dict(
+            Community.objects.filter(community_name__in=community_names).values_list('community_name', 'community_id')
+        )
+        events = []
+
+        for line, row in chunk:
+            try:
+                event = Event(
+                    event_name=(row.get('event_name') or '').strip(),
+                    start_time=parse_datetime(row.get('start_time') or ''),
+                    end_time=parse_datetime(row.get('end_time') or ''),
+                    info=(row.get('info') or '').strip(),
+                    location_type=row.get('location_type') or 'On-Campus',
+                    actual_location=row.get('actual_location') or None,
+                    maximum_capacity=int(row['maximum_capacity']) if row.get('maximum_capacity') else None,
+                    required_materials=row.get('required_materials') or None,
+                    is_approved=str(row.get('is_approved', '')).lower() in ('1', 'true', 'yes'),
+                    society_id=societies.get(row.get('society')),
+                    community_id=communities.get(row.get('community')),
+                )
+                if row.get('society') and event.society_id is None:
+                    raise ValidationError(f"unknown society {row['society']}")
+                if row.get('community') and event.community_id is None:
+                    raise ValidationError(f"unknown community {row['community']}")
+                if event.end_time <= event.start_time:
+                    raise ValidationError("end_time must be after start_time")
+                event.clean_fields(exclude=['requester', 'society', 'community'])
+            except ValidationError as e:
+                result.error(line, '; '.join(e.messages))
+                continue
+            except (TypeError, ValueError) as e:
+                result.error(line, str(e))
+                continue
+            events.append(event)
+
+        Event.objects.bulk_create(events, batch_size=chunk_size)
+        result.created += len(events)
+        if events:
+            # bulk_create sends no post_save, so the scheduling index is told directly
+            scheduling.record_change()
+    return result
+
+
+IMPORTERS = {
+    'users': import_users,
+    'interests': import_interests,
+    'societies': import_societies,
+    'events': import_events,
+}
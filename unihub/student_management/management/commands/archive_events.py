@@ -0,0 +1,48 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from student_management.archive import ArchiveConflict, archive_cancelled_bookings, archive_finished_events
+from student_management.models import Event, EventDetails
+
+
+class Command(BaseCommand):
+    help = "Move finished events and old cancelled bookings into the archive tables, in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=getattr(settings, 'EVENT_ARCHIVE_AFTER_DAYS', 30),
+            help="Archive events that ended more than this many days ago.",
+        )
+        parser.add_argument(
+            '--cancelled-days', type=int, default=getattr(settings, 'BOOKING_ARCHIVE_AFTER_DAYS', 7),
+            help="Archive bookings cancelled more than this many days ago.",
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--dry-run', action='store_true', help="Only report how many rows would be moved.")
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        events_before = now - timedelta(days=options['days'])
+        cancelled_before = now - timedelta(days=options['cancelled_days'])
+
+        if options['dry_run']:
+            finished = Event.objects.filter(end_time__lt=events_before)
+            self.stdout.write(
+                f"{finished.count()} finished events with {EventDetails.objects.filter(event__in=finished).count()} "
+                f"bookings, and {EventDetails.objects.filter(can_book=False, updated_at__lt=cancelled_before).exclude(event__in=finished).count()} "
+                f"other cancelled bookings would be archived."
+            )
+            return
+
+        try:
+            events, bookings = archive_finished_events(events_before, options['batch_size'])
+            cancelled = archive_cancelled_bookings(cancelled_before, options['batch_size'])
+        except ArchiveConflict as e:
+            # earlier batches stay archived; the failed one is left in the live tables
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {events} finished events with {bookings} bookings, and {cancelled} cancelled bookings."
+        ))
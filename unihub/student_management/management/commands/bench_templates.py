@@ -0,0 +1,168 @@
+import re
+import statistics
+import time
+
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.core.management.base import BaseCommand, CommandError
+from django.template import RequestContext, engines
+from django.test import RequestFactory
+from django.utils import timezone
+
+from student_management.models import User
+from student_management.template_cache import template_names
+
+
+DATE_NAME_RE = re.compile(r'(^date|_time$|_at$|^timestamp$)')
+
+
+class Synthetic:
+    """Stands in for any context value.
+
+    Every attribute, key or call returns another Synthetic, so templates render
+    without real data: it prints as "1" (which also satisfies {% url %}
+    arguments), is truthy, and iterates over ``items`` children. Collections
+    nested inside a collection hold two items, like a post's latest comments.
+    Names that look like date fields (start_time, created_at, date_of_birth,
+    timestamp) are the current time, for the |date filter.
+    """
+
+    def __init__(self, items, depth=0):
+        self.items = items
+        self.depth = depth
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return self[name]
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return list(self)[key]
+        if isinstance(key, str) and DATE_NAME_RE.search(key):
+            return timezone.now()
+        return self
+
+    def __call__(self, *args, **kwargs):
+        # for filters that call methods (dict.get); templates see do_not_call_in_templates and skip the call
+        return self
+
+    def __iter__(self):
+        count = self.items if self.depth == 0 else 2
+        return iter([Synthetic(self.items, self.depth + 1) for _ in range(count)])
+
+    def __len__(self):
+        return self.items if self.depth == 0 else 2
+
+    def __str__(self):
+        return '1'
+
+    def __int__(self):
+        return 1
+
+    def __float__(self):
+        return 1.0
+
+    def __bool__(self):
+        return True
+
+    def __eq__(self, other):
+        return isinstance(other, Synthetic) or other in (1, '1')
+
+    def __lt__(self, other):
+        return isinstance(other, (int, float)) and 1 < other
+
+    def __gt__(self, other):
+        return isinstance(other, (int, float)) and 1 > other
+
+    __hash__ = object.__hash__
+
+
+# values a Synthetic can't stand in for (unpacked in loops)
+CONTEXT_OVERRIDES = {
+    'digest_choices': User.DIGEST_CHOICES,
+    'result': None,
+}
+
+
+BUILTINS = {'True', 'False', 'None'}
+
+
+class SyntheticContext(dict):
+    """A context layer that has every variable, except the True/False/None builtins below it."""
+
+    def __init__(self, items):
+        super().__init__(CONTEXT_OVERRIDES)
+        self.items = items
+
+    def __missing__(self, key):
+        return Synthetic(self.items)
+
+    def __contains__(self, key):
+        # Context looks variables up with "in" before indexing
+        return key not in BUILTINS
+
+
+class Command(BaseCommand):
+    help = (
+        "Render every student_management template with a synthetic context and report the first (cold) "
+        "render, compile included, against the median of the warm ones."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=20, help="Length of each list in the context.")
+        parser.add_argument('--renders', type=int, default=50, help="Warm renders per template.")
+        parser.add_argument('templates', nargs='*', help="Only these templates (e.g. student_management/home.html).")
+
+    def render(self, template, request, items):
+        # the backend would copy a plain dict, dropping __missing__, so the layer goes into the context
+        # stack, just above the builtins (the empty dict after it is where the context processors go)
+        context = RequestContext(request, {})
+        context.dicts.insert(1, SyntheticContext(items))
+        return template.template.render(context)
+
+    def handle(self, *args, **options):
+        names = options['templates'] or template_names()
+        backend = engines['django']
+        request = RequestFactory().get('/')
+        request.user = Synthetic(options['items'])
+        request.session = {}
+        request._messages = FallbackStorage(request)
+
+        # start from an empty cache, as a fresh worker would
+        for loader in backend.engine.template_loaders:
+            if hasattr(loader, 'reset'):
+                loader.reset()
+
+        rows = []
+        failed = []
+        for name in names:
+            try:
+                started = time.perf_counter()
+                template = backend.get_template(name)
+                compile_time = time.perf_counter() - started
+                html = self.render(template, request, options['items'])
+                cold = time.perf_counter() - started
+                warm = []
+                for _ in range(options['renders']):
+                    started = time.perf_counter()
+                    self.render(backend.get_template(name), request, options['items'])
+                    warm.append(time.perf_counter() - started)
+            except Exception as exc:
+                failed.append(name)
+                self.stderr.write(f"{name}: {type(exc).__name__}: {exc}")
+                continue
+            rows.append((name, compile_time, cold, statistics.median(warm), len(html)))
+
+        width = max((len(row[0]) for row in rows), default=10)
+        self.stdout.write(f"{'template':<{width}}  {'compile ms':>10}  {'cold ms':>8}  {'warm ms':>8}  {'KB':>6}")
+        for name, compile_time, cold, warm, size in sorted(rows, key=lambda row: row[3], reverse=True):
+            self.stdout.write(
+                f"{name:<{width}}  {compile_time * 1000:10.2f}  {cold * 1000:8.2f}  {warm * 1000:8.2f}  {size / 1024:6.1f}"
+            )
+        if rows:
+            self.stdout.write(
+                f"total: cold {sum(row[2] for row in rows) * 1000:.1f} ms, "
+                f"warm {sum(row[3] for row in rows) * 1000:.1f} ms per render of every template"
+            )
+        if failed:
+            raise CommandError(f"{len(failed)} template(s) failed to render: {', '.join(failed)}")
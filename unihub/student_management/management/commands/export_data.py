@@ -0,0 +1,41 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from student_management import exports
+
+
+class Command(BaseCommand):
+    help = "Stream society members, event attendees or request histories as CSV/JSONL."
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=['society-members', 'event-attendees', 'requests'])
+        parser.add_argument('--id', type=int, help="Society or event id.")
+        parser.add_argument('--kind', choices=sorted(exports.REQUEST_HISTORIES), help="Request type for the 'requests' dataset.")
+        parser.add_argument('--status', help="Only export requests with this status.")
+        parser.add_argument('--include-cancelled', action='store_true', help="Include cancelled bookings in event attendees.")
+        parser.add_argument('--format', choices=sorted(exports.FORMATS), default='csv')
+        parser.add_argument('--output', help="File to write to (default: stdout).")
+
+    def handle(self, *args, **options):
+        dataset = options['dataset']
+        if dataset in ('society-members', 'event-attendees') and options['id'] is None:
+            raise CommandError(f"--id is required for {dataset}.")
+        if dataset == 'requests' and not options['kind']:
+            raise CommandError("--kind is required for requests.")
+
+        if dataset == 'society-members':
+            header, rows = exports.society_members(options['id'])
+        elif dataset == 'event-attendees':
+            header, rows = exports.event_attendees(options['id'], options['include_cancelled'])
+        else:
+            header, rows = exports.request_history(options['kind'], options['status'])
+
+        lines, _ = exports.FORMATS[options['format']]
+        output = open(options['output'], 'w', newline='', encoding='utf-8') if options['output'] else sys.stdout
+        try:
+            for line in lines(header, rows):
+                output.write(line)
+        finally:
+            if options['output']:
+                output.close()
@@ -0,0 +1,239 @@
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from student_management import choices, scheduling
+from student_management.models import (
+    Comment, Community, CommunityMembership, Event, EventDetails, Friendship, Interest,
+    Post, Society, User,
+)
+
+# users, societies, communities, events, posts
+SCALES = {
+    'small': (200, 10, 5, 50, 500),
+    'medium': (2000, 60, 30, 400, 8000),
+    'large': (20000, 300, 150, 3000, 100000),
+}
+
+EMAIL_DOMAIN = 'campus.test'
+PASSWORD = 'password'
+
+HOBBIES = [
+    'Music', 'Chess', 'Football', 'Basketball', 'Gaming', 'Photography', 'Hiking', 'Cooking', 'Film',
+    'Drama', 'Dance', 'Robotics', 'Coding', 'Debating', 'Volunteering', 'Art', 'Climbing', 'Running',
+    'Yoga', 'Writing', 'Politics', 'Languages', 'Startups', 'Anime', 'Board Games', 'Swimming',
+]
+VISIBILITIES = ['public'] * 6 + ['friends'] * 2 + ['community', 'club', 'society']
+
+
+def bulk_insert(model, objs, batch_size=1000):
+    """bulk_create and return the new primary keys in insertion order, on any backend."""
+    last = model.objects.aggregate(last=Max('pk'))['last'] or 0
+    model.objects.bulk_create(objs, batch_size=batch_size)
+    return list(model.objects.filter(pk__gt=last).order_by('pk').values_list('pk', flat=True))
+
+
+def preferential_attachment(user_ids, edges_per_user, rng):
+    """Friendship graph with a power-law degree distribution (Barabási–Albert)."""
+    edges = set()
+    # every endpoint appears once per edge, so sampling from it is degree-weighted
+    endpoints = list(user_ids[:edges_per_user + 1])
+    for i, a in enumerate(user_ids[:edges_per_user + 1]):
+        for b in user_ids[i + 1:edges_per_user + 1]:
+            edges.add((a, b))
+            endpoints += [a, b]
+    for user_id in user_ids[edges_per_user + 1:]:
+        targets = set()
+        while len(targets) < edges_per_user:
+            targets.add(rng.choice(endpoints))
+        for target in targets:
+            edges.add((user_id, target))
+            endpoints += [user_id, target]
+    return edges
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with a synthetic campus (users, friendships, societies, communities, events, "
+        f"bookings, posts, comments) for load testing. Generated users are <name>@{EMAIL_DOMAIN} with "
+        f"password '{PASSWORD}'."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=sorted(SCALES), default='small')
+        parser.add_argument('--users', type=int)
+        parser.add_argument('--societies', type=int)
+        parser.add_argument('--communities', type=int)
+        parser.add_argument('--events', type=int)
+        parser.add_argument('--posts', type=int)
+        parser.add_argument('--friends-per-user', type=int, default=3, help="Edges added per user in the friendship graph.")
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--flush', action='store_true', help=f"Delete previously generated @{EMAIL_DOMAIN} data first.")
+
+    def log(self, started, message):
+        self.stdout.write(f"[{time.monotonic() - started:6.1f}s] {message}")
+
+    def handle(self, *args, **options):
+        n_users, n_societies, n_communities, n_events, n_posts = SCALES[options['scale']]
+        n_users = options['users'] or n_users
+        n_societies = options['societies'] or n_societies
+        n_communities = options['communities'] or n_communities
+        n_events = options['events'] or n_events
+        n_posts = options['posts'] or n_posts
+        rng = random.Random(options['seed'])
+        started = time.monotonic()
+        now = timezone.now()
+
+        if options['flush']:
+            self.flush()
+            self.log(started, "flushed previous campus")
+
+        with transaction.atomic():
+            # Interests
+            existing = set(Interest.objects.filter(interest_name__in=HOBBIES).values_list('interest_name', flat=True))
+            Interest.objects.bulk_create([Interest(interest_name=name) for name in HOBBIES if name not in existing])
+            interest_ids = list(Interest.objects.filter(interest_name__in=HOBBIES).values_list('pk', flat=True))
+
+            # Users (one shared hash: hashing thousands of passwords would dominate the run)
+            password = make_password(PASSWORD)
+            run = f"{options['seed']}-{int(time.time())}"
+            user_ids = bulk_insert(User, [
+                User(
+                    email=f"student{i}.{run}@{EMAIL_DOMAIN}",
+                    first_name=rng.choice(['Alex', 'Sam', 'Jo', 'Priya', 'Chen', 'Maria', 'Tom', 'Aisha', 'Leo', 'Eva']),
+                    last_name=f"Student{i}",
+                    course=rng.choice(['Computer Science', 'Law', 'Nursing', 'Architecture', 'Business', 'Biology']),
+                    password=password,
+                )
+                for i in range(n_users)
+            ])
+            UserInterest = User.interests.through
+            UserInterest.objects.bulk_create([
+                UserInterest(user_id=user_id, interest_id=interest_id)
+                for user_id in user_ids
+                for interest_id in rng.sample(interest_ids, rng.randint(1, 5))
+            ], batch_size=5000)
+            self.log(started, f"{len(user_ids)} users")
+
+            # Friendships: both the Friendship rows and the symmetrical User.friends links
+            edges = preferential_attachment(user_ids, options['friends_per_user'], rng)
+            Friendship.objects.bulk_create(
+                [Friendship(user_id=a, friend_id=b) for a, b in edges] + [Friendship(user_id=b, friend_id=a) for a, b in edges],
+                batch_size=5000,
+            )
+            UserFriend = User.friends.through
+            UserFriend.objects.bulk_create(
+                [UserFriend(from_user_id=a, to_user_id=b) for a, b in edges] + [UserFriend(from_user_id=b, to_user_id=a) for a, b in edges],
+                batch_size=5000, ignore_conflicts=True,
+            )
+            self.log(started, f"{len(edges)} friendships")
+
+            # Societies with Zipf-sized memberships
+            society_ids = bulk_insert(Society, [
+                Society(
+                    society_name=f"{rng.choice(HOBBIES)} Society {i}",
+                    soc_leader=f"Leader {i}",
+                    society_location=rng.choice(['Frenchay', 'Glenside', 'City Campus', 'Online']),
+                    description="A generated society.",
+                    is_approved=rng.random() < 0.9,
+                    created_at=now - timedelta(days=rng.randint(0, 700)),
+                )
+                for i in range(n_societies)
+            ])
+            SocietyMember = Society.members.through
+            SocietyInterest = Society.interests.through
+            members = []
+            for rank, society_id in enumerate(society_ids, start=1):
+                size = min(len(user_ids), max(3, int(len(user_ids) * 0.3 / rank)))
+                members += [SocietyMember(society_id=society_id, user_id=user_id) for user_id in rng.sample(user_ids, size)]
+            SocietyMember.objects.bulk_create(members, batch_size=5000)
+            SocietyInterest.objects.bulk_create([
+                SocietyInterest(society_id=society_id, interest_id=interest_id)
+                for society_id in society_ids
+                for interest_id in rng.sample(interest_ids, rng.randint(1, 3))
+            ], batch_size=5000)
+            self.log(started, f"{len(society_ids)} societies, {len(members)} members")
+
+            # Communities
+            community_ids = bulk_insert(Community, [
+                Community(
+                    community_name=f"{rng.choice(HOBBIES)} Community {i}",
+                    description="A generated community.",
+                    purpose="Load testing.",
+                    leader_id=rng.choice(user_ids),
+                    is_approved=True,
+                )
+                for i in range(n_communities)
+            ])
+            memberships = []
+            for rank, community_id in enumerate(community_ids, start=1):
+                size = min(len(user_ids), max(3, int(len(user_ids) * 0.2 / rank)))
+                memberships += [CommunityMembership(community_id=community_id, user_id=user_id) for user_id in rng.sample(user_ids, size)]
+            CommunityMembership.objects.bulk_create(memberships, batch_size=5000)
+            self.log(started, f"{len(community_ids)} communities, {len(memberships)} memberships")
+
+            # Events (mostly upcoming) with bookings, some of them cancelled
+            events = []
+            for i in range(n_events):
+                start = now + timedelta(hours=rng.randint(-24 * 30, 24 * 60))
+                events.append(Event(
+                    event_name=f"{rng.choice(HOBBIES)} meetup {i}",
+                    start_time=start,
+                    end_time=start + timedelta(hours=rng.choice([1, 2, 3])),
+                    info="A generated event.",
+                    location_type=rng.choice(['Online', 'On-Campus']),
+                    actual_location=f"Room {rng.randint(1, 40)}",
+                    maximum_capacity=rng.choice([None, 20, 50, 200, 3000]),
+                    society_id=rng.choice(society_ids) if society_ids and rng.random() < 0.6 else None,
+                    community_id=rng.choice(community_ids) if community_ids and rng.random() < 0.3 else None,
+                    is_approved=rng.random() < 0.9,
+                ))
+            event_ids = bulk_insert(Event, events)
+            bookings = []
+            for event_id, event in zip(event_ids, events):
+                # keep the large scale's booking table in the millions, not tens of millions
+                capacity = min(event.maximum_capacity or 300, 400)
+                attendees = rng.sample(user_ids, min(len(user_ids), rng.randint(0, capacity)))
+                bookings += [EventDetails(event_id=event_id, user_id=user_id, can_book=rng.random() < 0.9) for user_id in attendees]
+            EventDetails.objects.bulk_create(bookings, batch_size=5000)
+            self.log(started, f"{len(event_ids)} events, {len(bookings)} bookings")
+
+            # Posts with a long-tailed number of comments (a few go viral)
+            comment_counts = [min(int(rng.paretovariate(1.2)) - 1, 2000) for _ in range(n_posts)]
+            post_ids = bulk_insert(Post, [
+                Post(
+                    user_id=rng.choice(user_ids),
+                    content=f"Generated post {i} " + "lorem ipsum " * rng.randint(1, 40),
+                    visibility=rng.choice(VISIBILITIES),
+                    comments_count=count,
+                )
+                for i, count in enumerate(comment_counts)
+            ], batch_size=5000)
+            comments = [
+                Comment(post_id=post_id, user_id=rng.choice(user_ids), comment_text=f"Comment {j}")
+                for post_id, count in zip(post_ids, comment_counts)
+                for j in range(count)
+            ]
+            Comment.objects.bulk_create(comments, batch_size=5000)
+            self.log(started, f"{len(post_ids)} posts, {len(comments)} comments")
+            # the rows were bulk-created, without the signals that refresh the cached form choices
+            transaction.on_commit(choices.invalidate_all)
+            # ... or that tell the scheduling index about the new events and bookings
+            scheduling.record_change()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Campus generated in {time.monotonic() - started:.1f}s. Log in as any @{EMAIL_DOMAIN} user with '{PASSWORD}'."
+        ))
+
+    def flush(self):
+        # posts, comments, bookings and memberships cascade from these
+        Event.objects.filter(info="A generated event.").delete()
+        Society.objects.filter(description="A generated society.").delete()
+        Community.objects.filter(description="A generated community.").delete()
+        User.objects.filter(email__endswith=f'@{EMAIL_DOMAIN}').delete()
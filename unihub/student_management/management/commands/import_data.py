@@ -0,0 +1,47 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from student_management import imports
+from student_management.views.staff import invite_url
+
+
+class Command(BaseCommand):
+    help = "Bulk import users, interests, societies or events from a CSV or JSONL file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=sorted(imports.IMPORTERS))
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help="Defaults to the file extension.")
+        parser.add_argument('--chunk-size', type=int, default=imports.DEFAULT_CHUNK_SIZE)
+        parser.add_argument(
+            '--hash-workers', type=int, help="Processes used to hash passwords given in the file (default: one per CPU, 0 for none).",
+        )
+        parser.add_argument('--invites', help="Write email,invite_url for users created without a password to this CSV file.")
+
+    def handle(self, *args, **options):
+        file_format = options['format'] or options['path'].rsplit('.', 1)[-1].lower()
+        if file_format not in ('csv', 'jsonl'):
+            raise CommandError("Can't guess the format, pass --format csv or --format jsonl.")
+
+        importer = imports.IMPORTERS[options['dataset']]
+        kwargs = {'chunk_size': options['chunk_size']}
+        if options['dataset'] == 'users':
+            kwargs['hash_workers'] = options['hash_workers']
+
+        with open(options['path'], 'rb') as f:
+            result = importer(imports.read_rows(f, file_format), **kwargs)
+
+        for line, message in result.errors:
+            self.stderr.write(f"line {line}: {message}")
+
+        if options['invites'] and result.invites:
+            with open(options['invites'], 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow(['email', 'invite_url'])
+                for email, uid, token in result.invites:
+                    writer.writerow([email, invite_url(uid, token)])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result.created} {options['dataset']} ({result.skipped} skipped, {len(result.invites)} invites)."
+        ))
@@ -0,0 +1,94 @@
+import os
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# what a worker does before it can answer its first request
+BOOT = (
+    "from django.core.wsgi import get_wsgi_application; "
+    "get_wsgi_application(); "
+    "from django.urls import get_resolver; "
+    "get_resolver().url_patterns"
+)
+
+
+def parse_importtime(stderr):
+    """``-X importtime`` output as [(module, self us, cumulative us, depth)], in import order."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        depth = (len(name) - len(name.lstrip(' ')) - 1) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Boot a fresh interpreter the way a worker does (settings, apps, middleware, URLconf) under "
+        "python -X importtime, and fail if imports take longer than IMPORT_TIME_BUDGET_MS."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--budget', type=int, default=getattr(settings, 'IMPORT_TIME_BUDGET_MS', 1500),
+            help="Maximum total import time in milliseconds.",
+        )
+        parser.add_argument(
+            '--runs', type=int, default=3,
+            help="Boot this many times and keep the fastest (the first run may be compiling bytecode).",
+        )
+        parser.add_argument('--top', type=int, default=15, help="How many of the slowest imports to list.")
+
+    def boot(self):
+        env = {
+            **os.environ,
+            'DJANGO_SETTINGS_MODULE': settings.SETTINGS_MODULE,
+            # the child finds the project the way this process did
+            'PYTHONPATH': os.pathsep.join(filter(None, sys.path)),
+        }
+        started = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', BOOT],
+            env=env, capture_output=True, text=True,
+        )
+        elapsed = time.perf_counter() - started
+        rows = parse_importtime(result.stderr)
+        if result.returncode:
+            errors = [line for line in result.stderr.splitlines() if not line.startswith('import time:')]
+            raise CommandError("Booting the project failed:\n" + '\n'.join(errors[-20:]))
+        return rows, elapsed
+
+    def handle(self, *args, **options):
+        best = None
+        for _ in range(max(1, options['runs'])):
+            rows, elapsed = self.boot()
+            total_us = sum(cumulative for _, _, cumulative, depth in rows if depth == 0)
+            if best is None or total_us < best[1]:
+                best = (rows, total_us, elapsed)
+        rows, total_us, elapsed = best
+
+        self.stdout.write(f"{len(rows)} modules imported in {total_us / 1000:.0f} ms "
+                          f"(process wall time {elapsed * 1000:.0f} ms)")
+        self.stdout.write("Slowest imports, cumulative:")
+        for name, _, cumulative, depth in sorted(
+            (row for row in rows if row[3] == 0), key=lambda row: row[2], reverse=True,
+        )[:options['top']]:
+            self.stdout.write(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+        project_modules = sorted(
+            (row for row in rows if row[0].split('.')[0] in ('project', 'student_management')),
+            key=lambda row: row[1], reverse=True,
+        )
+        if project_modules:
+            self.stdout.write("Project modules, self time:")
+            for name, self_us, _, _ in project_modules[:options['top']]:
+                self.stdout.write(f"  {self_us / 1000:8.1f} ms  {name}")
+
+        if total_us / 1000 > options['budget']:
+            raise CommandError(f"Import time {total_us / 1000:.0f} ms is over the {options['budget']} ms budget.")
+        self.stdout.write(self.style.SUCCESS(f"Within the {options['budget']} ms budget."))
@@ -0,0 +1,206 @@
+import math
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.core.wsgi import get_wsgi_application
+from django.db import connections
+from django.test import Client, override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from student_management.models import Event, Society, User
+
+from .generate_campus import EMAIL_DOMAIN
+
+# name -> (weight, needs JWT, path builder)
+SCENARIOS = {
+    'home': (30, False, lambda ids, rng: '/home/'),
+    'events': (20, False, lambda ids, rng: '/events/'),
+    'friends': (10, False, lambda ids, rng: '/friends/'),
+    'societies': (10, False, lambda ids, rng: '/societies/'),
+    'book': (5, False, lambda ids, rng: f"/booked/{rng.choice(ids['events'])}/"),
+    'cancel': (5, False, lambda ids, rng: f"/cancel_booking/{rng.choice(ids['events'])}/"),
+    'api-events': (10, True, lambda ids, rng: f"/api/search-events/?search={rng.choice(ids['words'])}"),
+    'api-posts': (5, True, lambda ids, rng: f"/api/search-posts/?search={rng.choice(ids['words'])}"),
+    'api-notifications': (5, True, lambda ids, rng: '/api/notifications/'),
+}
+
+
+def percentile(sorted_values, p):
+    # nearest-rank
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(0, min(len(sorted_values) - 1, math.ceil(p / 100 * len(sorted_values)) - 1))]
+
+
+class ClientTransport:
+    """Requests go straight through the Django handler, no network involved."""
+
+    def __init__(self, user, token):
+        self.client = Client(raise_request_exception=False)
+        self.client.force_login(user)
+        self.auth = f"JWT {token}"
+
+    def get(self, path, api=False):
+        headers = {'Authorization': self.auth} if api else {}
+        return self.client.get(path, headers=headers).status_code
+
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class HttpTransport:
+    """Requests go over HTTP to a running server that shares this database."""
+
+    def __init__(self, base_url, user, token):
+        self.base_url = base_url.rstrip('/')
+        # log in once through the test client and reuse its session cookie
+        client = Client()
+        client.force_login(user)
+        self.cookie = f"{settings.SESSION_COOKIE_NAME}={client.cookies[settings.SESSION_COOKIE_NAME].value}"
+        self.auth = f"JWT {token}"
+        self.opener = urllib.request.build_opener(NoRedirect)
+
+    def get(self, path, api=False):
+        request = urllib.request.Request(self.base_url + path, headers={'Cookie': self.cookie})
+        if api:
+            request.add_header('Authorization', self.auth)
+        try:
+            with self.opener.open(request, timeout=60) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            e.read()
+            return e.code
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive the main pages and API endpoints with concurrent virtual users and report latency "
+        "percentiles and throughput. Run generate_campus first. Outgoing email is captured in memory "
+        "(except with --base-url, where the target server's own settings apply)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=8, help="Number of virtual users (threads).")
+        parser.add_argument('--requests', type=int, default=50, help="Requests per virtual user.")
+        parser.add_argument('--duration', type=float, help="Run for this many seconds instead of a fixed request count.")
+        parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS), help="Only run these scenarios (repeatable).")
+        parser.add_argument('--base-url', help="Load a running server (sharing this database) over HTTP.")
+        parser.add_argument('--serve', action='store_true', help="Start a local threaded WSGI server and load it over HTTP.")
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        if options['base_url'] and options['serve']:
+            raise CommandError("--base-url and --serve are mutually exclusive.")
+
+        users = list(User.objects.filter(email__endswith=f'@{EMAIL_DOMAIN}', is_active=True).order_by('?')[:options['concurrency']])
+        if len(users) < options['concurrency']:
+            raise CommandError(f"Need {options['concurrency']} generated users, found {len(users)}. Run generate_campus first.")
+        ids = {
+            'events': list(Event.objects.filter(is_approved=True, start_time__gte=timezone.now()).values_list('pk', flat=True)[:500]),
+            'societies': list(Society.objects.filter(is_approved=True).values_list('pk', flat=True)[:500]),
+            'words': ['Chess', 'Music', 'meetup', 'lorem', 'Film', 'Coding'],
+        }
+        if not ids['events']:
+            raise CommandError("No upcoming approved events. Run generate_campus first.")
+
+        names = options['scenario'] or list(SCENARIOS)
+        weights = [SCENARIOS[name][0] for name in names]
+
+        overrides = {
+            'ALLOWED_HOSTS': list(settings.ALLOWED_HOSTS) + ['testserver', '127.0.0.1', 'localhost'],
+            'EMAIL_BACKEND': 'django.core.mail.backends.locmem.EmailBackend',
+            # a few virtual users making every request would trip the per-user limits
+            'RATELIMIT_ENABLED': False,
+        }
+        with override_settings(**overrides):
+            server = None
+            base_url = options['base_url']
+            if options['serve']:
+                server = ThreadedWSGIServer(('127.0.0.1', 0), QuietHandler)
+                server.set_app(get_wsgi_application())
+                threading.Thread(target=server.serve_forever, daemon=True).start()
+                base_url = f"http://127.0.0.1:{server.server_address[1]}"
+                self.stdout.write(f"Serving on {base_url}")
+
+            transports = []
+            for user in users:
+                token = str(AccessToken.for_user(user))
+                transports.append(HttpTransport(base_url, user, token) if base_url else ClientTransport(user, token))
+
+            samples = defaultdict(list)  # scenario -> latencies in seconds
+            failures = defaultdict(int)
+            lock = threading.Lock()
+            deadline = time.monotonic() + options['duration'] if options['duration'] else None
+
+            def virtual_user(index, transport):
+                rng = random.Random(options['seed'] + index)
+                done = 0
+                try:
+                    while (time.monotonic() < deadline) if deadline else (done < options['requests']):
+                        name = rng.choices(names, weights)[0]
+                        _, api, build = SCENARIOS[name]
+                        started = time.perf_counter()
+                        try:
+                            status = transport.get(build(ids, rng), api=api)
+                        except Exception:
+                            status = 599
+                        elapsed = time.perf_counter() - started
+                        with lock:
+                            samples[name].append(elapsed)
+                            if status >= 400:
+                                failures[name] += 1
+                        done += 1
+                finally:
+                    connections.close_all()
+
+            threads = [threading.Thread(target=virtual_user, args=(i, t)) for i, t in enumerate(transports)]
+            started = time.monotonic()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            wall = time.monotonic() - started
+
+            if server is not None:
+                server.shutdown()
+                server.server_close()
+
+        self.report(samples, failures, wall)
+
+    def report(self, samples, failures, wall):
+        header = f"{'scenario':<18}{'requests':>9}{'errors':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}{'req/s':>8}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        everything = []
+        for name in sorted(samples):
+            values = sorted(samples[name])
+            everything += values
+            self.stdout.write(self.row(name, values, failures[name], wall))
+        everything.sort()
+        self.stdout.write('-' * len(header))
+        self.stdout.write(self.row('total', everything, sum(failures.values()), wall))
+        self.stdout.write(f"Wall time {wall:.1f}s")
+
+    def row(self, name, values, errors, wall):
+        return (
+            f"{name:<18}{len(values):>9}{errors:>8}"
+            f"{percentile(values, 50) * 1000:>9.1f}{percentile(values, 95) * 1000:>9.1f}"
+            f"{percentile(values, 99) * 1000:>9.1f}{(values[-1] if values else 0) * 1000:>9.1f}"
+            f"{len(values) / wall if wall else 0:>8.1f}"
+        )
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from student_management.images import process_update_request_picture
+from student_management.models import UpdateRequest
+
+
+class Command(BaseCommand):
+    help = "Process uploaded profile pictures still waiting for the background worker (e.g. after a restart)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--include-processing', action='store_true',
+            help="Also retry pictures left 'processing' by a worker that died. Only use it while no worker is running.",
+        )
+
+    def handle(self, *args, **options):
+        if options['include_processing']:
+            UpdateRequest.objects.filter(image_status='processing').update(image_status='pending')
+        pending = (
+            UpdateRequest.objects.filter(image_status='pending')
+            .exclude(profile_picture='').exclude(profile_picture__isnull=True)
+            .values_list('pk', flat=True)
+        )
+        processed = failed = 0
+        for update_request_id in pending.iterator():
+            update_request = process_update_request_picture(update_request_id)
+            if update_request.image_status == 'ready':
+                processed += 1
+            else:
+                failed += 1
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} profile pictures ({failed} rejected)."))
@@ -0,0 +1,50 @@
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from student_management.models import Notification
+
+
+class Command(BaseCommand):
+    help = "Delete read notifications older than N days, in batches (optionally archiving them to a JSONL file)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=getattr(settings, 'NOTIFICATION_RETENTION_DAYS', 90))
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--archive', help="Append the deleted rows to this JSONL file before deleting them.")
+        parser.add_argument('--dry-run', action='store_true', help="Only report how many rows would be deleted.")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        # only read notifications are pruned, so the cached unread counters stay valid
+        expired = Notification.objects.filter(is_read=True, created_at__lt=cutoff).order_by('pk')
+
+        if options['dry_run']:
+            self.stdout.write(f"{expired.count()} notifications older than {options['days']} days would be deleted.")
+            return
+
+        archive = open(options['archive'], 'a', encoding='utf-8') if options['archive'] else None
+        deleted = 0
+        try:
+            while True:
+                # small batches keep each DELETE short so it doesn't lock the table for long
+                batch = list(
+                    expired.values('id', 'user_id', 'message', 'notification_type', 'created_at')[:options['batch_size']]
+                )
+                if not batch:
+                    break
+                if archive:
+                    for row in batch:
+                        row['created_at'] = row['created_at'].isoformat()
+                        archive.write(json.dumps(row) + '\n')
+                    archive.flush()
+                Notification.objects.filter(pk__in=[row['id'] for row in batch]).delete()
+                deleted += len(batch)
+        finally:
+            if archive:
+                archive.close()
+
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} read notifications older than {options['days']} days."))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from student_management.posts import drifted_posts, reconcile_counters
+
+
+class Command(BaseCommand):
+    help = "Recompute Post.comments_count and Post.likes from the Comment and PostLike rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help="Posts updated per statement.")
+        parser.add_argument('--dry-run', action='store_true', help="Only report how many posts have drifted.")
+
+    def handle(self, *args, **options):
+        drifted = drifted_posts().count()
+        if options['dry_run']:
+            self.stdout.write(f"{drifted} posts have counters out of step.")
+            return
+        updated = reconcile_counters(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Recomputed counters of {updated} posts ({drifted} had drifted)."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from student_management.digests import flush_due_digests
+
+
+class Command(BaseCommand):
+    help = "Send the hourly/daily notification digests whose window has closed. Run it from cron every few minutes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--no-email', action='store_true', help="Create the digest notifications without emailing them.")
+
+    def handle(self, *args, **options):
+        sent = flush_due_digests(send_email=not options['no_email'])
+        self.stdout.write(self.style.SUCCESS(f"Sent {sent} notification digests."))
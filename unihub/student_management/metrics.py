@@ -0,0 +1,380 @@
+import atexit
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+
+try:
+    import fcntl
+except ImportError:  # not on Windows, where scrapes then aren't serialised
+    fcntl = None
+
+
+# === Application metrics ===
+# A small in-process registry of counters and histograms, rendered in the
+# Prometheus text exposition format by the /metrics view. With several WSGI
+# worker processes each one only sees its own numbers, so when
+# METRICS_MULTIPROCESS_DIR is set every process periodically writes its
+# totals to <dir>/metrics-<pid>-<random>.json and the exporter sums all the
+# files. Totals are cumulative; when a worker has exited its file is folded
+# into <dir>/retained.json, so recycled workers (and a new worker that got an
+# old pid) never make a counter go backwards. Clear the directory when
+# deploying.
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Metric:
+    type = None
+
+    def __init__(self, registry, name, documentation, labelnames=()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}  # tuple of label values -> value
+        self.lock = threading.Lock()
+
+    def key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def snapshot(self):
+        with self.lock:
+            return [[list(key), list(value) if isinstance(value, list) else value] for key, value in self.values.items()]
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self.key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+        self.registry.maybe_flush()
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, registry, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self.key(labels)
+        with self.lock:
+            # per-bucket (non-cumulative) counts, then sum and count
+            state = self.values.get(key)
+            if state is None:
+                state = self.values[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            else:
+                state[len(self.buckets)] += 1
+            state[-2] += value
+            state[-1] += 1
+        self.registry.maybe_flush()
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+        self.collectors = []  # callables evaluated at scrape time, returning gauge samples
+        self.last_flush = 0.0
+        self.pid = None
+        self._process_id = None
+
+    def register(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(self, name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(self, name, documentation, labelnames, buckets))
+
+    def gauge_collector(self, func):
+        """Register ``func() -> [(name, documentation, {labels}, value), ...]``, called on every scrape."""
+        self.collectors.append(func)
+        return func
+
+    # --- multi-process aggregation ---
+
+    def snapshot(self):
+        return {
+            name: {
+                'type': metric.type,
+                'help': metric.documentation,
+                'labelnames': list(metric.labelnames),
+                'buckets': list(getattr(metric, 'buckets', ())),
+                'values': metric.snapshot(),
+            }
+            for name, metric in self.metrics.items()
+        }
+
+    def maybe_flush(self):
+        directory = getattr(settings, 'METRICS_MULTIPROCESS_DIR', None)
+        if directory and time.monotonic() - self.last_flush >= getattr(settings, 'METRICS_FLUSH_INTERVAL', 5):
+            self.flush(directory)
+
+    @property
+    def process_id(self):
+        # pid plus a random part, so a new worker reusing a dead one's pid doesn't overwrite its totals;
+        # renewed after a fork, as forked workers inherit the registry
+        if self.pid != os.getpid():
+            self.pid = os.getpid()
+            self._process_id = f'{self.pid}-{uuid.uuid4().hex[:12]}'
+        return self._process_id
+
+    def flush(self, directory=None):
+        directory = directory or getattr(settings, 'METRICS_MULTIPROCESS_DIR', None)
+        if not directory:
+            return
+        self.last_flush = time.monotonic()
+        os.makedirs(directory, exist_ok=True)
+        write_json(os.path.join(directory, f'metrics-{self.process_id}.json'), self.snapshot())
+
+    def retire_dead_workers(self, directory):
+        """Fold the files of workers that have exited into retained.json (call with the directory locked)."""
+        retained_path = os.path.join(directory, 'retained.json')
+        retained = read_json(retained_path) or {'metrics': {}, 'merged': []}
+        merged = set(retained['merged'])
+        dead = [path for path in glob.glob(os.path.join(directory, 'metrics-*.json')) if not process_alive(file_pid(path))]
+        if not dead:
+            return
+        for path in dead:
+            name = os.path.basename(path)
+            snapshot = read_json(path) if name not in merged else None
+            if snapshot is not None:
+                merge_snapshot(retained['metrics'], snapshot)
+                merged.add(name)
+        # written before the files are removed, with their names, so a crash in between can't count a file twice
+        retained['merged'] = sorted(name for name in merged if os.path.exists(os.path.join(directory, name)))
+        write_json(retained_path, retained)
+        for path in dead:
+            if os.path.basename(path) in merged:
+                os.remove(path)
+
+    def aggregate(self):
+        directory = getattr(settings, 'METRICS_MULTIPROCESS_DIR', None)
+        if not directory:
+            return self.snapshot()
+        self.flush(directory)
+        merged = {}
+        with locked(directory):
+            self.retire_dead_workers(directory)
+            retained = read_json(os.path.join(directory, 'retained.json')) or {'metrics': {}, 'merged': []}
+            merge_snapshot(merged, retained['metrics'])
+            for path in glob.glob(os.path.join(directory, 'metrics-*.json')):
+                if os.path.basename(path) in retained['merged']:
+                    continue
+                snapshot = read_json(path)
+                if snapshot is not None:
+                    merge_snapshot(merged, snapshot)
+        return merged
+
+    # --- text exposition ---
+
+    def render(self):
+        lines = []
+        for name, family in sorted(self.aggregate().items()):
+            lines.append(f"# HELP {name} {escape_help(family['help'])}")
+            lines.append(f"# TYPE {name} {family['type']}")
+            labelnames = family['labelnames']
+            for key, value in family['values']:
+                labels = list(zip(labelnames, key))
+                if family['type'] == 'histogram':
+                    cumulative = 0
+                    for bound, count in zip(family['buckets'] + ['+Inf'], value):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{format_labels(labels + [('le', format_value(bound))])} {cumulative}")
+                    lines.append(f"{name}_sum{format_labels(labels)} {format_value(value[-2])}")
+                    lines.append(f"{name}_count{format_labels(labels)} {value[-1]}")
+                else:
+                    lines.append(f"{name}{format_labels(labels)} {format_value(value)}")
+        for collector in self.collectors:
+            seen = set()
+            for name, documentation, labels, value in collector():
+                if name not in seen:
+                    seen.add(name)
+                    lines.append(f"# HELP {name} {escape_help(documentation)}")
+                    lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name}{format_labels(list(labels.items()))} {format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+@contextmanager
+def locked(directory):
+    """Serialise scrapes that read and rewrite the multi-process directory."""
+    if fcntl is None:
+        yield
+        return
+    with open(os.path.join(directory, 'retained.lock'), 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        yield
+
+
+def read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_json(path, data):
+    tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(data, f)
+    # readers never see a half-written file
+    os.replace(tmp, path)
+
+
+def file_pid(path):
+    # metrics-<pid>-<random>.json
+    try:
+        return int(os.path.basename(path)[len('metrics-'):].split('-')[0].split('.')[0])
+    except ValueError:
+        return None
+
+
+def process_alive(pid):
+    if pid is None:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # someone else's process
+    return True
+
+
+def merge_snapshot(merged, snapshot):
+    """Add ``snapshot``'s values into ``merged`` (both in Registry.snapshot() form)."""
+    for name, family in snapshot.items():
+        target = merged.setdefault(name, {**family, 'values': []})
+        values = {tuple(key): value for key, value in target['values']}
+        for key, value in family['values']:
+            key = tuple(key)
+            if key not in values:
+                values[key] = value
+            elif isinstance(value, list):
+                values[key] = [a + b for a, b in zip(values[key], value)]
+            else:
+                values[key] += value
+        target['values'] = [[list(key), value] for key, value in values.items()]
+
+
+def escape_help(text):
+    return text.replace('\\', r'\\').replace('\n', r'\n')
+
+
+def escape_label(value):
+    return escape_help(str(value)).replace('"', r'\"')
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{escape_label(value)}"' for name, value in labels) + '}'
+
+
+def format_value(value):
+    # bucket bounds are floats, '+Inf' is already a string
+    return str(value)
+
+
+registry = Registry()
+atexit.register(registry.flush)
+
+
+# === Instrumented hot paths ===
+
+HTTP_REQUESTS = registry.counter(
+    'unihub_http_requests_total', "HTTP requests handled.", ['view', 'method', 'status'],
+)
+HTTP_REQUEST_SECONDS = registry.histogram(
+    'unihub_http_request_seconds', "Time spent handling HTTP requests.", ['view'],
+)
+SESSION_WRITES = registry.counter(
+    'unihub_session_writes_total', "Requests that wrote their session to the session store.",
+)
+NOTIFICATIONS = registry.counter(
+    'unihub_notifications_total', "Notifications created, by type and delivery (immediate or digest).",
+    ['type', 'delivery'],
+)
+EMAILS = registry.counter('unihub_emails_total', "Notification emails sent.", ['outcome'])
+EMAIL_SEND_SECONDS = registry.histogram('unihub_email_send_seconds', "Time spent sending one notification email.")
+BOOKINGS = registry.counter('unihub_bookings_total', "Event booking attempts.", ['outcome'])
+CANCELLATIONS = registry.counter('unihub_booking_cancellations_total', "Event booking cancellations.", ['outcome'])
+CALENDAR_FEEDS = registry.counter(
+    'unihub_calendar_feed_requests_total', "Calendar feed polls, by whether the feed had changed.", ['outcome'],
+)
+FEED_QUERY_SECONDS = registry.histogram(
+    'unihub_feed_query_seconds', "Time spent fetching the posts of a feed or search page.", ['view'],
+)
+RATE_LIMITED = registry.counter('unihub_rate_limited_total', "Requests rejected by a rate limit.", ['scope'])
+ADMIN_ACTIONS = registry.counter('unihub_admin_actions_total', "Admin actions run.", ['action', 'outcome'])
+ADMIN_ACTION_SECONDS = registry.histogram('unihub_admin_action_seconds', "Time spent running admin actions.", ['action'])
+
+
+@registry.gauge_collector
+def notification_backlog():
+    from .models import Notification, NotificationDigest
+
+    def counts():
+        return [Notification.objects.filter(is_read=False).count(), NotificationDigest.objects.count()]
+
+    # two COUNT(*)s over big tables; scrapers poll every few seconds, the numbers don't need to be that fresh
+    unread, digests = cache.get_or_set(
+        'metrics:notification_backlog', counts, getattr(settings, 'METRICS_BACKLOG_CACHE_SECONDS', 60),
+    )
+    return [
+        ('unihub_notifications_unread', "Unread notifications.", {}, unread),
+        ('unihub_notification_digests_pending', "Digests waiting to be sent.", {}, digests),
+    ]
+
+
+class MetricsMiddleware:
+    """Counts requests, their latency per view and session writes."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        response = self.get_response(request)
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'
+        HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, view=view)
+        HTTP_REQUESTS.inc(view=view, method=request.method, status=response.status_code)
+
+        session = getattr(request, 'session', None)
+        # mirrors SessionMiddleware's decision to save
+        if session is not None and response.status_code != 500 and (
+            session.modified or (settings.SESSION_SAVE_EVERY_REQUEST and not session.is_empty())
+        ):
+            SESSION_WRITES.inc()
+        return response
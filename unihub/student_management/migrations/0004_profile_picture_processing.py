@@ -0,0 +1,28 @@
+# Generated by Django 5.1.6 on 2026-10-19 16:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student_management', '0003_notification_digests'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='updaterequest',
+            name='image_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('ready', 'Ready'), ('failed', 'Failed')], default='pending', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='updaterequest',
+            name='profile_thumbnail',
+            field=models.ImageField(blank=True, null=True, upload_to='update_requests/thumbs/'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='profile_thumbnail',
+            field=models.ImageField(blank=True, null=True, upload_to='profile_pics/thumbs/'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.1.6 on 2026-10-19 16:49
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_existing_comments(apps, schema_editor):
+    # comments_count was never maintained before; likes start at zero with the new table
+    Post = apps.get_model('student_management', 'Post')
+    Comment = apps.get_model('student_management', 'Comment')
+    comments = Comment.objects.filter(post=OuterRef('pk')).order_by().values('post').annotate(n=Count('pk')).values('n')
+    Post.objects.update(comments_count=Coalesce(Subquery(comments), 0), likes=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student_management', '0004_profile_picture_processing'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostLike',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='post_likes', to='student_management.post')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='post_likes', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('post', 'user'), name='unique_post_like')],
+            },
+        ),
+        migrations.RunPython(count_existing_comments, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.1.6 on 2026-10-19 16:51
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def link_leaders(apps, schema_editor):
+    """Turn the free-text com_leader into a user.
+
+    Approved communities were created from a request, so the requester is the
+    leader; otherwise fall back to the user whose full name matches, if only
+    one does. Anything else is left without a leader.
+    """
+    Community = apps.get_model('student_management', 'Community')
+    CommunityRequest = apps.get_model('student_management', 'CommunityRequest')
+    User = apps.get_model('student_management', 'User')
+
+    requesters = dict(
+        CommunityRequest.objects.filter(status='approved').order_by('reviewed_at')
+        .values_list('community_name', 'requester_id')
+    )
+    users_by_name = {}
+    for user_id, first_name, last_name in User.objects.values_list('user_id', 'first_name', 'last_name'):
+        users_by_name.setdefault(f"{first_name} {last_name}".strip(), []).append(user_id)
+
+    communities = list(Community.objects.all())
+    for community in communities:
+        leader_id = requesters.get(community.community_name)
+        if leader_id is None:
+            matches = users_by_name.get(community.com_leader.strip(), [])
+            leader_id = matches[0] if len(matches) == 1 else None
+        community.leader_id = leader_id
+    Community.objects.bulk_update(communities, ['leader'], batch_size=500)
+
+
+def unlink_leaders(apps, schema_editor):
+    Community = apps.get_model('student_management', 'Community')
+    communities = list(Community.objects.select_related('leader'))
+    for community in communities:
+        community.com_leader = f"{community.leader.first_name} {community.leader.last_name}".strip() if community.leader else ''
+    Community.objects.bulk_update(communities, ['com_leader'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student_management', '0006_comment_post_created_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='community',
+            name='leader',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='led_communities', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(link_leaders, unlink_leaders),
+        migrations.RemoveField(
+            model_name='community',
+            name='com_leader',
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.1.6 on 2026-10-19 17:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student_management', '0009_event_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedEvent',
+            fields=[
+                ('event_id', models.IntegerField(primary_key=True, serialize=False)),
+                ('is_approved', models.BooleanField(default=False)),
+                ('event_name', models.CharField(max_length=100)),
+                ('start_time', models.DateTimeField()),
+                ('end_time', models.DateTimeField()),
+                ('info', models.TextField()),
+                ('required_materials', models.TextField(blank=True, null=True)),
+                ('location_type', models.CharField(choices=[('Online', 'Online'), ('On-Campus', 'On-Campus')], default='On-Campus', max_length=20)),
+                ('actual_location', models.CharField(blank=True, max_length=255, null=True)),
+                ('maximum_capacity', models.PositiveIntegerField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('community', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_events', to='student_management.community')),
+                ('requester', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_event_requests', to=settings.AUTH_USER_MODEL)),
+                ('society', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_events', to='student_management.society')),
+            ],
+            options={
+                'db_table': 'event_archive',
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedBooking',
+            fields=[
+                ('event_details_id', models.IntegerField(primary_key=True, serialize=False)),
+                ('event_id', models.IntegerField()),
+                ('can_book', models.BooleanField(default=True)),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_bookings', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'event_details_archive',
+                'indexes': [models.Index(fields=['user', 'event_id'], name='booking_archive_user_idx'), models.Index(fields=['event_id'], name='booking_archive_event_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-19 17:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student_management', '0010_event_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificationdigest',
+            name='frequency',
+            field=models.CharField(blank=True, choices=[('immediate', 'Immediately'), ('hourly', 'Hourly digest'), ('daily', 'Daily digest')], max_length=10),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-19 17:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student_management', '0011_notificationdigest_frequency'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='updaterequest',
+            name='image_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('ready', 'Ready'), ('failed', 'Failed')], default='pending', max_length=10),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-19 17:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('student_management', '0012_updaterequest_image_status_processing'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='calendar_feed_key',
+            field=models.CharField(blank=True, default='', max_length=32),
+        ),
+    ]
@@ -32,6 +32,12 @@ class User(AbstractBaseUser, PermissionsMixin):
         ('other', 'Other'),
     ]
 
+    DIGEST_CHOICES = [
+        ('immediate', 'Immediately'),
+        ('hourly', 'Hourly digest'),
+        ('daily', 'Daily digest'),
+    ]
+
     user_id = models.AutoField(primary_key=True)
     first_name = models.CharField(max_length=50)
     last_name = models.CharField(max_length=50)
@@ -44,6 +50,7 @@ class User(AbstractBaseUser, PermissionsMixin):
     full_name = models.CharField(max_length=255, blank=True)
     course = models.CharField(max_length=255, blank=True)
     profile_picture = models.ImageField(upload_to='profile_pics/', blank=True, null=True)
+    profile_thumbnail = models.ImageField(upload_to='profile_pics/thumbs/', blank=True, null=True)
 
     bio = models.TextField(blank=True, null=True)
     date_of_birth = models.DateField(blank=True, null=True)
@@ -52,6 +59,12 @@ class User(AbstractBaseUser, PermissionsMixin):
     twitter = models.URLField(blank=True, null=True)
     instagram = models.URLField(blank=True, null=True)
 
+    # How notifications are delivered (see student_management/digests.py)
+    notification_digest = models.CharField(max_length=10, choices=DIGEST_CHOICES, default='immediate')
+
+    # Part of the private calendar feed URLs; changing it revokes them (see student_management/ical.py)
+    calendar_feed_key = models.CharField(max_length=32, blank=True, default='')
+
     # Friends system
     friends = models.ManyToManyField("self", symmetrical=True, blank=True)
 
@@ -88,6 +101,15 @@ class User(AbstractBaseUser, PermissionsMixin):
     def id(self):
         return self.user_id
 
+    @property
+    def thumbnail_url(self):
+        # small square variant for lists, falling back to the full picture
+        if self.profile_thumbnail:
+            return self.profile_thumbnail.url
+        if self.profile_picture:
+            return self.profile_picture.url
+        return None
+
 
 
 # === Interest ===
@@ -104,7 +126,9 @@ class Interest(models.Model):
 class Community(models.Model):
     is_approved = models.BooleanField(default=False)
     community_id = models.AutoField(primary_key=True)
-    com_leader = models.CharField(max_length=255)
+    leader = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name='led_communities'
+    )
     community_name = models.CharField(max_length=100)
     description = models.TextField()
     purpose = models.TextField(blank=True, null=True)
@@ -188,6 +212,7 @@ class Event(models.Model):
     location_type = models.CharField(max_length=20, choices=LOCATION_CHOICES, default='On-Campus')
     actual_location = models.CharField(max_length=255, blank=True, null=True)
     maximum_capacity = models.PositiveIntegerField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)  # calendar feeds and the scheduling index follow changes
 
     class Meta:
         db_table = "Event"
@@ -201,6 +226,7 @@ class EventDetails(models.Model):
     event = models.ForeignKey(Event, on_delete=models.CASCADE)
     user = models.ForeignKey(User, on_delete=models.CASCADE, to_field='user_id')
     can_book = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)  # booked or cancelled
 
 
     class Meta:
@@ -209,6 +235,53 @@ class EventDetails(models.Model):
     def __str__(self):
         return str(self.event_details_id)
 
+# === Event archive ===
+# Finished events and cancelled bookings are moved here by the archive_events
+# command, keeping the hot tables (and their indexes) the size of the upcoming
+# calendar. Rows keep their original ids; see student_management/archive.py.
+class ArchivedEvent(models.Model):
+    event_id = models.IntegerField(primary_key=True)
+    is_approved = models.BooleanField(default=False)
+    event_name = models.CharField(max_length=100)
+    requester = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='archived_event_requests')
+    start_time = models.DateTimeField()
+    end_time = models.DateTimeField()
+    info = models.TextField()
+    community = models.ForeignKey(Community, on_delete=models.SET_NULL, null=True, blank=True, related_name='archived_events')
+    society = models.ForeignKey(Society, on_delete=models.SET_NULL, null=True, blank=True, related_name='archived_events')
+    required_materials = models.TextField(null=True, blank=True)
+    location_type = models.CharField(max_length=20, choices=Event.LOCATION_CHOICES, default='On-Campus')
+    actual_location = models.CharField(max_length=255, blank=True, null=True)
+    maximum_capacity = models.PositiveIntegerField(null=True, blank=True)
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "event_archive"
+
+    def __str__(self):
+        return f"{self.event_name} ({self.location_type})"
+
+
+class ArchivedBooking(models.Model):
+    event_details_id = models.IntegerField(primary_key=True)
+    # the event is archived too, unless this is a cancelled booking of an event that hasn't finished
+    event_id = models.IntegerField()
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_bookings')
+    can_book = models.BooleanField(default=True)
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "event_details_archive"
+        indexes = [
+            models.Index(fields=['user', 'event_id'], name='booking_archive_user_idx'),
+            models.Index(fields=['event_id'], name='booking_archive_event_idx'),
+        ]
+
+    def __str__(self):
+        return str(self.event_details_id)
+
 # === CommunityRequest ===
 class CommunityRequest(models.Model):
     community_name = models.CharField(max_length=255)
@@ -238,6 +311,9 @@ class UpdateRequest(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     reviewed_at = models.DateTimeField(null=True, blank=True)
     profile_picture = models.ImageField(upload_to='update_requests/', null=True, blank=True)
+    profile_thumbnail = models.ImageField(upload_to='update_requests/thumbs/', null=True, blank=True)
+    # state of the background processing of profile_picture (see images.py)
+    image_status = models.CharField(max_length=10, choices=[('pending', 'Pending'), ('processing', 'Processing'), ('ready', 'Ready'), ('failed', 'Failed')], default='pending')
 
     def __str__(self):
         return self.field_to_update
@@ -275,10 +351,32 @@ class Comment(models.Model):
     comment_text = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # latest comments of a post and "load more" pages
+            models.Index(fields=['post', 'created_at'], name='comment_post_created_idx'),
+        ]
+
     def __str__(self):
         return f"{self.user.full_name} on Post {self.post.post_id}"
 
 
+# === PostLike ===
+# One row per (post, user); Post.likes is the maintained count (see student_management/posts.py)
+class PostLike(models.Model):
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='post_likes')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='post_likes')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'user'], name='unique_post_like'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.email} likes Post {self.post_id}"
+
+
 # === CommunityMembership ===
 class CommunityMembership(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -309,9 +407,35 @@ class Notification(models.Model):
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='notification_user_created_idx'),
+            models.Index(fields=['user', 'is_read'], name='notification_user_unread_idx'),
+            models.Index(fields=['is_read', 'created_at'], name='notification_retention_idx'),
+        ]
+
     def __str__(self):
         return f'Notification for {self.user.get_full_name()}: {self.message[:30]}'
 
+# === NotificationDigest ===
+# Open digest for one user and notification type: messages are appended here
+# until due_at, then sent as a single notification and email.
+class NotificationDigest(models.Model):
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='notification_digests')
+    notification_type = models.CharField(max_length=50, choices=Notification._meta.get_field('notification_type').choices)
+    messages = models.JSONField(default=list)
+    count = models.PositiveIntegerField(default=0)
+    # the user's setting when the digest was opened, which is what due_at was based on
+    frequency = models.CharField(max_length=10, choices=User.DIGEST_CHOICES, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    due_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        unique_together = ('user', 'notification_type')
+
+    def __str__(self):
+        return f'{self.count} {self.notification_type} notifications for {self.user.get_full_name()}'
+
 class FriendRequest(models.Model):
     from_user = models.ForeignKey(User, related_name='sent_requests', on_delete=models.CASCADE, to_field='user_id')
     to_user = models.ForeignKey(User, related_name='received_requests', on_delete=models.CASCADE, to_field='user_id')
@@ -0,0 +1,222 @@
+import asyncio
+import json
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from .models import Notification
+
+
+# === Brokers ===
+# A broker fans notification payloads out to the clients that are currently
+# connected to the notification stream. The default one only knows about
+# subscribers living in the same process, which is enough for a single ASGI
+# worker; anything that needs cross-process delivery (Redis, Postgres
+# LISTEN/NOTIFY...) can be plugged in through settings.NOTIFICATION_BROKER.
+# A broker implements subscribe(), unsubscribe(), publish() and
+# has_subscribers(); the last one lets publishers skip building payloads
+# for users nobody is listening to.
+
+class Subscription:
+    def __init__(self, broker, user_id, maxsize=100):
+        self.broker = broker
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    def put(self, payload):
+        # publish() is usually called from a sync view running in a worker
+        # thread, so hand the payload over to the loop that owns the queue
+        self.loop.call_soon_threadsafe(self._put_nowait, payload)
+
+    def _put_nowait(self, payload):
+        if self.queue.full():
+            # slow client: drop the oldest message rather than blocking the publisher
+            self.queue.get_nowait()
+        self.queue.put_nowait(payload)
+
+    async def get(self, timeout=None):
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def subscribe(self, user_id):
+        subscription = Subscription(self, user_id)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.user_id]
+
+    def publish(self, user_id, payload):
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for subscription in subscribers:
+            try:
+                subscription.put(payload)
+            except RuntimeError:
+                # the subscriber's event loop is gone
+                self.unsubscribe(subscription)
+
+    def has_subscribers(self, user_id):
+        return user_id in self._subscribers
+
+    def subscriber_count(self, user_id=None):
+        with self._lock:
+            if user_id is not None:
+                return len(self._subscribers.get(user_id, ()))
+            return sum(len(subs) for subs in self._subscribers.values())
+
+
+class LocalBroker(InProcessBroker):
+    """Broker for tests: keeps every published payload in ``published``."""
+
+    def __init__(self):
+        super().__init__()
+        self.published = []
+
+    def has_subscribers(self, user_id):
+        return True  # record everything, even with no client connected
+
+    def publish(self, user_id, payload):
+        self.published.append((user_id, payload))
+        super().publish(user_id, payload)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                broker_path = getattr(
+                    settings, 'NOTIFICATION_BROKER', 'student_management.notifications.InProcessBroker'
+                )
+                _broker = import_string(broker_path)()
+    return _broker
+
+
+def reset_broker():
+    global _broker
+    with _broker_lock:
+        _broker = None
+
+
+# === Unread counter ===
+# The unread count is kept in the cache and adjusted in place (incr on create,
+# decr on mark-read, each once its transaction commits) so the badge never
+# needs a COUNT(*) over the table. A missing key is simply recomputed from the
+# database on the next read, and the timeout bounds any drift between the
+# counter and the table. Every worker has to see the same counter, so the
+# default cache must be a shared one in production (CACHE_URL in settings.py).
+
+UNREAD_CACHE_KEY = 'notifications:unread:{}'
+
+
+def unread_count(user_id):
+    key = UNREAD_CACHE_KEY.format(user_id)
+    count = cache.get(key)
+    if count is None:
+        # from the primary, even on a replica-routed page (see routers.py)
+        count = Notification.objects.using('default').filter(user_id=user_id, is_read=False).count()
+        # add() so a concurrent incr/decr isn't overwritten by a stale count
+        cache.add(key, count, getattr(settings, 'NOTIFICATION_UNREAD_CACHE_TIMEOUT', 3600))
+    return max(count, 0)
+
+
+def adjust_unread_count(user_id, delta):
+    try:
+        cache.incr(UNREAD_CACHE_KEY.format(user_id), delta)
+    except ValueError:
+        pass  # not cached yet, the next read recomputes it
+
+
+# === Notification helpers ===
+
+def notification_payload(notification):
+    payload = {
+        'message': notification.message,
+        'notification_type': notification.notification_type,
+        'created_at': notification.created_at.isoformat(),
+        'unread_count': unread_count(notification.user_id),
+    }
+    if notification.pk is not None:
+        # bulk_create doesn't return ids on MySQL; then the id is left out rather than sent as null
+        payload = {'id': notification.pk, **payload}
+    return payload
+
+
+def publish_notification(notification):
+    adjust_unread_count(notification.user_id, 1)
+    broker = get_broker()
+    # building the payload may hit the database, skip it when nobody listens
+    if broker.has_subscribers(notification.user_id):
+        broker.publish(notification.user_id, notification_payload(notification))
+
+
+def publish_unread_count(user_id):
+    broker = get_broker()
+    if broker.has_subscribers(user_id):
+        broker.publish(user_id, {'event': 'unread_count', 'unread_count': unread_count(user_id)})
+
+
+def save_notification(user, message, notification_type='info'):
+    notification = Notification.objects.create(
+        user=user,
+        message=message,
+        notification_type=notification_type,
+    )
+    # only count and push once the row is visible to other connections
+    transaction.on_commit(lambda: publish_notification(notification))
+    return notification
+
+
+def bulk_save_notifications(notifications):
+    """Insert unsaved Notification instances in batches and push them after commit."""
+    created = Notification.objects.bulk_create(notifications, batch_size=500)
+
+    def publish_all():
+        for notification in created:
+            publish_notification(notification)
+
+    transaction.on_commit(publish_all)
+    return created
+
+
+def mark_read(user, ids=None):
+    """Mark the user's unread notifications (or just ``ids``) as read with one UPDATE."""
+    notifications = Notification.objects.filter(user=user, is_read=False)
+    if ids is not None:
+        notifications = notifications.filter(pk__in=ids)
+    updated = notifications.update(is_read=True)
+    if updated:
+        def committed():
+            adjust_unread_count(user.pk, -updated)
+            publish_unread_count(user.pk)
+
+        # like publishing, so a rolled-back UPDATE doesn't leave the counter low
+        transaction.on_commit(committed)
+    return updated
+
+
+def format_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
@@ -0,0 +1,123 @@
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Prefetch, Q, Subquery, Window
+from django.db.models.functions import Coalesce, RowNumber
+
+from .models import Comment, CommunityMembership, Post, PostLike
+
+
+# === Post counters ===
+# Post.comments_count and Post.likes are denormalised so feeds never count
+# rows per post. Every write path goes through these helpers, which change
+# the row and the counter in one transaction with an F() update (no
+# read-modify-write race between concurrent requests). Anything that bypasses
+# them (admin deletes, raw SQL) is fixed by reconcile_counters().
+
+def create_comment(post, user, comment_text):
+    with transaction.atomic():
+        comment = Comment.objects.create(post=post, user=user, comment_text=comment_text)
+        Post.objects.filter(pk=post.pk).update(comments_count=F('comments_count') + 1)
+    return comment
+
+
+def comment_created(comment):
+    """Count a comment that was saved by someone else (e.g. a DRF serializer)."""
+    Post.objects.filter(pk=comment.post_id).update(comments_count=F('comments_count') + 1)
+
+
+def delete_comment(comment):
+    with transaction.atomic():
+        deleted, _ = Comment.objects.filter(pk=comment.pk).delete()
+        if deleted:
+            Post.objects.filter(pk=comment.post_id, comments_count__gt=0).update(comments_count=F('comments_count') - 1)
+    return bool(deleted)
+
+
+def like_post(post, user):
+    """Returns False if the user already liked the post."""
+    try:
+        with transaction.atomic():
+            PostLike.objects.create(post=post, user=user)
+            Post.objects.filter(pk=post.pk).update(likes=F('likes') + 1)
+    except IntegrityError:
+        # the unique constraint on (post, user) makes double likes impossible
+        return False
+    return True
+
+
+def unlike_post(post, user):
+    with transaction.atomic():
+        deleted, _ = PostLike.objects.filter(post=post, user=user).delete()
+        if deleted:
+            Post.objects.filter(pk=post.pk, likes__gt=0).update(likes=F('likes') - 1)
+    return bool(deleted)
+
+
+def _counted(model):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(post=OuterRef('pk')).order_by().values('post').annotate(n=Count('pk')).values('n')
+        ),
+        0,
+    )
+
+
+def drifted_posts():
+    """Posts whose stored counters don't match their comment/like rows."""
+    return Post.objects.annotate(
+        real_comments=_counted(Comment), real_likes=_counted(PostLike),
+    ).filter(~Q(comments_count=F('real_comments')) | ~Q(likes=F('real_likes')))
+
+
+def reconcile_counters(batch_size=5000):
+    """Recompute both counters for every post, one UPDATE per primary key range."""
+    bounds = Post.objects.order_by('pk').values_list('pk', flat=True)
+    first, last = bounds.first(), bounds.last()
+    if first is None:
+        return 0
+    updated = 0
+    for start in range(first, last + 1, batch_size):
+        with transaction.atomic():
+            updated += Post.objects.filter(pk__gte=start, pk__lt=start + batch_size).update(
+                comments_count=_counted(Comment), likes=_counted(PostLike),
+            )
+    return updated
+
+
+# === Feeds and comment threads ===
+# A feed page only carries the latest few comments of each post, picked in
+# the database with ROW_NUMBER() over each post's comments, so a post with
+# thousands of comments costs the same as one with three. Older comments are
+# fetched a page at a time by the "load more" endpoint (keyset pagination on
+# (created_at, id), served by the Comment(post, created_at) index).
+
+def visible_posts(user):
+    """Posts ``user`` may see: their own, public ones, and friends/community/club posts they're part of."""
+    return Post.objects.filter(
+        Q(user=user) |
+        Q(visibility='public') |
+        Q(visibility='friends', user__in=user.friends.all()) |
+        Q(visibility='community', user__communitymembership__community_id__in=CommunityMembership.objects.filter(user=user).values('community_id')) |
+        Q(visibility='club', user__joined_societies__in=user.joined_societies.all())
+    ).distinct()
+
+
+def latest_comments(per_post=None):
+    """Prefetch the newest ``per_post`` comments of each post into ``post.latest_comments`` (oldest first)."""
+    per_post = per_post or getattr(settings, 'HOME_COMMENTS_PER_POST', 3)
+    ranked = Comment.objects.select_related('user').annotate(
+        rank=Window(RowNumber(), partition_by=F('post_id'), order_by=[F('created_at').desc(), F('id').desc()]),
+    ).filter(rank__lte=per_post).order_by('created_at', 'id')
+    return Prefetch('comment_set', queryset=ranked, to_attr='latest_comments')
+
+
+def comments_before(post, before=None, limit=None):
+    """One page of ``post``'s comments older than comment ``before``, newest first, and whether more remain."""
+    limit = limit or getattr(settings, 'COMMENTS_PAGE_SIZE', 20)
+    comments = Comment.objects.filter(post=post).select_related('user').order_by('-created_at', '-id')
+    if before is not None:
+        comments = comments.filter(
+            Q(created_at__lt=before.created_at) | Q(created_at=before.created_at, id__lt=before.id)
+        )
+    page = list(comments[:limit + 1])
+    return page[:limit], len(page) > limit
@@ -0,0 +1,196 @@
+import cProfile
+import logging
+import os
+import random
+import time
+from collections import Counter
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.mail import EmailMessage
+from django.db import connections
+from django.template.base import Template
+
+logger = logging.getLogger(__name__)
+
+
+# === Per-request profiling ===
+# Opt-in (PROFILING_ENABLED). For every request we record wall time, SQL
+# query count and time (and how many queries were exact repeats), template
+# render time, cache hits/misses and emails built. The numbers are returned
+# in a Server-Timing header (visible in the browser dev tools) and logged as
+# one key=value line; slow requests can also be profiled with cProfile and
+# dumped to PROFILING_DIR for snakeviz/pstats.
+
+_current = ContextVar('request_profile', default=None)
+
+
+class RequestProfile:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sql_time = 0.0
+        self.queries = Counter()  # (sql, params) -> times executed
+        self.template_time = 0.0
+        self.template_depth = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.emails = 0
+
+    @property
+    def query_count(self):
+        return sum(self.queries.values())
+
+    @property
+    def duplicate_queries(self):
+        return self.query_count - len(self.queries)
+
+    def execute(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - started
+            try:
+                self.queries[(sql, repr(params))] += 1
+            except TypeError:
+                self.queries[(sql, None)] += 1
+
+
+def current_profile():
+    return _current.get()
+
+
+# --- hooks, installed once and only recording while a profile is active ---
+
+_MISSING = object()
+_installed = False
+
+
+def _timed_render(render):
+    def wrapper(self, context):
+        profile = _current.get()
+        if profile is None:
+            return render(self, context)
+        # {% include %} and {% extends %} render nested templates: only time the outermost one
+        profile.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return render(self, context)
+        finally:
+            profile.template_depth -= 1
+            if profile.template_depth == 0:
+                profile.template_time += time.perf_counter() - started
+    return wrapper
+
+
+def _counted_get(get):
+    def wrapper(self, key, default=None, version=None):
+        profile = _current.get()
+        if profile is None:
+            return get(self, key, default, version)
+        value = get(self, key, _MISSING, version)
+        if value is _MISSING:
+            profile.cache_misses += 1
+            return default
+        profile.cache_hits += 1
+        return value
+    return wrapper
+
+
+def _counted_message(message):
+    # every mail backend calls message() once per email it sends
+    def wrapper(self):
+        profile = _current.get()
+        if profile is not None:
+            profile.emails += 1
+        return message(self)
+    return wrapper
+
+
+def install_hooks():
+    global _installed
+    if _installed:
+        return
+    _installed = True
+    Template.render = _timed_render(Template.render)
+    EmailMessage.message = _counted_message(EmailMessage.message)
+    for backend in {type(caches[alias]) for alias in settings.CACHES}:
+        backend.get = _counted_get(backend.get)
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, 'PROFILING_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.slow_ms = getattr(settings, 'PROFILING_SLOW_MS', 500)
+        self.sample_rate = getattr(settings, 'PROFILING_SAMPLE_RATE', 0.0)
+        self.profile_dir = getattr(settings, 'PROFILING_DIR', None)
+        install_hooks()
+
+    def __call__(self, request):
+        profile = RequestProfile()
+        token = _current.set(profile)
+        profiler = None
+        if self.profile_dir and self.sample_rate and random.random() < self.sample_rate:
+            profiler = cProfile.Profile()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(profile.execute))
+                if profiler is not None:
+                    try:
+                        profiler.enable()
+                    except ValueError:
+                        # another profiler is already running in this process
+                        profiler = None
+                try:
+                    response = self.get_response(request)
+                finally:
+                    if profiler is not None:
+                        profiler.disable()
+        finally:
+            _current.reset(token)
+
+        total_ms = (time.perf_counter() - profile.started) * 1000
+        self.report(request, response, profile, total_ms)
+        if profiler is not None and total_ms >= self.slow_ms:
+            self.dump(request, profiler, total_ms)
+        return response
+
+    def report(self, request, response, profile, total_ms):
+        sql_ms = profile.sql_time * 1000
+        template_ms = profile.template_time * 1000
+        response['Server-Timing'] = ', '.join([
+            f'total;dur={total_ms:.1f}',
+            f'sql;dur={sql_ms:.1f};desc="{profile.query_count} queries, {profile.duplicate_queries} duplicates"',
+            f'tpl;dur={template_ms:.1f}',
+            f'cache;desc="{profile.cache_hits} hits, {profile.cache_misses} misses"',
+        ])
+        match = request.resolver_match
+        fields = {
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'total_ms': round(total_ms, 1),
+            'sql_count': profile.query_count,
+            'sql_duplicates': profile.duplicate_queries,
+            'sql_ms': round(sql_ms, 1),
+            'template_ms': round(template_ms, 1),
+            'cache_hits': profile.cache_hits,
+            'cache_misses': profile.cache_misses,
+            'emails': profile.emails,
+        }
+        level = logging.WARNING if total_ms >= self.slow_ms else logging.INFO
+        logger.log(level, ' '.join(f'{key}={value}' for key, value in fields.items()), extra={'profile': fields})
+
+    def dump(self, request, profiler, total_ms):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        name = request.path.strip('/').replace('/', '_') or 'root'
+        path = os.path.join(self.profile_dir, f'{int(time.time())}-{name}-{total_ms:.0f}ms.prof')
+        profiler.dump_stats(path)
+        logger.warning("Slow request %s %s profiled to %s", request.method, request.path, path)
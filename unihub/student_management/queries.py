@@ -0,0 +1,227 @@
+import atexit
+import hashlib
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+# === Slow-query log and N+1 detection ===
+# A development/staging aid (QUERY_INSPECTION_ENABLED). Every query run while
+# a request is being handled is reduced to a fingerprint: the SQL with
+# literals and IN-lists collapsed, so "the same query with other ids" has one
+# shape. The same shape running QUERY_NPLUSONE_THRESHOLD times or more within
+# one request is almost always a lazy relation used inside a loop, typically
+# in a template. Each shape is logged with where it came from (the app code
+# line and, if it ran while rendering, the template line), and all findings
+# are ranked in a report when the process exits. inspect_queries() gives the
+# same checks to tests, and can raise instead of logging.
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# instrumentation middleware wraps every view, so it is never the interesting frame
+INSTRUMENTATION = {
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), name)
+    for name in ('queries.py', 'profiling.py', 'metrics.py')
+}
+
+_IN_LIST = re.compile(r'\(\s*(?:%s|\?|\d+)(?:\s*,\s*(?:%s|\?|\d+))*\s*\)')
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_SPACE = re.compile(r'\s+')
+
+
+class NPlusOneDetected(Exception):
+    pass
+
+
+def normalize(sql):
+    sql = _STRING.sub('?', sql)
+    sql = _IN_LIST.sub('(...)', sql)
+    sql = _NUMBER.sub('?', sql)
+    return _SPACE.sub(' ', sql).strip()
+
+
+def fingerprint(sql):
+    return hashlib.md5(normalize(sql).encode()).hexdigest()[:12]
+
+
+def find_origin():
+    """Describe where the current query comes from: the innermost app code line and template line."""
+    code = template = None
+    frame = sys._getframe(2)
+    while frame is not None and (code is None or template is None):
+        filename = frame.f_code.co_filename
+        if template is None and frame.f_code.co_name == 'render_annotated':
+            node = frame.f_locals.get('self')
+            origin = getattr(node, 'origin', None)
+            token = getattr(node, 'token', None)
+            if origin is not None and token is not None:
+                template = f"{origin.template_name or origin.name}:{token.lineno}"
+        elif (
+            code is None
+            and filename.startswith(PROJECT_ROOT)
+            and filename not in INSTRUMENTATION
+            and os.sep + 'site-packages' + os.sep not in filename
+        ):
+            code = f"{os.path.relpath(filename, PROJECT_ROOT)}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return f"{code or '?'} (template {template})" if template else (code or '?')
+
+
+class QueryInspector:
+    def __init__(self, label=None, threshold=None, slow_ms=None):
+        self.label = label
+        self.threshold = threshold or getattr(settings, 'QUERY_NPLUSONE_THRESHOLD', 5)
+        self.slow_ms = slow_ms if slow_ms is not None else getattr(settings, 'QUERY_SLOW_MS', 100)
+        self.counts = Counter()  # fingerprint -> executions
+        self.times = defaultdict(float)  # fingerprint -> seconds
+        self.samples = {}  # fingerprint -> first SQL seen
+        self.origins = {}  # fingerprint -> where it was first run from
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            key = fingerprint(sql)
+            self.counts[key] += 1
+            self.times[key] += elapsed
+            if key not in self.origins:
+                # walking the stack is the expensive part, do it once per shape
+                self.samples[key] = sql
+                self.origins[key] = find_origin()
+            if elapsed * 1000 >= self.slow_ms:
+                logger.warning(
+                    "Slow query (%.1f ms) in %s at %s: %s",
+                    elapsed * 1000, self.label or '-', self.origins[key], sql[:1000],
+                )
+
+    def repeated(self):
+        """[(fingerprint, executions)] for the shapes that look like N+1 queries, worst first."""
+        return [(key, count) for key, count in self.counts.most_common() if count >= self.threshold]
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+
+
+# --- report across a whole run ---
+
+_report = {}  # (label, fingerprint) -> stats
+_report_lock = threading.Lock()
+
+
+def record(inspector):
+    with _report_lock:
+        for key, count in inspector.repeated():
+            entry = _report.setdefault((inspector.label, key), {
+                'sql': normalize(inspector.samples[key]),
+                'origin': inspector.origins[key],
+                'requests': 0,
+                'executions': 0,
+                'extra_queries': 0,
+                'worst': 0,
+                'seconds': 0.0,
+            })
+            entry['requests'] += 1
+            entry['executions'] += count
+            # the queries a prefetch or join would have saved
+            entry['extra_queries'] += count - 1
+            entry['worst'] = max(entry['worst'], count)
+            entry['seconds'] += inspector.times[key]
+
+
+def format_report(limit=20):
+    with _report_lock:
+        ranked = sorted(_report.items(), key=lambda item: item[1]['extra_queries'], reverse=True)[:limit]
+    if not ranked:
+        return ''
+    lines = [f"Worst N+1 query offenders ({len(_report)} found):"]
+    for rank, ((label, key), entry) in enumerate(ranked, start=1):
+        lines.append(
+            f"{rank:>3}. {label or '-'} at {entry['origin']}: {entry['extra_queries']} extra queries over "
+            f"{entry['requests']} request(s), up to {entry['worst']} per request, {entry['seconds'] * 1000:.0f} ms"
+        )
+        lines.append(f"     [{key}] {entry['sql'][:300]}")
+    return '\n'.join(lines)
+
+
+def report_at_exit():
+    report = format_report()
+    if not report:
+        return
+    path = getattr(settings, 'QUERY_REPORT_FILE', None)
+    if path:
+        with open(path, 'w') as f:
+            f.write(report + '\n')
+    logger.warning(report)
+
+
+atexit.register(report_at_exit)
+
+
+def check(inspector, raise_on_nplusone=False):
+    record(inspector)
+    repeated = inspector.repeated()
+    for key, count in repeated:
+        logger.warning(
+            "Possible N+1 in %s: %d x [%s] from %s: %s",
+            inspector.label or '-', count, key, inspector.origins[key], normalize(inspector.samples[key])[:300],
+        )
+    if repeated and raise_on_nplusone:
+        key, count = repeated[0]
+        raise NPlusOneDetected(
+            f"{inspector.label or 'Code under test'} ran the same query {count} times from {inspector.origins[key]}: "
+            f"{normalize(inspector.samples[key])[:300]}"
+        )
+
+
+class inspect_queries:
+    """Context manager for tests: ``with inspect_queries(raise_on_nplusone=True): client.get(url)``."""
+
+    def __init__(self, label=None, raise_on_nplusone=None, threshold=None):
+        self.inspector = QueryInspector(label, threshold)
+        if raise_on_nplusone is None:
+            raise_on_nplusone = getattr(settings, 'QUERY_NPLUSONE_RAISE', False)
+        self.raise_on_nplusone = raise_on_nplusone
+
+    def __enter__(self):
+        return self.inspector.__enter__()
+
+    def __exit__(self, exc_type, *exc_info):
+        self.inspector.__exit__(exc_type, *exc_info)
+        if exc_type is None:
+            check(self.inspector, self.raise_on_nplusone)
+
+
+class QueryInspectionMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_INSPECTION_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with QueryInspector(request.path) as inspector:
+            response = self.get_response(request)
+        match = request.resolver_match
+        if match:
+            # group the report by view, not by URL (ids in paths)
+            inspector.label = match.view_name
+        check(inspector, getattr(settings, 'QUERY_NPLUSONE_RAISE', False))
+        return response
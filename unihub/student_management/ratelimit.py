@@ -0,0 +1,251 @@
+import math
+import re
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+from django.http import HttpResponse, JsonResponse
+from django.utils.module_loading import import_string
+from rest_framework.throttling import BaseThrottle
+
+from .metrics import RATE_LIMITED
+
+
+# === Rate limiting ===
+# Write endpoints (posting, commenting, friend requests, bookings, society
+# joins, JWT logins) are limited per user (per IP address for anonymous
+# clients) and per scope, with the limits in RATE_LIMITS, e.g.
+# 'comment': '20/m'. Each (scope, client) pair has a token bucket holding up
+# to that many requests, refilled evenly over the period, so a person can
+# click a few times in a row but a script gets a 429 with Retry-After once
+# the bucket is empty, before its request reaches the database.
+#
+# Buckets are stored in the cache as a "theoretical arrival time" (GCRA, the
+# usual single-number form of a token bucket), advanced with atomic
+# increments so every worker process shares the same limits; clients that
+# are already over the limit are turned away after a single cache read.
+# MemoryBackend keeps exact per-process buckets instead, for tests. Either
+# way a per-process store gives every worker its own limits, so outside DEBUG
+# a system check warns about MemoryBackend or a local-memory RATELIMIT_CACHE
+# (set CACHE_URL).
+#
+# Django views use the @ratelimit(scope) decorator; DRF views go through
+# TokenBucketThrottle (DEFAULT_THROTTLE_CLASSES) with their throttle_scope,
+# 'api' by default.
+
+UNSAFE_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+RATE_RE = re.compile(r'^(\d+)/(\d*)([smhd])$')
+
+
+class Rate:
+    """``count`` requests per ``period`` seconds, in bursts of up to ``count``."""
+
+    def __init__(self, count, period):
+        self.count = count
+        self.period = period
+        # whole milliseconds, as cache increments are integers
+        self.interval_ms = math.ceil(period * 1000 / count)  # one token comes back this often
+        self.burst_ms = self.interval_ms * count  # how far ahead of now a full bucket's worth of requests reaches
+
+    @classmethod
+    def parse(cls, text):
+        """'20/m', '5/s', '100/h' or '30/10m' (30 every ten minutes)."""
+        match = RATE_RE.match(text.replace(' ', ''))
+        if not match or not int(match.group(1)):
+            raise ValueError(f"Invalid rate {text!r}, expected something like '20/m'")
+        count, multiplier, unit = match.groups()
+        return cls(int(count), int(multiplier or 1) * PERIODS[unit])
+
+
+# --- backends ---
+
+class CacheBackend:
+    """Buckets in a Django cache (RATELIMIT_CACHE), shared by every process using it.
+
+    Only atomic cache operations update a bucket. The one exception is
+    restarting a bucket that has refilled completely, so requests racing on
+    an idle bucket may each get in, at most one extra apiece.
+    """
+
+    def __init__(self):
+        self.cache = caches[getattr(settings, 'RATELIMIT_CACHE', 'default')]
+
+    def expiry(self, tat, now):
+        # once the arrival time has passed the bucket is full and the key can go
+        return math.ceil((tat - now) / 1000) + 1
+
+    def hit(self, key, rate, now):
+        """Take a token. Returns (allowed, seconds until one is available)."""
+        tat = self.cache.get(key)
+        if tat is not None and tat + rate.interval_ms - now > rate.burst_ms:
+            return False, (tat + rate.interval_ms - now - rate.burst_ms) / 1000
+        start = now + rate.interval_ms
+        if tat is None:
+            if self.cache.add(key, start, self.expiry(start, now)):
+                return True, 0
+        elif tat < now:
+            self.cache.set(key, start, self.expiry(start, now))
+            return True, 0
+        try:
+            tat = self.cache.incr(key, rate.interval_ms)
+        except ValueError:
+            # expired since the read
+            self.cache.set(key, start, self.expiry(start, now))
+            return True, 0
+        if tat - now > rate.burst_ms:
+            self.cache.decr(key, rate.interval_ms)
+            return False, (tat - now - rate.burst_ms) / 1000
+        self.cache.touch(key, self.expiry(tat, now))
+        return True, 0
+
+
+class MemoryBackend:
+    """Exact buckets in this process only, for tests and single-process servers."""
+
+    PRUNE_AT = 10000  # buckets kept before full ones are dropped
+
+    def __init__(self):
+        self.tats = {}
+        self.lock = threading.Lock()
+
+    def hit(self, key, rate, now):
+        with self.lock:
+            tat = max(self.tats.get(key, now), now) + rate.interval_ms
+            if tat - now > rate.burst_ms:
+                return False, (tat - now - rate.burst_ms) / 1000
+            self.tats[key] = tat
+            if len(self.tats) > self.PRUNE_AT:
+                self.tats = {key: tat for key, tat in self.tats.items() if tat > now}
+            return True, 0
+
+    def reset(self):
+        with self.lock:
+            self.tats.clear()
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                backend_path = getattr(settings, 'RATELIMIT_BACKEND', 'student_management.ratelimit.CacheBackend')
+                _backend = import_string(backend_path)()
+    return _backend
+
+
+def reset_backend():
+    """Forget the backend, so the next request builds it from the current settings."""
+    global _backend
+    with _backend_lock:
+        _backend = None
+
+
+def check_shared_store(app_configs=None, **kwargs):
+    """System check: in a deployment the buckets should live where every worker process sees them.
+
+    Local development (no DB_HOST, see settings.DEVELOPMENT) runs one process on locmem, so it isn't checked.
+    """
+    if settings.DEBUG or getattr(settings, 'DEVELOPMENT', False) or not getattr(settings, 'RATELIMIT_ENABLED', True):
+        return []
+    backend_path = getattr(settings, 'RATELIMIT_BACKEND', 'student_management.ratelimit.CacheBackend')
+    if import_string(backend_path) is MemoryBackend:
+        return [checks.Warning(
+            "RATELIMIT_BACKEND is MemoryBackend, so each worker process has its own rate limits.",
+            hint="Use student_management.ratelimit.CacheBackend with a shared cache.",
+            id='student_management.W001',
+        )]
+    alias = getattr(settings, 'RATELIMIT_CACHE', 'default')
+    if settings.CACHES.get(alias, {}).get('BACKEND') == 'django.core.cache.backends.locmem.LocMemCache':
+        return [checks.Warning(
+            f"RATELIMIT_CACHE ({alias!r}) is a local-memory cache, so each worker process has its own rate limits.",
+            hint="Set CACHE_URL to a redis:// or memcached:// cache shared by every worker.",
+            id='student_management.W002',
+        )]
+    return []
+
+
+# --- checks ---
+
+_rates = {}  # rate string -> Rate
+
+
+def rate_for(scope):
+    text = getattr(settings, 'RATE_LIMITS', {}).get(scope)
+    if not text:
+        return None
+    if text not in _rates:
+        _rates[text] = Rate.parse(text)
+    return _rates[text]
+
+
+def client_ip(request):
+    header = getattr(settings, 'RATELIMIT_IP_HEADER', None)
+    forwarded = header and request.META.get(header)
+    if forwarded:
+        # our proxy appends the address it saw; anything before it was sent by the client
+        return forwarded.split(',')[-1].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def client_key(request):
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return f'user:{user.pk}'
+    return f'ip:{client_ip(request)}'
+
+
+def check(request, scope):
+    """Take a token from the client's bucket for ``scope``. Returns (allowed, retry after seconds)."""
+    rate = rate_for(scope)
+    if rate is None or not getattr(settings, 'RATELIMIT_ENABLED', True):
+        return True, 0
+    allowed, retry_after = get_backend().hit(
+        f'ratelimit:{scope}:{client_key(request)}', rate, int(time.time() * 1000),
+    )
+    if not allowed:
+        RATE_LIMITED.inc(scope=scope)
+    return allowed, retry_after
+
+
+def too_many_requests(request, retry_after):
+    seconds = max(1, math.ceil(retry_after))
+    message = f"Too many requests, please try again in {seconds} seconds."
+    if request.accepts('application/json') and not request.accepts('text/html'):
+        response = JsonResponse({'detail': message}, status=429)
+    else:
+        response = HttpResponse(message, status=429, content_type='text/plain; charset=utf-8')
+    response.headers['Retry-After'] = str(seconds)
+    return response
+
+
+def ratelimit(scope, methods=UNSAFE_METHODS):
+    """Limit a view to RATE_LIMITS[scope] per client; ``methods=None`` counts every request."""
+    def decorator(view):
+        @wraps(view)
+        def limited_view(request, *args, **kwargs):
+            if methods is None or request.method in methods:
+                allowed, retry_after = check(request, scope)
+                if not allowed:
+                    return too_many_requests(request, retry_after)
+            return view(request, *args, **kwargs)
+        return limited_view
+    return decorator
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """DRF throttle using the view's ``throttle_scope`` ('api' if it has none) from RATE_LIMITS."""
+
+    def allow_request(self, request, view):
+        allowed, self.retry_after = check(request, getattr(view, 'throttle_scope', None) or 'api')
+        return allowed
+
+    def wait(self):
+        return self.retry_after or None
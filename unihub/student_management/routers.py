@@ -0,0 +1,160 @@
+import logging
+import random
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+
+# === Read/write splitting ===
+# With replicas configured (DATABASE_REPLICAS), the read-only pages listed in
+# DATABASE_REPLICA_VIEWS read from one of them, picked at random per request,
+# while writes and every other view stay on the primary, as do sessions.
+# Three things keep users from seeing stale data:
+#
+# - routing is decided per request, and the first write in a request sends
+#   the rest of its reads to the primary;
+# - a user who wrote something is pinned to the primary for
+#   DATABASE_PIN_SECONDS (a timestamp in their session), so the feed they are
+#   redirected to shows the post they just made;
+# - each process checks a replica at most every DATABASE_REPLICA_CHECK_SECONDS:
+#   one that can't be reached, or that lags by more than
+#   DATABASE_REPLICA_MAX_LAG seconds, is skipped until the next check. With no
+#   usable replica, reads go to the primary.
+#
+# Anything that fills a long-lived cache (unread counters, form and filter
+# choices) reads with .using('default') even on a replica-routed page: a
+# write committed within the replica's lag has already invalidated or
+# adjusted the cache, so a refill from the replica would miss it for the
+# whole timeout.
+#
+# Migrations only run on the primary; replicas get their schema through
+# replication.
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+# rewritten on every request (SESSION_SAVE_EVERY_REQUEST), so a replica is always behind
+PRIMARY_ONLY_APPS = {'sessions'}
+PIN_SESSION_KEY = '_db_primary_until'
+
+_read_alias = ContextVar('read_alias', default=None)
+_wrote = ContextVar('wrote', default=None)  # a list per request, non-empty once it wrote
+
+
+def replicas():
+    return [alias for alias in getattr(settings, 'DATABASE_REPLICAS', ()) if alias in settings.DATABASES]
+
+
+# --- replica health ---
+
+_health = {}  # alias -> (checked at, usable)
+_health_lock = threading.Lock()
+
+
+def replica_lag(alias):
+    """Seconds the replica is behind the primary, or None if the backend can't tell."""
+    connection = connections[alias]
+    if connection.vendor != 'mysql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute('SHOW REPLICA STATUS')
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        status = dict(zip([column[0] for column in cursor.description], row))
+    lag = status.get('Seconds_Behind_Source', status.get('Seconds_Behind_Master'))
+    # NULL means replication is stopped
+    return float('inf') if lag is None else lag
+
+
+def check_replica(alias):
+    try:
+        connections[alias].ensure_connection()
+        lag = replica_lag(alias)
+    except DatabaseError as exc:
+        logger.warning("Replica %s is unavailable, reading from the primary: %s", alias, exc)
+        return False
+    max_lag = getattr(settings, 'DATABASE_REPLICA_MAX_LAG', 10)
+    if lag is not None and lag > max_lag:
+        logger.warning("Replica %s is %s s behind, reading from the primary", alias, lag)
+        return False
+    return True
+
+
+def replica_usable(alias):
+    now = time.monotonic()
+    checked_at, usable = _health.get(alias, (None, None))
+    if checked_at is not None and now - checked_at < getattr(settings, 'DATABASE_REPLICA_CHECK_SECONDS', 10):
+        return usable
+    usable = check_replica(alias)
+    with _health_lock:
+        _health[alias] = (now, usable)
+    return usable
+
+
+def choose_replica():
+    candidates = replicas()
+    random.shuffle(candidates)
+    for alias in candidates:
+        if replica_usable(alias):
+            return alias
+    return None
+
+
+# --- routing ---
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label in PRIMARY_ONLY_APPS:
+            return 'default'
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        wrote = _wrote.get()
+        if wrote is not None and not wrote and model._meta.app_label not in PRIMARY_ONLY_APPS:
+            wrote.append(model._meta.label)
+            # read your own writes for the rest of the request
+            _read_alias.set(None)
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in replicas()
+
+
+class ReplicaRoutingMiddleware:
+    """Sends the reads of read-only views (DATABASE_REPLICA_VIEWS) to a usable replica."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.views = set(getattr(settings, 'DATABASE_REPLICA_VIEWS', ()))
+
+    def __call__(self, request):
+        wrote = []
+        alias_token = _read_alias.set(None)
+        wrote_token = _wrote.set(wrote)
+        try:
+            response = self.get_response(request)
+        finally:
+            _read_alias.reset(alias_token)
+            _wrote.reset(wrote_token)
+        session = getattr(request, 'session', None)
+        if wrote and session is not None:
+            # runs before SessionMiddleware saves the session on the way out
+            session[PIN_SESSION_KEY] = time.time() + getattr(settings, 'DATABASE_PIN_SECONDS', 5)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        match = request.resolver_match
+        if request.method not in SAFE_METHODS or not match or match.view_name not in self.views:
+            return
+        session = getattr(request, 'session', None)
+        if session is not None and session.get(PIN_SESSION_KEY, 0) > time.time():
+            return
+        _read_alias.set(choose_replica())
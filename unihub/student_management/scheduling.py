@@ -0,0 +1,408 @@
+import random
+import threading
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Event, EventDetails, User
+
+
+# === Scheduling conflicts ===
+# Two questions are asked on every booking and event approval: "is this
+# student already booked on something at that time?" and "is that venue
+# already taken?". Both are interval overlap queries, answered from an
+# in-process interval tree per student and per venue instead of the
+# database. The trees only hold events that haven't finished (nothing can be
+# booked into the past), so they stay the size of the upcoming calendar no
+# matter how many years of events the table holds.
+#
+# Each process builds its index on first use and then keeps it current
+# incrementally: before answering, it loads only the Event and EventDetails
+# rows whose updated_at moved since its last sync (an indexed range query
+# that is usually empty). updated_at is set when a row is saved, not when
+# its transaction commits, so a slow transaction (a bulk import, a long
+# approval) can become visible well after a sync has moved past it. Every
+# commit that touches events or bookings therefore also bumps a change
+# counter in the cache, noting the oldest updated_at it wrote; a process that
+# sees the counter move reloads from there (or rebuilds, when the notes are
+# gone or a bulk write left none). That is only as shared as the default
+# cache, so set CACHE_URL when running several processes. Deleted rows
+# aren't seen by a sync at all, so any conflict found is confirmed against
+# the database before it is reported, and stale entries are dropped then.
+#
+# A check and the write it guards run in one transaction with the rows they
+# depend on locked (lock_for_booking(), approve_event()), so two requests
+# can't both pass the check before either has saved.
+
+# rows saved by another process while we were syncing may carry a slightly older updated_at
+SYNC_OVERLAP = timedelta(seconds=5)
+CHANGES_KEY = 'scheduling:changes'  # commit counter; CHANGES_KEY:<n> holds commit n's oldest updated_at
+MAX_CHANGES = 1000  # further behind than this, rebuild instead of reading every note
+
+
+class _Node:
+    __slots__ = ('start', 'end', 'key', 'priority', 'left', 'right', 'max_end')
+
+    def __init__(self, start, end, key):
+        self.start = start
+        self.end = end
+        self.key = key
+        self.priority = random.random()
+        self.left = self.right = None
+        self.max_end = end
+
+
+def _update(node):
+    node.max_end = node.end
+    if node.left is not None and node.left.max_end > node.max_end:
+        node.max_end = node.left.max_end
+    if node.right is not None and node.right.max_end > node.max_end:
+        node.max_end = node.right.max_end
+    return node
+
+
+def _split(node, item):
+    """Split into (nodes ordered before ``item``, nodes ordered at or after it)."""
+    if node is None:
+        return None, None
+    if (node.start, node.key) < item:
+        node.right, right = _split(node.right, item)
+        return _update(node), right
+    left, node.left = _split(node.left, item)
+    return left, _update(node)
+
+
+def _merge(left, right):
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        return _update(left)
+    right.left = _merge(left, right.left)
+    return _update(right)
+
+
+def _remove(node, item):
+    if node is None:
+        return None, False
+    if (node.start, node.key) == item:
+        return _merge(node.left, node.right), True
+    if item < (node.start, node.key):
+        node.left, removed = _remove(node.left, item)
+    else:
+        node.right, removed = _remove(node.right, item)
+    return _update(node), removed
+
+
+class IntervalTree:
+    """Half-open [start, end) intervals in a treap ordered by start, each subtree knowing its latest end.
+
+    Insert and remove are O(log n) expected; overlaps() is O(log n + k) for k
+    results, since any subtree whose latest end is before the query's start,
+    or whose earliest start is after its end, is skipped whole.
+    """
+
+    def __init__(self):
+        self.root = None
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def insert(self, start, end, key):
+        left, right = _split(self.root, (start, key))
+        self.root = _merge(_merge(left, _Node(start, end, key)), right)
+        self.size += 1
+
+    def remove(self, start, key):
+        self.root, removed = _remove(self.root, (start, key))
+        if removed:
+            self.size -= 1
+
+    def overlaps(self, start, end):
+        """Keys of the intervals overlapping [start, end)."""
+        found = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if node is None or node.max_end <= start:
+                continue
+            stack.append(node.left)
+            if node.start < end:
+                if node.end > start:
+                    found.append(node.key)
+                stack.append(node.right)
+        return found
+
+
+class Schedule:
+    """Upcoming approved events indexed by venue, and by the students booked on them."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.built_at = None
+        self.synced_at = None
+        self.changes = None  # the change counter as of the last sync
+        self._reset()
+
+    def _reset(self):
+        self.events = {}  # event_id -> (start, end, venue)
+        self.bookings = {}  # event_details_id -> (user_id, event_id) for active bookings
+        self.attendees = {}  # event_id -> {event_details_id}
+        self.by_venue = {}  # venue -> IntervalTree of event ids
+        self.by_user = {}  # user_id -> IntervalTree of event ids
+
+    # --- keeping the index current ---
+
+    def sync(self):
+        now = timezone.now()
+        rebuild_after = timedelta(seconds=getattr(settings, 'SCHEDULING_REBUILD_SECONDS', 3600))
+        changes = cache.get(CHANGES_KEY, 0)
+        with self.lock:
+            # a periodic full rebuild also lets finished events fall out
+            rebuild = self.built_at is None or now - self.built_at > rebuild_after
+            since = None if rebuild else self.synced_at - SYNC_OVERLAP
+            seen = self.changes
+        if since is not None and changes != seen:
+            committed = committed_since(seen, changes)
+            if committed is None:
+                rebuild, since = True, None
+            elif committed < since:
+                since = committed
+        # the queries run without the lock, so checks in other threads don't queue behind the database
+        events = Event.objects.filter(end_time__gt=now)
+        bookings = EventDetails.objects.filter(event__end_time__gt=now)
+        if since is not None:
+            events = events.filter(updated_at__gte=since)
+            bookings = bookings.filter(updated_at__gte=since)
+        event_rows = list(events.values('event_id', 'start_time', 'end_time', 'location_type', 'actual_location', 'is_approved'))
+        booking_rows = list(bookings.values('event_details_id', 'event_id', 'user_id', 'can_book'))
+        with self.lock:
+            if self.synced_at is not None and self.synced_at >= now:
+                return  # a sync that started after this one has been applied already
+            if rebuild:
+                self._reset()
+                self.built_at = now
+            self.synced_at = now
+            self.changes = changes
+            for row in event_rows:
+                self._set_event(row)
+            for row in booking_rows:
+                self._set_booking(row['event_details_id'], row['user_id'], row['event_id'], row['can_book'])
+
+    def _set_event(self, row):
+        event_id = row['event_id']
+        old = self.events.get(event_id)
+        new = None
+        if row['is_approved']:
+            new = (row['start_time'], row['end_time'], venue_key(row['location_type'], row['actual_location']))
+        if old == new:
+            return
+        user_ids = {self.bookings[pk][0] for pk in self.attendees.get(event_id, ())}
+        if old is not None:
+            self._unindex(event_id, old, user_ids)
+            del self.events[event_id]
+        if new is not None:
+            self.events[event_id] = new
+            self._index(event_id, new, user_ids)
+
+    def _set_booking(self, pk, user_id, event_id, active):
+        if pk in self.bookings:
+            old_user_id, old_event_id = self.bookings.pop(pk)
+            self.attendees[old_event_id].discard(pk)
+            if old_event_id in self.events and not self._booked(old_user_id, old_event_id):
+                start, _, _ = self.events[old_event_id]
+                self.by_user[old_user_id].remove(start, old_event_id)
+        if active:
+            # only the first active booking of a user puts the event in their tree
+            already = self._booked(user_id, event_id)
+            self.bookings[pk] = (user_id, event_id)
+            self.attendees.setdefault(event_id, set()).add(pk)
+            if event_id in self.events and not already:
+                start, end, _ = self.events[event_id]
+                self.by_user.setdefault(user_id, IntervalTree()).insert(start, end, event_id)
+
+    def _booked(self, user_id, event_id):
+        return any(self.bookings[pk][0] == user_id for pk in self.attendees.get(event_id, ()))
+
+    def _index(self, event_id, interval, user_ids):
+        start, end, venue = interval
+        if venue:
+            self.by_venue.setdefault(venue, IntervalTree()).insert(start, end, event_id)
+        for user_id in user_ids:
+            self.by_user.setdefault(user_id, IntervalTree()).insert(start, end, event_id)
+
+    def _unindex(self, event_id, interval, user_ids):
+        start, _, venue = interval
+        if venue:
+            self.by_venue[venue].remove(start, event_id)
+        for user_id in user_ids:
+            self.by_user[user_id].remove(start, event_id)
+
+    def forget(self, event_ids):
+        """Drop events that no longer exist."""
+        with self.lock:
+            for event_id in event_ids:
+                interval = self.events.pop(event_id, None)
+                pks = self.attendees.pop(event_id, set())
+                if interval is not None:
+                    self._unindex(event_id, interval, {self.bookings[pk][0] for pk in pks})
+                for pk in pks:
+                    self.bookings.pop(pk, None)
+
+    # --- queries ---
+
+    def overlapping(self, tree, start, end, exclude=None):
+        with self.lock:
+            found = tree.overlaps(start, end) if tree is not None else []
+        return [event_id for event_id in found if event_id != exclude]
+
+    def user_conflicts(self, user_id, start, end, exclude=None):
+        return self.overlapping(self.by_user.get(user_id), start, end, exclude)
+
+    def venue_conflicts(self, venue, start, end, exclude=None):
+        return self.overlapping(self.by_venue.get(venue), start, end, exclude) if venue else []
+
+
+schedule = Schedule()
+
+
+# --- change notes ---
+
+def committed_since(seen, changes):
+    """The oldest updated_at written by the commits after change ``seen`` up to ``changes``; None to rebuild."""
+    if seen is None or not seen < changes <= seen + MAX_CHANGES:
+        # the counter went backwards (the cache was cleared) or we're too far behind
+        return None
+    notes = cache.get_many([f'{CHANGES_KEY}:{n}' for n in range(seen + 1, changes + 1)])
+    if len(notes) < changes - seen or not all(notes.values()):
+        # expired, not written yet, or left by a bulk write
+        return None
+    return datetime.fromtimestamp(min(notes.values()), dt_timezone.utc)
+
+
+def record_change(since=None):
+    """Once the current transaction commits, have every index reload rows updated at or after ``since``.
+
+    Bulk writes that don't know (or don't set) updated_at leave ``since``
+    out, which makes the next sync a full rebuild.
+    """
+    stamp = since.timestamp() if since is not None else 0
+    timeout = getattr(settings, 'SCHEDULING_REBUILD_SECONDS', 3600)
+
+    def committed():
+        try:
+            changes = cache.incr(CHANGES_KEY)
+        except ValueError:
+            cache.add(CHANGES_KEY, 0, None)
+            changes = cache.incr(CHANGES_KEY)
+        cache.set(f'{CHANGES_KEY}:{changes}', stamp, timeout)
+
+    transaction.on_commit(committed)
+
+
+@receiver(post_save, sender=Event, dispatch_uid='scheduling-event')
+@receiver(post_save, sender=EventDetails, dispatch_uid='scheduling-booking')
+def saved(sender, instance, **kwargs):
+    record_change(instance.updated_at)
+
+
+def venue_key(location_type, location):
+    # online events have no venue; spelling and spacing differences shouldn't hide a clash
+    if location_type == 'Online' or not location:
+        return None
+    return ' '.join(location.split()).casefold()
+
+
+def _confirmed(event_ids, still_conflicting):
+    """Load the conflicting events, dropping any the index only thinks exist."""
+    if not event_ids:
+        return []
+    events = list(Event.objects.filter(still_conflicting, event_id__in=event_ids).distinct().order_by('start_time'))
+    stale = set(event_ids) - {event.event_id for event in events}
+    if stale:
+        # deleted rows never show up in a sync; anything else is corrected by the next one
+        schedule.forget(stale - set(Event.objects.filter(event_id__in=stale).values_list('event_id', flat=True)))
+    return events
+
+
+def booking_conflicts(user, event):
+    """Approved events ``user`` is booked on that overlap ``event``."""
+    if not getattr(settings, 'SCHEDULING_CONFLICTS_ENABLED', True):
+        return []
+    schedule.sync()
+    event_ids = schedule.user_conflicts(user.pk, event.start_time, event.end_time, exclude=event.pk)
+    return _confirmed(event_ids, Q(
+        is_approved=True, start_time__lt=event.end_time, end_time__gt=event.start_time,
+        eventdetails__user=user, eventdetails__can_book=True,
+    ))
+
+
+def venue_conflicts(start, end, location_type, location, exclude=None):
+    """Approved events at the same venue overlapping [start, end)."""
+    venue = venue_key(location_type, location)
+    if venue is None or not getattr(settings, 'SCHEDULING_CONFLICTS_ENABLED', True):
+        return []
+    schedule.sync()
+    event_ids = schedule.venue_conflicts(venue, start, end, exclude=exclude)
+    return [
+        event for event in _confirmed(event_ids, Q(is_approved=True, start_time__lt=end, end_time__gt=start))
+        if venue_key(event.location_type, event.actual_location) == venue
+    ]
+
+
+def lock_slot(event):
+    """Lock ``event`` and the events overlapping it at the same place, inside a transaction.
+
+    Approvals of two events competing for one slot then run one after the
+    other, so the second sees the first as approved. venue_key()'s spacing
+    and case folding can't be written portably in SQL, so every overlapping
+    event with a venue is locked, not only the ones at this venue. Rows are
+    locked in primary key order, which keeps concurrent approvals from
+    deadlocking. Returns the locked primary keys.
+    """
+    slot = Q(pk=event.pk)
+    if venue_key(event.location_type, event.actual_location):
+        slot |= Q(start_time__lt=event.end_time, end_time__gt=event.start_time) & ~Q(location_type='Online')
+    return list(Event.objects.select_for_update().filter(slot).order_by('pk').values_list('pk', flat=True))
+
+
+def approve_event(event):
+    """Approve ``event`` unless its venue is taken by then; returns the clashing events (and approves nothing) or []."""
+    with transaction.atomic():
+        lock_slot(event)
+        clashes = venue_conflicts(
+            event.start_time, event.end_time, event.location_type, event.actual_location, exclude=event.pk,
+        )
+        if clashes:
+            return clashes
+        event.is_approved = True
+        event.save()
+    return []
+
+
+def lock_for_booking(user, event_id):
+    """Lock the event (capacity) and the student (clashes) for a booking, inside a transaction; returns the event.
+
+    Two bookings by one student, or for one event, are then checked and saved
+    one after the other instead of both passing the checks before either is
+    saved. The event is always locked first.
+    """
+    event = Event.objects.select_for_update().filter(event_id=event_id).first()
+    list(User.objects.select_for_update().filter(pk=user.pk).values_list('pk', flat=True))
+    return event
+
+
+def describe(events):
+    return ', '.join(
+        f"'{event.event_name}' ({timezone.localtime(event.start_time):%d %b %H:%M}-{timezone.localtime(event.end_time):%H:%M})"
+        for event in events
+    )
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Community, Event, UpdateRequest
+from .models import Community, Event, Notification, UpdateRequest
 from .models import Post
 
 class CommunitySerializer(serializers.ModelSerializer):
@@ -25,8 +25,10 @@ class UpdateRequestSerializer(serializers.ModelSerializer):
             'status',
             'created_at',
             'reviewed_at',
-            'profile_picture'
+            'profile_picture',
+            'image_status',
         ]
+        read_only_fields = ['image_status']
 
 
 
@@ -38,7 +40,8 @@ class PostSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Post
-        fields = ['post_id', 'content', 'timestamp', 'user_full_name', 'visibility']
+        fields = ['post_id', 'content', 'timestamp', 'user_full_name', 'visibility', 'likes', 'comments_count']
+        read_only_fields = ['likes', 'comments_count']
 
     def get_user_full_name(self, obj):
         return f"{obj.user.first_name} {obj.user.last_name}"
@@ -52,4 +55,13 @@ class CommentSerializer(serializers.ModelSerializer):
         fields = ['id', 'post', 'user', 'comment_text', 'created_at']
 
 
+class NotificationSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Notification
+        fields = ['id', 'message', 'notification_type', 'is_read', 'created_at']
+        read_only_fields = fields
+
 
+class MarkReadSerializer(serializers.Serializer):
+    # no ids means "mark everything as read"
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False, allow_null=True)
@@ -0,0 +1,290 @@
+import gzip
+import logging
+import mimetypes
+import os
+import re
+import stat
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+
+try:
+    import brotli
+except ImportError:  # optional; without it only gzip variants are written
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+
+# === Static and media files ===
+# collectstatic writes every asset under a content-hashed name
+# (home.3f2a9c0b1d4e.css) and, for the text-based ones, a gzip variant next to
+# it (plus a brotli one when the brotli package is installed).
+# StaticFilesMiddleware sits at the
+# top of the middleware stack and answers /static/ and /media/ requests
+# before sessions, auth or the database get involved:
+#
+# - the smallest variant the client accepts is sent, with Vary: Accept-Encoding;
+# - hashed names never change content, so they are cached for a year
+#   ("immutable"); everything else gets STATIC_MAX_AGE / MEDIA_MAX_AGE and an
+#   ETag/Last-Modified to revalidate against (304s cost one stat);
+# - whole files go out as a FileResponse, which WSGI servers with
+#   wsgi.file_wrapper (gunicorn, uWSGI) hand to sendfile();
+# - single byte ranges are supported on uncompressed responses, so
+#   media can be resumed or seeked.
+#
+# Stat results for static files are kept per process (STATIC_ROOT only
+# changes on deploy); media files are stat'ed on every request since
+# profile pictures come and go. Anything not found on disk falls through to
+# the URLconf as before.
+
+COMPRESSIBLE_EXTENSIONS = {
+    '.css', '.js', '.mjs', '.json', '.map', '.svg', '.txt', '.html', '.xml', '.ico', '.ttf', '.otf', '.eot',
+}
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]  # preferred first
+YEAR = 365 * 24 * 3600
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def compress_gzip(data):
+    # fixed mtime so the same input always produces the same bytes
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def compress_brotli(data):
+    return brotli.compress(data, quality=11)
+
+
+COMPRESSORS = {'.gz': compress_gzip}
+if brotli is not None:
+    COMPRESSORS['.br'] = compress_brotli
+
+_reported_missing = set()  # names already warned about, so each is logged once per process, not per render
+
+
+def write_compressed_variants(path):
+    """Write <path>.gz (and .br) next to ``path`` when that saves at least 5%. Returns the suffixes written."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    written = []
+    for suffix, compress in COMPRESSORS.items():
+        compressed = compress(data)
+        if len(compressed) < len(data) * 0.95:
+            with open(path + suffix, 'wb') as f:
+                f.write(compressed)
+            written.append(suffix)
+        elif os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    return written
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Hashed file names plus precompressed variants of the text-based assets."""
+
+    # a template referring to a file collectstatic hasn't seen yet renders the plain name instead of failing
+    manifest_strict = False
+
+    def post_process(self, paths, dry_run=False, **options):
+        hashed = set()
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            if hashed_name and not isinstance(processed, Exception):
+                hashed.add(hashed_name)
+            yield name, hashed_name, processed
+        if dry_run:
+            return
+        for name in sorted(hashed):
+            if os.path.splitext(name)[1].lower() in COMPRESSIBLE_EXTENSIONS:
+                write_compressed_variants(self.path(name))
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            if name not in _reported_missing:
+                _reported_missing.add(name)
+                logger.warning("Static file %s is missing from STATIC_ROOT; run collectstatic", name)
+            return name
+
+
+# --- serving ---
+
+class StaticFile:
+    def __init__(self, path, st, immutable=False):
+        self.path = path
+        self.immutable = immutable
+        content_type, _ = mimetypes.guess_type(path)
+        content_type = content_type or 'application/octet-stream'
+        if content_type.startswith('text/') or content_type in ('application/javascript', 'application/json'):
+            content_type += '; charset=utf-8'
+        self.content_type = content_type
+        self.last_modified = int(st.st_mtime)
+        # (encoding, path, size), most preferred first, identity last
+        self.variants = []
+        for encoding, suffix in ENCODINGS:
+            try:
+                variant = os.stat(path + suffix)
+            except OSError:
+                continue
+            if variant.st_mtime >= st.st_mtime:
+                self.variants.append((encoding, path + suffix, variant.st_size))
+        self.variants.append((None, path, st.st_size))
+
+    def variant(self, accept_encoding):
+        accepted = {token.split(';')[0].strip() for token in accept_encoding.split(',')}
+        for encoding, path, size in self.variants:
+            if encoding is None or encoding in accepted:
+                return encoding, path, size
+
+
+def find_file(root, relative):
+    """(path, stat) of ``root/relative`` if it's a regular file inside ``root``, else (None, None)."""
+    if '\x00' in relative:
+        return None, None
+    root = os.path.abspath(root)
+    path = os.path.abspath(os.path.join(root, relative.lstrip('/')))
+    if not path.startswith(root + os.sep):
+        return None, None
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None, None
+    if not stat.S_ISREG(st.st_mode):
+        return None, None
+    return path, st
+
+
+def byte_range(request, size, etag, last_modified):
+    """(start, end) inclusive for a satisfiable single-range request, 'unsatisfiable', or None for the whole file."""
+    header = request.headers.get('Range', '')
+    match = RANGE_RE.match(header.replace(' ', ''))
+    if not match or match.groups() == ('', ''):
+        return None
+    if_range = request.headers.get('If-Range')
+    if if_range and if_range != etag and parse_http_date_safe(if_range) != last_modified:
+        return None
+    start, end = match.groups()
+    if start == '':
+        # the last N bytes
+        start, end = max(0, size - int(end)), size - 1
+    else:
+        start, end = int(start), min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        return 'unsatisfiable'
+    return start, end
+
+
+class RangeReader:
+    """The bytes [start, end] of an open file, for FileResponse."""
+
+    def __init__(self, f, start, end):
+        self.f = f
+        self.f.seek(start)
+        self.remaining = end - start + 1
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        data = self.f.read(self.remaining if size < 0 else min(size, self.remaining))
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.f.close()
+
+
+class StaticFilesMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.mounts = []  # (url prefix, root, is static)
+        for url, root, is_static in (
+            (settings.STATIC_URL, settings.STATIC_ROOT, True),
+            (settings.MEDIA_URL, settings.MEDIA_ROOT, False),
+        ):
+            if url and root and url.startswith('/'):
+                self.mounts.append((url, str(root), is_static))
+        self.static_files = {}  # relative path -> StaticFile
+        self._hashed_names = None
+
+    @property
+    def hashed_names(self):
+        if self._hashed_names is None:
+            self._hashed_names = set(getattr(staticfiles_storage, 'hashed_files', {}).values())
+        return self._hashed_names
+
+    def __call__(self, request):
+        if request.method in ('GET', 'HEAD'):
+            for prefix, root, is_static in self.mounts:
+                if request.path.startswith(prefix):
+                    file = self.find(root, request.path[len(prefix):], is_static)
+                    if file is not None:
+                        return self.serve(request, file, is_static)
+        return self.get_response(request)
+
+    def find(self, root, relative, is_static):
+        if is_static and relative in self.static_files:
+            return self.static_files[relative]
+        path, st = find_file(root, relative)
+        if path is None:
+            return None
+        file = StaticFile(path, st, immutable=is_static and relative in self.hashed_names)
+        if is_static:
+            self.static_files[relative] = file
+        return file
+
+    def cache_control(self, file, is_static):
+        if file.immutable:
+            return f'public, max-age={YEAR}, immutable'
+        if is_static:
+            return f"public, max-age={getattr(settings, 'STATIC_MAX_AGE', 3600)}"
+        return f"public, max-age={getattr(settings, 'MEDIA_MAX_AGE', 86400)}"
+
+    def serve(self, request, file, is_static):
+        encoding, path, size = file.variant(request.headers.get('Accept-Encoding', ''))
+        etag = quote_etag(f'{file.last_modified:x}-{size:x}' + (f'-{encoding}' if encoding else ''))
+        headers = {
+            'Cache-Control': self.cache_control(file, is_static),
+            'ETag': etag,
+            'Last-Modified': http_date(file.last_modified),
+            'X-Content-Type-Options': 'nosniff',
+        }
+        if len(file.variants) > 1:
+            headers['Vary'] = 'Accept-Encoding'
+        if encoding:
+            headers['Content-Encoding'] = encoding
+        else:
+            headers['Accept-Ranges'] = 'bytes'
+
+        not_modified = get_conditional_response(request, etag=etag, last_modified=file.last_modified)
+        if not_modified is not None:
+            for header, value in headers.items():
+                not_modified.headers.setdefault(header, value)
+            return not_modified
+
+        requested = None if encoding else byte_range(request, size, etag, file.last_modified)
+        if requested == 'unsatisfiable':
+            response = HttpResponse(status=416)
+            response.headers['Content-Range'] = f'bytes */{size}'
+            return response
+
+        if request.method == 'HEAD':
+            response = HttpResponse(content_type=file.content_type)
+            length = size if requested is None else requested[1] - requested[0] + 1
+        elif requested is None:
+            response = FileResponse(open(path, 'rb'), content_type=file.content_type)
+            length = size
+        else:
+            start, end = requested
+            response = FileResponse(RangeReader(open(path, 'rb'), start, end), content_type=file.content_type)
+            length = end - start + 1
+        if requested is not None:
+            response.status_code = 206
+            response.headers['Content-Range'] = f'bytes {requested[0]}-{requested[1]}/{size}'
+        response.headers['Content-Length'] = length
+        response.headers.pop('Content-Disposition', None)
+        for header, value in headers.items():
+            response.headers[header] = value
+        return response
+
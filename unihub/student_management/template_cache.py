@@ -0,0 +1,74 @@
+import logging
+import os
+import time
+
+from django.template import TemplateSyntaxError, engines
+from django.template.backends.django import DjangoTemplates
+from django.urls import NoReverseMatch, reverse
+
+from .views import import_all
+
+logger = logging.getLogger(__name__)
+
+
+# === Template warm-up ===
+# Templates are loaded through the cached loader (see TEMPLATES in
+# settings.py), so each is read and compiled once per process, but that
+# once used to be the first request that rendered it, along with loading the
+# template tag libraries it uses and building the URL resolver's reverse
+# map for its first {% url %}. warm_templates() does all of that while the
+# worker boots, and warm_up() also imports the view modules that urls.py
+# otherwise leaves to their first request (see views/__init__.py); wsgi.py
+# and asgi.py call it when TEMPLATE_WARMUP is on, so the first request on a
+# fresh worker costs the same as the hundredth.
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(__file__), 'templates')
+TEMPLATE_EXTENSIONS = ('.html', '.txt', '.xml')
+
+
+def template_names(directory=TEMPLATE_DIR):
+    """Loader names ('student_management/home.html') of every template under ``directory``."""
+    names = []
+    for root, _, files in os.walk(directory):
+        for filename in files:
+            if filename.endswith(TEMPLATE_EXTENSIONS):
+                names.append(os.path.relpath(os.path.join(root, filename), directory).replace(os.sep, '/'))
+    return sorted(names)
+
+
+def warm_templates(names=None):
+    """Compile ``names`` (default: all of this app's templates) into every Django engine's cache.
+
+    Returns (templates compiled, seconds taken).
+    """
+    started = time.perf_counter()
+    names = template_names() if names is None else names
+    compiled = 0
+    for backend in engines.all():
+        if not isinstance(backend, DjangoTemplates):
+            continue
+        for name in names:
+            try:
+                backend.get_template(name)
+            except TemplateSyntaxError:
+                # the page that uses it fails with the full error; the worker still boots
+                logger.exception("Template %s doesn't compile", name)
+                continue
+            compiled += 1
+    try:
+        # builds the resolver's reverse lookup table used by {% url %}
+        reverse('homepage')
+    except NoReverseMatch:
+        pass
+    elapsed = time.perf_counter() - started
+    logger.info("Warmed %d templates in %.0f ms", compiled, elapsed * 1000)
+    return compiled, elapsed
+
+
+def warm_up():
+    """Import every view module, then compile every template. Returns seconds taken."""
+    started = time.perf_counter()
+    modules = import_all()
+    logger.debug("Imported %d view modules in %.0f ms", modules, (time.perf_counter() - started) * 1000)
+    warm_templates()
+    return time.perf_counter() - started
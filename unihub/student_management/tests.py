@@ -1,3 +1,1543 @@
-from django.test import TestCase
+import asyncio
+import collections
+import gzip
+import io
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import warnings
+from datetime import timedelta
 
-# Create your tests here.
+from unittest import mock
+
+from django.core import checks, mail
+from django.core.management import CommandError, call_command
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured, MiddlewareNotUsed
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connections, transaction
+from django.db.backends.sqlite3.base import DatabaseWrapper as SQLiteDatabaseWrapper
+from django.http import HttpResponse, JsonResponse
+from django.template import Context, Template
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import path, reverse
+from django.utils import timezone
+from django.utils.http import http_date
+from PIL import Image
+from project import env
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
+
+from . import (
+    approvals, archive, choices, communities, dbpool, digests, events as event_listing, ical, images, imports, metrics,
+    notifications, posts, profiling, queries, ratelimit, routers, scheduling, staticfiles, template_cache, views,
+)
+from .management.commands import generate_campus, loadtest
+from .models import (
+    ArchivedBooking, ArchivedEvent, Comment, Community, CommunityMembership, CommunityRequest, Event, EventDetails,
+    Friendship, Interest, Notification, Post, PostLike, Society, SocietyJoinRequest, UpdateRequest, User,
+)
+from .notifications import mark_read, save_notification, unread_count
+
+
+class ReadRowsTests(SimpleTestCase):
+    def rows(self, data, file_format='jsonl'):
+        return list(imports.read_rows(io.BytesIO(data), file_format))
+
+    def test_bad_jsonl_lines_are_reported_with_their_line_number(self):
+        rows = self.rows(b'{"a": 1}\n{bad\n\n[1]\n{"b": 2}\n')
+        self.assertEqual([line for line, _ in rows], [1, 2, 4, 5])
+        self.assertEqual(rows[0][1], {'a': 1})
+        self.assertIsInstance(rows[1][1], imports.InvalidRow)
+        self.assertIn('expected a JSON object', rows[2][1].message)
+        self.assertEqual(rows[3][1], {'b': 2})
+
+    def test_undecodable_bytes_stop_the_file_with_an_error(self):
+        rows = self.rows(b'name\nok\n\xff\xfe\n', 'csv')
+        self.assertEqual(rows[0], (2, {'name': 'ok'}))
+        self.assertIsInstance(rows[-1][1], imports.InvalidRow)
+        self.assertIn('UTF-8', rows[-1][1].message)
+
+
+class ImportTests(TestCase):
+    def test_invalid_lines_are_skipped_not_fatal(self):
+        data = (
+            b'{"email": "a@campus.test", "first_name": "A", "last_name": "One", "password": "pw-123456"}\n'
+            b'{bad\n'
+            b'[1]\n'
+            b'{"email": "b@campus.test", "first_name": "B", "last_name": "Two"}\n'
+        )
+        result = imports.import_users(imports.read_rows(io.BytesIO(data), 'jsonl'))
+        self.assertEqual(result.created, 2)
+        self.assertEqual([line for line, _ in result.errors], [2, 3])
+        self.assertTrue(User.objects.get(email='a@campus.test').check_password('pw-123456'))
+        self.assertEqual([email for email, _, _ in result.invites], ['b@campus.test'])
+
+
+class PostCommentsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='poster@campus.test', password='pw', first_name='P', last_name='Q')
+        self.post = Post.objects.create(user=self.user, content="hello", visibility='public')
+        for i in range(3):
+            Comment.objects.create(post=self.post, user=self.user, comment_text=f"comment {i}")
+        self.client.force_login(self.user)
+
+    def test_limit_is_clamped(self):
+        url = reverse('post_comments', args=[self.post.post_id])
+        for limit, expected in [('-5', 3), ('0', 3), ('abc', 3), ('1', 1), ('1000', 3)]:
+            response = self.client.get(url, {'limit': limit})
+            self.assertEqual(response.status_code, 200, limit)
+            self.assertEqual(len(response.json()['comments']), expected, limit)
+
+
+class MarkReadTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='reader@campus.test', password='pw', first_name='R', last_name='S')
+        self.notifications = [
+            Notification.objects.create(user=self.user, message=f"note {i}", notification_type='info')
+            for i in range(3)
+        ]
+        self.client.force_login(self.user)
+        self.url = reverse('notifications-mark-read')
+
+    def test_bad_ids_are_a_400(self):
+        for payload in [{'ids': ['a']}, {'ids': 'a'}, {'ids': [{}]}]:
+            response = self.client.post(self.url, payload, content_type='application/json')
+            self.assertEqual(response.status_code, 400, payload)
+        self.assertEqual(Notification.objects.filter(is_read=False).count(), 3)
+
+    def test_marks_only_the_given_ids(self):
+        ids = [self.notifications[0].pk, self.notifications[1].pk]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(self.url, {'ids': ids}, content_type='application/json')
+        self.assertEqual(response.json(), {'marked_read': 2, 'unread_count': 1})
+
+    def test_counter_only_drops_when_the_update_commits(self):
+        self.assertEqual(unread_count(self.user.pk), 3)
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            mark_read(self.user)
+        # nothing changes until the transaction commits
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(unread_count(self.user.pk), 3)
+        callbacks[0]()
+        self.assertEqual(unread_count(self.user.pk), 0)
+
+
+class DigestTests(TestCase):
+    def test_subject_uses_the_frequency_the_digest_was_opened_with(self):
+        user = User.objects.create_user(email='digest@campus.test', password='pw', first_name='D', last_name='G')
+        user.notification_digest = 'hourly'
+        user.save()
+        self.assertTrue(digests.queue_for_digest(user, "Someone liked your post"))
+        # switching back to immediate delivery doesn't change the pending digest's subject
+        user.notification_digest = 'immediate'
+        user.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            sent = digests.flush_due_digests(now=timezone.now() + timedelta(hours=2))
+        self.assertEqual(sent, 1)
+        self.assertEqual(mail.outbox[-1].subject, "[UWE Hub] Your hourly digest")
+
+
+def png_upload(name='me.png'):
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 48), 'red').save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+
+class ProfilePictureTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        self.enterContext(override_settings(MEDIA_ROOT=self.media_root))
+        self.user = User.objects.create_user(email='pic@campus.test', password='pw', first_name='P', last_name='C')
+        self.staff = User.objects.create_user(email='staff@campus.test', password='pw', first_name='S', last_name='T')
+        self.update_request = UpdateRequest.objects.create(
+            user=self.user, field_to_update='profile_picture', status='pending', profile_picture=png_upload(),
+        )
+
+    def approve(self):
+        return approvals.approve_update_requests(UpdateRequest.objects.filter(pk=self.update_request.pk), self.staff)
+
+    def test_a_claimed_picture_is_left_to_its_owner(self):
+        self.assertTrue(images.claim(self.update_request.pk))
+        self.assertFalse(images.claim(self.update_request.pk))
+        # the worker is on it: processing again is a no-op, and approval waits for a later attempt
+        self.assertEqual(images.process_update_request_picture(self.update_request.pk).image_status, 'processing')
+        approved, errors = self.approve()
+        self.assertEqual(approved, 0)
+        self.assertIn("still being processed", errors[0][1])
+
+    def test_approval_processes_a_pending_picture_once(self):
+        approved, errors = self.approve()
+        self.assertEqual((approved, errors), (1, []))
+        self.update_request.refresh_from_db()
+        self.assertEqual(self.update_request.image_status, 'ready')
+        self.assertTrue(self.update_request.profile_picture.name.endswith('.webp'))
+        # the background job that was queued for it finds nothing left to do
+        name = self.update_request.profile_picture.name
+        self.assertEqual(images.process_update_request_picture(self.update_request.pk).profile_picture.name, name)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.profile_picture.name.startswith('profile_pics/'))
+
+
+def dead_pid():
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+
+class MultiprocessMetricsTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.enterContext(override_settings(METRICS_MULTIPROCESS_DIR=self.directory))
+        self.registry = metrics.Registry()
+        self.counter = self.registry.counter('test_total', "Test counter.", ['kind'])
+
+    def write_worker_file(self, name, value):
+        snapshot = {'test_total': {
+            'type': 'counter', 'help': "Test counter.", 'labelnames': ['kind'], 'buckets': [],
+            'values': [[['a'], value]],
+        }}
+        with open(os.path.join(self.directory, name), 'w') as f:
+            json.dump(snapshot, f)
+
+    def total(self):
+        return dict((tuple(key), value) for key, value in self.registry.aggregate()['test_total']['values'])[('a',)]
+
+    def test_dead_workers_are_kept_in_the_total(self):
+        pid = dead_pid()
+        self.write_worker_file(f'metrics-{pid}-0123456789ab.json', 5)
+        self.counter.inc(2, kind='a')
+        self.assertEqual(self.total(), 7)
+        # the dead worker's file was folded into retained.json
+        self.assertFalse(os.path.exists(os.path.join(self.directory, f'metrics-{pid}-0123456789ab.json')))
+        self.assertEqual(self.total(), 7)
+        # another worker that exits later adds to it rather than replacing it
+        self.write_worker_file(f'metrics-{pid}-ba9876543210.json', 4)
+        self.assertEqual(self.total(), 11)
+
+    def test_file_names_are_unique_per_process(self):
+        self.registry.flush()
+        names = os.listdir(self.directory)
+        self.assertEqual(len(names), 1)
+        self.assertRegex(names[0], rf'^metrics-{os.getpid()}-[0-9a-f]{{12}}\.json$')
+
+
+class CalendarFeedTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='cal@campus.test', password='pw', first_name='C', last_name='L')
+
+    def test_reset_revokes_the_old_link(self):
+        old_url = reverse('calendar_feed', args=[ical.feed_token(self.user)])
+        self.assertEqual(self.client.get(old_url).status_code, 200)
+        # the key is created once and reused
+        self.assertEqual(ical.feed_token(User.objects.get(pk=self.user.pk)), old_url.split('/')[-2])
+
+        self.client.force_login(self.user)
+        response = self.client.post(reverse('reset_calendar_feed'))
+        self.assertRedirects(response, reverse('booked_events'), fetch_redirect_response=False)
+        self.assertEqual(self.client.get(old_url).status_code, 404)
+        self.user.refresh_from_db()
+        self.assertEqual(self.client.get(reverse('calendar_feed', args=[ical.feed_token(self.user)])).status_code, 200)
+
+    def test_tokens_without_a_valid_key_are_rejected(self):
+        signer = ical.signing.Signer(salt=ical.TOKEN_SALT)
+        for payload in [str(self.user.pk), f'{self.user.pk}:', f'{self.user.pk}:wrong', 'x:y']:
+            url = reverse('calendar_feed', args=[signer.sign(payload)])
+            self.assertEqual(self.client.get(url).status_code, 404, payload)
+
+    def test_an_event_leaving_the_feed_is_not_answered_with_304(self):
+        start = timezone.now() + timedelta(days=1)
+        event = Event.objects.create(event_name="Quiz", info="", is_approved=True, location_type='Online',
+                                     start_time=start, end_time=start + timedelta(hours=1))
+        EventDetails.objects.create(event=event, user=self.user)
+        url = reverse('calendar_feed', args=[ical.feed_token(self.user)])
+        first = self.client.get(url)
+        self.assertIn(b'Quiz', first.content)
+        self.assertNotIn('Last-Modified', first)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+
+        Event.objects.filter(pk=event.pk).update(is_approved=False)
+        # a client that only remembers a date must not be told nothing changed
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=http_date(timezone.now().timestamp() + 3600))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(b'Quiz', response.content)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], first['ETag'])
+
+
+class IntervalTreeTests(SimpleTestCase):
+    def test_matches_brute_force(self):
+        rng = random.Random(42)
+        tree, intervals = scheduling.IntervalTree(), {}
+        for key in range(2000):
+            if intervals and rng.random() < 0.3:
+                removed = rng.choice(list(intervals))
+                tree.remove(intervals.pop(removed)[0], removed)
+            else:
+                start = rng.randrange(1000)
+                intervals[key] = (start, start + rng.randrange(1, 50))
+                tree.insert(*intervals[key], key)
+            if key % 50 == 0:
+                for _ in range(20):
+                    start = rng.randrange(1000)
+                    end = start + rng.randrange(1, 80)
+                    expected = {k for k, (s, e) in intervals.items() if s < end and e > start}
+                    self.assertEqual(set(tree.overlaps(start, end)), expected)
+        self.assertEqual(len(tree), len(intervals))
+
+    def test_touching_intervals_dont_overlap(self):
+        tree = scheduling.IntervalTree()
+        tree.insert(10, 20, 'a')
+        self.assertEqual(tree.overlaps(20, 30), [])
+        self.assertEqual(tree.overlaps(0, 10), [])
+        self.assertEqual(tree.overlaps(19, 21), ['a'])
+        tree.remove(10, 'missing')
+        self.assertEqual(len(tree), 1)
+
+
+class ScheduleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.schedule = scheduling.Schedule()
+        self.student = User.objects.create_user(email='sched@campus.test', password='pw', first_name='S', last_name='C')
+        self.start = timezone.now() + timedelta(days=1)
+
+    def event(self, hours=0, length=1, location='Room 1', approved=True):
+        return Event.objects.create(
+            event_name=f"Event {hours}", info="", is_approved=approved, location_type='On-Campus',
+            actual_location=location,
+            start_time=self.start + timedelta(hours=hours), end_time=self.start + timedelta(hours=hours + length),
+        )
+
+    def venue_conflicts(self, hours, length=1, venue='room 1'):
+        self.schedule.sync()
+        start = self.start + timedelta(hours=hours)
+        return set(self.schedule.venue_conflicts(venue, start, start + timedelta(hours=length)))
+
+    def test_incremental_sync_follows_changes(self):
+        first = self.event(0)
+        self.assertEqual(self.venue_conflicts(0), {first.pk})
+        built_at = self.schedule.built_at
+
+        second = self.event(5, location='  ROOM   1 ')
+        self.assertEqual(self.venue_conflicts(5), {second.pk})
+        # moved, unapproved and booked rows are picked up without a rebuild
+        first.start_time, first.end_time = self.start + timedelta(hours=10), self.start + timedelta(hours=11)
+        first.save()
+        second.is_approved = False
+        second.save()
+        self.assertEqual(self.venue_conflicts(0), set())
+        self.assertEqual(self.venue_conflicts(5), set())
+        self.assertEqual(self.venue_conflicts(10), {first.pk})
+
+        booking = EventDetails.objects.create(event=first, user=self.student)
+        self.schedule.sync()
+        window = (self.start + timedelta(hours=10, minutes=30), self.start + timedelta(hours=12))
+        self.assertEqual(self.schedule.user_conflicts(self.student.pk, *window), [first.pk])
+        booking.can_book = False
+        booking.save()
+        self.schedule.sync()
+        self.assertEqual(self.schedule.user_conflicts(self.student.pk, *window), [])
+        self.assertEqual(self.schedule.built_at, built_at)
+
+    def test_late_commits_are_picked_up(self):
+        self.assertEqual(self.venue_conflicts(0), set())
+        built_at = self.schedule.built_at
+        # saved (updated_at set) well before its transaction committed
+        with mock.patch('django.utils.timezone.now', return_value=timezone.now() - timedelta(minutes=10)), \
+                self.captureOnCommitCallbacks(execute=True):
+            event = self.event(0)
+        self.assertEqual(self.venue_conflicts(0), {event.pk})
+        self.assertEqual(self.schedule.built_at, built_at)
+
+    def test_bulk_writes_rebuild_the_index(self):
+        self.schedule.sync()
+        built_at = self.schedule.built_at
+        with self.captureOnCommitCallbacks(execute=True):
+            scheduling.record_change()
+        with mock.patch.object(scheduling.timezone, 'now', return_value=timezone.now() + timedelta(seconds=1)):
+            self.schedule.sync()
+        self.assertGreater(self.schedule.built_at, built_at)
+
+    def test_deleted_events_are_dropped_when_confirmed(self):
+        event = self.event(0)
+        with mock.patch.object(scheduling, 'schedule', self.schedule):
+            self.assertEqual(
+                [e.pk for e in scheduling.venue_conflicts(event.start_time, event.end_time, 'On-Campus', 'room 1')],
+                [event.pk],
+            )
+            event.delete()
+            self.assertEqual(scheduling.venue_conflicts(event.start_time, event.end_time, 'On-Campus', 'room 1'), [])
+        self.assertNotIn(event.pk, self.schedule.events)
+
+    def test_booking_a_clashing_event_is_refused(self):
+        booked, clashing = self.event(0, location='Hall A'), self.event(0, location='Hall B')
+        self.client.force_login(self.student)
+        with mock.patch.object(scheduling, 'schedule', self.schedule), self.captureOnCommitCallbacks(execute=True):
+            self.client.get(reverse('booked', args=[booked.pk]))
+            self.client.get(reverse('booked', args=[clashing.pk]))
+        self.assertEqual(
+            list(EventDetails.objects.filter(user=self.student).values_list('event_id', flat=True)), [booked.pk],
+        )
+
+    def test_slot_lock_covers_differently_spelled_venues(self):
+        pending = self.event(0, location='room 1', approved=False)
+        same_venue = self.event(0, location='Room  1')
+        self.event(5, location='Room 1')  # later, not locked
+        with transaction.atomic():
+            self.assertEqual(scheduling.lock_slot(pending), [pending.pk, same_venue.pk])
+
+    def test_approval_is_refused_when_the_venue_is_taken(self):
+        taken = self.event(0)
+        pending = self.event(0, location='room 1', approved=False)
+        with mock.patch.object(scheduling, 'schedule', self.schedule):
+            self.assertEqual([e.pk for e in scheduling.approve_event(pending)], [taken.pk])
+        pending.refresh_from_db()
+        self.assertFalse(pending.is_approved)
+
+
+class ChoicesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.staff = User.objects.create_user(email='choices@campus.test', password='pw', first_name='C', last_name='H')
+
+    def labels(self, model):
+        field = type('Field', (), {'empty_label': None})()
+        choices.use_cached_choices(field, model)
+        return {label for _, label in field.choices}
+
+    def test_bulk_writes_drop_the_cached_choices(self):
+        self.assertEqual(self.labels(Community), set())
+        request = CommunityRequest.objects.create(
+            community_name="Climbers", description="d", purpose="p", requester=self.staff,
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            approvals.approve_community_requests(CommunityRequest.objects.filter(pk=request.pk), self.staff)
+        self.assertIn("Climbers", self.labels(Community))
+
+        self.assertNotIn("Chess", self.labels(Interest))
+        with self.captureOnCommitCallbacks(execute=True):
+            result = imports.import_societies([(2, {
+                'society_name': "Chess Club", 'soc_leader': "Kasparov", 'society_location': "Library",
+                'description': "Weekly games.", 'is_approved': 'yes', 'interests': 'Chess',
+            })])
+        self.assertEqual(result.errors, [])
+        self.assertIn("Chess", self.labels(Interest))
+        self.assertIn("Chess Club", self.labels(Society))
+
+
+# --- read replicas: probe views, reporting where the request's reads would go ---
+
+def read_alias(request):
+    return JsonResponse({'read': Interest.objects.all().db})
+
+
+def write_then_read(request):
+    before = Interest.objects.all().db
+    Interest.objects.create(interest_name=f"Probe {timezone.now().timestamp()}")
+    return JsonResponse({'before': before, 'after': Interest.objects.all().db})
+
+
+def fill_caches(request):
+    cache.clear()
+    # the replicas have no tables: any of these reading from one fails
+    return JsonResponse({
+        'read': Interest.objects.all().db,
+        'unread': unread_count(0),
+        'interests': choices._cached(Interest, choices.interests()),
+        'filters': event_listing.filter_choices(),
+        'requests': communities.approved_request_interests(),
+    })
+
+
+urlpatterns = [
+    path('replica/', read_alias, name='replica-probe'),
+    path('replica/write/', write_then_read, name='replica-write-probe'),
+    path('replica/caches/', fill_caches, name='replica-cache-probe'),
+    path('primary/', read_alias, name='primary-probe'),
+]
+
+REPLICAS = {
+    alias: {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}
+    for alias in ('replica_1', 'replica_2')
+}
+
+
+class ReplicaRoutingTests(TestCase):
+    def setUp(self):
+        with warnings.catch_warnings():
+            # the aliases are only named, never connected to: the probes ask the router without querying
+            warnings.simplefilter('ignore')
+            self.enterContext(override_settings(
+                ROOT_URLCONF=__name__,
+                DATABASES={**settings.DATABASES, **REPLICAS},
+                DATABASE_REPLICAS=list(REPLICAS),
+                DATABASE_REPLICA_VIEWS=['replica-probe', 'replica-write-probe', 'replica-cache-probe'],
+                DATABASE_PIN_SECONDS=5,
+            ))
+        routers._health.clear()
+        self.addCleanup(routers._health.clear)
+        self.check = self.enterContext(mock.patch.object(routers, 'check_replica', return_value=True))
+
+    def read(self, name, method='get'):
+        return getattr(self.client, method)(reverse(name)).json()['read']
+
+    def test_replica_views_read_from_a_replica(self):
+        self.assertIn(self.read('replica-probe'), REPLICAS)
+        self.assertEqual(self.read('replica-probe', 'post'), 'default')
+        self.assertEqual(self.read('primary-probe'), 'default')
+
+    def test_a_write_sends_reads_to_the_primary_and_pins_the_session(self):
+        response = self.client.get(reverse('replica-write-probe')).json()
+        self.assertIn(response['before'], REPLICAS)
+        self.assertEqual(response['after'], 'default')
+        # pinned for DATABASE_PIN_SECONDS
+        self.assertEqual(self.read('replica-probe'), 'default')
+        with mock.patch.object(routers.time, 'time', return_value=routers.time.time() + 6):
+            self.assertIn(self.read('replica-probe'), REPLICAS)
+
+    def test_unusable_replicas_are_skipped(self):
+        self.check.side_effect = lambda alias: alias == 'replica_2'
+        self.assertEqual({self.read('replica-probe') for _ in range(5)}, {'replica_2'})
+        routers._health.clear()
+        self.check.side_effect = lambda alias: False
+        self.assertEqual(self.read('replica-probe'), 'default')
+
+    def test_caches_are_filled_from_the_primary(self):
+        Interest.objects.create(interest_name="Chess")
+        response = self.client.get(reverse('replica-cache-probe')).json()
+        self.assertIn(response['read'], REPLICAS)
+        self.assertEqual(response['unread'], 0)
+        self.assertEqual([name for _, name in response['interests']], ["Chess"])
+
+    def test_health_is_checked_once_per_interval(self):
+        for _ in range(5):
+            self.read('replica-probe')
+        self.assertLessEqual(self.check.call_count, len(REPLICAS))
+
+
+class PooledSQLiteWrapper(dbpool.PooledDatabaseWrapperMixin, SQLiteDatabaseWrapper):
+    pass
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        # configure_settings() fills in the defaults Django gives every alias (and wants a 'default')
+        self.settings_dict = connections.configure_settings({alias: {
+            'ENGINE': 'django.db.backends.sqlite3', 'NAME': os.path.join(directory, f'{alias}.sqlite3'),
+            'POOL': {'SIZE': 1, 'MAX_IDLE': 60, 'PING_AFTER': 5},
+        } for alias in ('default', 'pooled')})['pooled']
+        self.addCleanup(self.clear_pool)
+
+    def clear_pool(self):
+        pool = dbpool._pools.pop('pooled', None)
+        if pool is not None:
+            pool.clear()
+
+    def wrapper(self):
+        return PooledSQLiteWrapper(self.settings_dict, alias='pooled')
+
+    def test_closed_connections_are_reused(self):
+        first = self.wrapper()
+        first.ensure_connection()
+        raw = first.connection
+        first.close()
+        self.assertEqual(len(first.pool.idle), 1)
+        second = self.wrapper()
+        second.ensure_connection()
+        self.assertIs(second.connection, raw)
+        # the pool holds SIZE connections; another one is really closed
+        third = self.wrapper()
+        third.ensure_connection()
+        self.assertIsNot(third.connection, raw)
+        second.close()
+        third.close()
+        self.assertEqual(len(second.pool.idle), 1)
+
+    def test_connections_after_an_error_are_not_returned(self):
+        wrapper = self.wrapper()
+        wrapper.ensure_connection()
+        wrapper.errors_occurred = True
+        wrapper.close()
+        self.assertEqual(len(wrapper.pool.idle), 0)
+
+    def test_dead_and_expired_connections_are_dropped(self):
+        wrapper = self.wrapper()
+        wrapper.ensure_connection()
+        dead = wrapper.connection
+        wrapper.close()
+        dead.close()
+        # idle past PING_AFTER: pinged, found dead, replaced
+        with mock.patch.object(dbpool.time, 'monotonic', return_value=dbpool.time.monotonic() + 10), \
+                self.assertLogs('student_management.dbpool', 'INFO'):
+            wrapper = self.wrapper()
+            wrapper.ensure_connection()
+        self.assertIsNot(wrapper.connection, dead)
+        alive = wrapper.connection
+        wrapper.close()
+        # idle past MAX_IDLE: closed without a ping
+        with mock.patch.object(dbpool.time, 'monotonic', return_value=dbpool.time.monotonic() + 120):
+            wrapper = self.wrapper()
+            wrapper.ensure_connection()
+        self.assertIsNot(wrapper.connection, alive)
+        wrapper.close()
+
+
+class WarmUpTests(SimpleTestCase):
+    def test_every_view_module_is_imported(self):
+        self.assertEqual(views.import_all(), len(views.MODULES))
+        for module in views.MODULES:
+            self.assertIn(f'student_management.views.{module}', sys.modules)
+
+    def test_a_broken_view_module_does_not_stop_the_worker(self):
+        with mock.patch.dict(views.MODULES, {'missing': ()}), \
+                self.assertLogs('student_management.views', 'ERROR'):
+            self.assertEqual(views.import_all(), len(views.MODULES) - 1)
+
+    def test_warm_up_imports_views_and_compiles_templates(self):
+        with mock.patch.object(template_cache, 'import_all', return_value=0) as import_all, \
+                mock.patch.object(template_cache, 'warm_templates') as warm_templates, \
+                self.assertNoLogs('student_management.template_cache', 'INFO'):
+            template_cache.warm_up()
+        import_all.assert_called_once_with()
+        warm_templates.assert_called_once_with()
+
+
+class LazyViewTests(SimpleTestCase):
+    def test_imports_the_view_on_its_first_request(self):
+        view = views.lazy('homepage')
+        self.assertEqual((view.__name__, view.__module__), ('homepage', 'student_management.views.accounts'))
+        request = RequestFactory().get('/')
+        request.user = mock.Mock(is_authenticated=True)
+        with mock.patch.object(views.importlib, 'import_module', wraps=views.importlib.import_module) as import_module:
+            for _ in range(2):
+                self.assertEqual(view(request)['Location'], reverse('home'))
+        import_module.assert_called_once_with('student_management.views.accounts')
+
+    def test_class_based_views_get_their_init_kwargs(self):
+        accounts = views.importlib.import_module('student_management.views.accounts')
+        view = views.lazy('UpdateRequestCreateView', template_name='other.html')
+        with mock.patch.object(accounts.UpdateRequestCreateView, 'as_view',
+                               return_value=lambda request: HttpResponse('ok')) as as_view:
+            self.assertEqual(view(RequestFactory().get('/')).content, b'ok')
+            view(RequestFactory().get('/'))
+        as_view.assert_called_once_with(template_name='other.html')
+
+    def test_unknown_names(self):
+        with self.assertRaises(KeyError):
+            views.lazy('no_such_view')
+        with self.assertRaises(AttributeError):
+            views.no_such_view
+        self.assertIs(views.profile, views.importlib.import_module('student_management.views.accounts').profile)
+
+
+class EnvTests(SimpleTestCase):
+    def environ(self, **values):
+        self.enterContext(mock.patch.dict(os.environ, values))
+
+    def test_blank_and_missing_values_use_the_default(self):
+        self.environ(UNIHUB_TEST_BLANK='')
+        self.assertEqual(env.env_str('UNIHUB_TEST_BLANK', 'x'), 'x')
+        self.assertEqual(env.env_str('UNIHUB_TEST_MISSING'), None)
+        self.assertEqual(env.env_int('UNIHUB_TEST_BLANK', 5), 5)
+        self.assertIs(env.env_bool('UNIHUB_TEST_MISSING'), False)
+        self.assertIs(env.env_bool('UNIHUB_TEST_MISSING', True), True)
+        self.assertEqual(env.env_list('UNIHUB_TEST_MISSING', ('a',)), ['a'])
+
+    def test_bools(self):
+        for value, expected in [('1', True), ('TRUE', True), ('yes', True), ('On', True),
+                                ('0', False), ('false', False), ('NO', False), ('off', False)]:
+            self.environ(UNIHUB_TEST_FLAG=value)
+            self.assertIs(env.env_bool('UNIHUB_TEST_FLAG', not expected), expected, value)
+        self.environ(UNIHUB_TEST_FLAG='maybe')
+        with self.assertRaisesMessage(ImproperlyConfigured, "UNIHUB_TEST_FLAG must be one of"):
+            env.env_bool('UNIHUB_TEST_FLAG')
+
+    def test_numbers_and_lists(self):
+        self.environ(UNIHUB_TEST_INT='12', UNIHUB_TEST_FLOAT='0.5', UNIHUB_TEST_LIST=' a.test, ,b.test,')
+        self.assertEqual(env.env_int('UNIHUB_TEST_INT'), 12)
+        self.assertEqual(env.env_float('UNIHUB_TEST_FLOAT'), 0.5)
+        self.assertEqual(env.env_list('UNIHUB_TEST_LIST'), ['a.test', 'b.test'])
+        self.environ(UNIHUB_TEST_INT='twelve')
+        with self.assertRaisesMessage(ImproperlyConfigured, "UNIHUB_TEST_INT must be an integer, got 'twelve'"):
+            env.env_int('UNIHUB_TEST_INT')
+
+    def test_required(self):
+        with self.assertRaisesMessage(ImproperlyConfigured, "UNIHUB_TEST_SECRET must be set"):
+            env.env_required('UNIHUB_TEST_SECRET')
+        self.environ(UNIHUB_TEST_SECRET='s3cret')
+        self.assertEqual(env.env_required('UNIHUB_TEST_SECRET'), 's3cret')
+
+    def test_cache_urls(self):
+        self.assertEqual(env.env_cache('UNIHUB_TEST_CACHE'),
+                         {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'})
+        self.environ(UNIHUB_TEST_CACHE='redis://cache:6379/1')
+        self.assertEqual(env.env_cache('UNIHUB_TEST_CACHE'), {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://cache:6379/1',
+        })
+        self.environ(UNIHUB_TEST_CACHE='memcached://one:11211, two:11211')
+        self.assertEqual(env.env_cache('UNIHUB_TEST_CACHE')['LOCATION'], ['one:11211', 'two:11211'])
+        for value in ['localhost:6379', 'redis://', 'postgres://db/1']:
+            self.environ(UNIHUB_TEST_CACHE=value)
+            with self.assertRaisesMessage(ImproperlyConfigured, "UNIHUB_TEST_CACHE must look like"):
+                env.env_cache('UNIHUB_TEST_CACHE')
+
+
+class RateTests(SimpleTestCase):
+    def test_parse(self):
+        rate = ratelimit.Rate.parse('20/m')
+        self.assertEqual((rate.count, rate.period, rate.interval_ms, rate.burst_ms), (20, 60, 3000, 60000))
+        self.assertEqual(ratelimit.Rate.parse('30 / 10m').period, 600)
+        self.assertEqual(ratelimit.Rate.parse('3/s').interval_ms, 334)  # rounded up to whole milliseconds
+
+    def test_parse_rejects_bad_rates(self):
+        for text in ('0/m', '20', '20/w', 'm/20', ''):
+            with self.subTest(text=text), self.assertRaises(ValueError):
+                ratelimit.Rate.parse(text)
+
+
+class BucketTests(SimpleTestCase):
+    backend_class = ratelimit.MemoryBackend
+
+    def setUp(self):
+        cache.clear()
+        self.backend = self.backend_class()
+        self.rate = ratelimit.Rate.parse('3/m')  # a token every 20 s
+        self.now = 1_000_000_000
+
+    def hit(self, seconds_later=0):
+        return self.backend.hit('ratelimit:test:user:1', self.rate, self.now + seconds_later * 1000)
+
+    def test_burst_then_retry_after(self):
+        self.assertEqual([self.hit() for _ in range(3)], [(True, 0)] * 3)
+        self.assertEqual(self.hit(), (False, 20))
+        self.assertEqual(self.hit(5), (False, 15))
+
+    def test_tokens_refill_evenly(self):
+        for _ in range(3):
+            self.hit()
+        self.assertEqual(self.hit(20), (True, 0))
+        self.assertEqual(self.hit(20), (False, 20))
+        # a full period later the whole burst is back
+        self.assertEqual([self.hit(80) for _ in range(3)], [(True, 0)] * 3)
+        self.assertFalse(self.hit(80)[0])
+
+    def test_keys_have_separate_buckets(self):
+        for _ in range(3):
+            self.hit()
+        self.assertTrue(self.backend.hit('ratelimit:test:user:2', self.rate, self.now)[0])
+
+
+class CacheBucketTests(BucketTests):
+    backend_class = ratelimit.CacheBackend
+
+
+@ratelimit.ratelimit('test')
+def limited_view(request):
+    return JsonResponse({'ok': True})
+
+
+class ThrottledView(APIView):
+    authentication_classes = []
+    permission_classes = [AllowAny]
+    throttle_classes = [ratelimit.TokenBucketThrottle]
+    throttle_scope = 'test'
+
+    def post(self, request):
+        return Response({'ok': True})
+
+
+@override_settings(
+    RATELIMIT_ENABLED=True, RATELIMIT_BACKEND='student_management.ratelimit.MemoryBackend', RATE_LIMITS={'test': '2/m'},
+)
+class RateLimitTests(SimpleTestCase):
+    def setUp(self):
+        ratelimit.reset_backend()
+        self.addCleanup(ratelimit.reset_backend)
+
+    def test_decorator_returns_429_with_retry_after(self):
+        factory = RequestFactory()
+        responses = [limited_view(factory.post('/', REMOTE_ADDR='10.0.0.1')) for _ in range(3)]
+        self.assertEqual([response.status_code for response in responses], [200, 200, 429])
+        self.assertIn(responses[2].headers['Retry-After'], ('29', '30'))
+        # other clients and safe methods aren't limited
+        self.assertEqual(limited_view(factory.post('/', REMOTE_ADDR='10.0.0.2')).status_code, 200)
+        self.assertEqual(limited_view(factory.get('/', REMOTE_ADDR='10.0.0.1')).status_code, 200)
+
+    def test_json_clients_get_a_json_429(self):
+        request = RequestFactory().post('/', HTTP_ACCEPT='application/json')
+        for _ in range(2):
+            limited_view(request)
+        response = limited_view(request)
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Too many requests', json.loads(response.content)['detail'])
+
+    @override_settings(RATELIMIT_ENABLED=False)
+    def test_disabled(self):
+        request = RequestFactory().post('/')
+        self.assertEqual({limited_view(request).status_code for _ in range(5)}, {200})
+
+    def test_drf_throttle(self):
+        view = ThrottledView.as_view()
+        factory = APIRequestFactory()
+        responses = [view(factory.post('/', REMOTE_ADDR='10.0.0.1')) for _ in range(3)]
+        self.assertEqual([response.status_code for response in responses], [200, 200, 429])
+        self.assertIn(responses[2].headers['Retry-After'], ('29', '30'))
+
+
+class RateLimitStoreCheckTests(SimpleTestCase):
+    LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+    REDIS = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://cache:6379/1'}}
+
+    def ids(self):
+        return [warning.id for warning in ratelimit.check_shared_store()]
+
+    @override_settings(DEBUG=False, DEVELOPMENT=False, RATELIMIT_CACHE='default', CACHES=LOCMEM)
+    def test_local_memory_cache_in_a_deployment(self):
+        self.assertEqual(self.ids(), ['student_management.W002'])
+        with self.settings(DEBUG=True):
+            self.assertEqual(self.ids(), [])
+        # the default local setup: DEBUG is off, but there is no DB_HOST
+        with self.settings(DEVELOPMENT=True):
+            self.assertEqual(self.ids(), [])
+            messages = checks.run_checks(tags=[checks.Tags.caches])
+            self.assertFalse([message for message in messages if message.id.startswith('student_management')])
+
+    @override_settings(DEBUG=False, DEVELOPMENT=False, RATELIMIT_CACHE='default', CACHES=REDIS)
+    def test_shared_cache(self):
+        self.assertEqual(self.ids(), [])
+        with self.settings(RATELIMIT_BACKEND='student_management.ratelimit.MemoryBackend'):
+            self.assertEqual(self.ids(), ['student_management.W001'])
+
+
+@override_settings(NOTIFICATION_BROKER='student_management.notifications.LocalBroker')
+class BrokerTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        notifications.reset_broker()
+        self.addCleanup(notifications.reset_broker)
+        self.broker = notifications.get_broker()
+        self.user = User.objects.create_user(email='live@campus.test', password='pw', first_name='L', last_name='V')
+
+    def test_notifications_are_published_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            notification = save_notification(self.user, "Your event starts soon")
+            self.assertEqual(self.broker.published, [])
+        [(user_id, payload)] = self.broker.published
+        self.assertEqual(user_id, self.user.pk)
+        self.assertEqual(payload['id'], notification.pk)
+        self.assertEqual(payload['message'], "Your event starts soon")
+        self.assertEqual(payload['unread_count'], 1)
+
+    def test_rolled_back_notifications_are_not_published(self):
+        self.assertEqual(unread_count(self.user.pk), 0)  # caches the counter
+        with self.captureOnCommitCallbacks(execute=False):
+            save_notification(self.user, "never sent")
+        self.assertEqual(self.broker.published, [])
+        self.assertEqual(unread_count(self.user.pk), 0)
+
+    def test_mark_read_publishes_the_new_count(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            save_notification(self.user, "one")
+        with self.captureOnCommitCallbacks(execute=True):
+            mark_read(self.user)
+        self.assertEqual(self.broker.published[-1], (self.user.pk, {'event': 'unread_count', 'unread_count': 0}))
+
+    def test_subscribers_receive_payloads(self):
+        async def listen():
+            subscription = self.broker.subscribe(self.user.pk)
+            try:
+                # publishers run in worker threads, like sync views
+                await asyncio.to_thread(self.broker.publish, self.user.pk, {'event': 'ping'})
+                return await subscription.get(timeout=1)
+            finally:
+                subscription.close()
+
+        self.assertEqual(asyncio.run(listen()), {'event': 'ping'})
+        self.assertEqual(self.broker.subscriber_count(), 0)
+
+
+class QueryInspectionTests(TestCase):
+    def setUp(self):
+        # keep these findings out of the end-of-run report
+        self.enterContext(mock.patch.dict(queries._report, clear=True))
+        self.user = User.objects.create_user(email='nplus@campus.test', password='pw', first_name='N', last_name='P')
+        for i in range(6):
+            Post.objects.create(user=self.user, content=f"post {i}", visibility='public')
+
+    @override_settings(QUERY_NPLUSONE_RAISE=True)
+    def test_lazy_relation_in_a_loop_raises(self):
+        with self.assertLogs('student_management.queries', 'WARNING'), \
+                self.assertRaisesMessage(queries.NPlusOneDetected, 'ran the same query 6 times'):
+            with queries.inspect_queries():
+                [post.user.email for post in Post.objects.all()]
+
+    @override_settings(QUERY_NPLUSONE_RAISE=True)
+    def test_select_related_passes(self):
+        with queries.inspect_queries() as inspector:
+            [post.user.email for post in Post.objects.select_related('user')]
+        self.assertEqual(inspector.repeated(), [])
+
+    @override_settings(QUERY_NPLUSONE_RAISE=False)
+    def test_only_logged_without_raise(self):
+        with self.assertLogs('student_management.queries', 'WARNING') as logs:
+            with queries.inspect_queries('feed'):
+                [post.user.email for post in Post.objects.all()]
+        self.assertIn('Possible N+1 in feed: 6 x', logs.output[0])
+
+    def test_origin_skips_the_instrumentation(self):
+        with queries.inspect_queries() as inspector:
+            list(Post.objects.all())
+        [origin] = inspector.origins.values()
+        self.assertTrue(origin.startswith('student_management/tests.py:'), origin)
+
+    def test_fingerprints_ignore_literals(self):
+        self.assertEqual(
+            queries.fingerprint("SELECT * FROM t WHERE id IN (1, 2, 3) AND name = 'a'"),
+            queries.fingerprint("SELECT * FROM t WHERE id IN (7) AND name = 'bob'"),
+        )
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        self.student = User.objects.create_user(email='past@campus.test', password='pw', first_name='P', last_name='A')
+        self.now = timezone.now()
+
+    def event(self, days_ago, name="Past event"):
+        start = self.now - timedelta(days=days_ago)
+        return Event.objects.create(
+            event_name=name, info="", is_approved=True, location_type='On-Campus', actual_location='Hall',
+            start_time=start, end_time=start + timedelta(hours=2),
+        )
+
+    def test_finished_events_move_with_their_bookings(self):
+        old, recent = self.event(60, "Old"), self.event(1, "Recent")
+        EventDetails.objects.create(event=old, user=self.student)
+        EventDetails.objects.create(event=old, user=self.student, can_book=False)
+        EventDetails.objects.create(event=recent, user=self.student)
+
+        self.assertEqual(archive.archive_finished_events(self.now - timedelta(days=30), batch_size=1), (1, 2))
+        self.assertFalse(Event.objects.filter(pk=old.pk).exists())
+        archived = ArchivedEvent.objects.get(pk=old.pk)
+        self.assertEqual((archived.event_name, archived.start_time), ("Old", old.start_time))
+        self.assertEqual(ArchivedBooking.objects.filter(event_id=old.pk).count(), 2)
+        self.assertEqual(list(archive.archived_attendees(old.pk).values_list('user_id', flat=True)), [self.student.pk])
+        self.assertEqual(EventDetails.objects.get().event_id, recent.pk)
+
+    def test_cancelled_bookings_move(self):
+        upcoming = self.event(-5)
+        kept = EventDetails.objects.create(event=upcoming, user=self.student)
+        cancelled = EventDetails.objects.create(event=upcoming, user=self.student, can_book=False)
+        self.assertEqual(archive.archive_cancelled_bookings(self.now + timedelta(seconds=1)), 1)
+        self.assertEqual(list(EventDetails.objects.values_list('pk', flat=True)), [kept.pk])
+        self.assertFalse(ArchivedBooking.objects.get(pk=cancelled.pk).can_book)
+
+    def test_an_id_already_archived_aborts_the_batch(self):
+        event = self.event(60)
+        booking = EventDetails.objects.create(event=event, user=self.student)
+        ArchivedEvent.objects.create(
+            event_id=event.pk, event_name="Earlier event", info="", start_time=event.start_time,
+            end_time=event.end_time, updated_at=event.updated_at,
+        )
+        with self.assertRaises(archive.ArchiveConflict):
+            archive.archive_finished_events(self.now)
+        # nothing was deleted that couldn't be copied
+        self.assertTrue(Event.objects.filter(pk=event.pk).exists())
+        self.assertTrue(EventDetails.objects.filter(pk=booking.pk).exists())
+        self.assertEqual(ArchivedEvent.objects.get().event_name, "Earlier event")
+        with self.assertRaisesMessage(CommandError, 'already has id(s)'):
+            call_command('archive_events', days=0, stdout=io.StringIO())
+
+    def test_read_through(self):
+        archived, live = self.event(60, "Archived"), self.event(2, "Live")
+        upcoming = self.event(-2, "Upcoming")
+        for event in (archived, live, upcoming):
+            EventDetails.objects.create(event=event, user=self.student)
+        archive.archive_finished_events(self.now - timedelta(days=30))
+
+        self.assertIsInstance(archive.find_event(archived.pk), ArchivedEvent)
+        self.assertIsInstance(archive.find_event(live.pk), Event)
+        self.assertIsNone(archive.find_event(0))
+        self.assertEqual([event.pk for event in archive.past_bookings(self.student)], [live.pk, archived.pk])
+        self.assertEqual([event.pk for event in archive.past_bookings(self.student, limit=1)], [live.pk])
+
+    def test_command(self):
+        event = self.event(60)
+        EventDetails.objects.create(event=event, user=self.student)
+        out = io.StringIO()
+        call_command('archive_events', dry_run=True, stdout=out)
+        self.assertIn("1 finished events with 1 bookings", out.getvalue())
+        self.assertTrue(Event.objects.filter(pk=event.pk).exists())
+
+        out = io.StringIO()
+        call_command('archive_events', stdout=out)
+        self.assertIn("Archived 1 finished events with 1 bookings, and 0 cancelled bookings.", out.getvalue())
+        self.assertTrue(ArchivedEvent.objects.filter(pk=event.pk).exists())
+
+
+class ApprovalWorkflowTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        self.enterContext(override_settings(MEDIA_ROOT=self.media_root))
+        self.staff = User.objects.create_user(email='admin@campus.test', password='pw', first_name='A', last_name='D')
+        self.students = [
+            User.objects.create_user(email=f'student{i}@campus.test', password='pw', first_name='S', last_name=str(i))
+            for i in range(3)
+        ]
+
+    def reasons(self, errors):
+        return {row.pk: reason for row, reason in errors}
+
+    def test_community_requests(self):
+        music = Interest.objects.create(interest_name="Music")
+        Community.objects.create(community_name="Existing", description="")
+        first, second, third = [
+            CommunityRequest.objects.create(
+                community_name=name, description="d", purpose="p", requester=self.students[0],
+            )
+            for name in ("Choir", "Choir", "Existing")
+        ]
+        first.interests.add(music)
+        done = CommunityRequest.objects.create(
+            community_name="Done", description="d", purpose="p", requester=self.students[1], status='approved',
+        )
+        too_long = CommunityRequest.objects.create(
+            community_name="x" * 101, description="d", purpose="p", requester=self.students[1],
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            approved, errors = approvals.approve_community_requests(CommunityRequest.objects.all(), self.staff)
+
+        self.assertEqual(approved, 3)
+        self.assertEqual(self.reasons(errors), {
+            done.pk: "already approved", too_long.pk: "community name is longer than 100 characters",
+        })
+        # one community per name, also within the selection, with the first request's interests
+        self.assertEqual(Community.objects.filter(community_name="Choir").count(), 1)
+        self.assertEqual(list(Community.objects.get(community_name="Choir").interests.all()), [music])
+        self.assertEqual(Community.objects.filter(community_name="Existing").count(), 1)
+        self.assertEqual(
+            set(CommunityRequest.objects.filter(status='approved').values_list('pk', flat=True)),
+            {first.pk, second.pk, third.pk, done.pk},
+        )
+        self.assertEqual(Notification.objects.filter(user=self.students[0]).count(), 3)
+
+    def test_society_join_requests_skip_existing_members(self):
+        society = Society.objects.create(
+            society_name="Chess", soc_leader="L", society_location="Library", description="d", is_approved=True,
+        )
+        member, joining, approved_already = self.students
+        society.members.add(member)
+        requests = [
+            SocietyJoinRequest.objects.create(user=member, society=society, reason="r"),
+            SocietyJoinRequest.objects.create(user=joining, society=society, reason="r"),
+            SocietyJoinRequest.objects.create(user=approved_already, society=society, reason="r", status='approved'),
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            approved, errors = approvals.approve_society_join_requests(SocietyJoinRequest.objects.all(), self.staff)
+        self.assertEqual(approved, 2)
+        self.assertEqual(self.reasons(errors), {requests[2].pk: "already approved"})
+        self.assertEqual(set(society.members.values_list('pk', flat=True)), {member.pk, joining.pk})
+
+    def test_update_requests_apply_in_order(self):
+        student = self.students[0]
+
+        def update(field, value, **kwargs):
+            return UpdateRequest.objects.create(
+                user=student, field_to_update=field, new_value=value, status='pending', **kwargs
+            )
+
+        update('course', "History")
+        update('course', "Physics")
+        update('name', "Ada Lovelace")
+        bad_date = update('date_of_birth', "31/12/2000")
+        processing = update('profile_picture', None, profile_picture=png_upload(), image_status='processing')
+        done = update('bio', "old")
+        UpdateRequest.objects.filter(pk=done.pk).update(status='approved')
+        with self.captureOnCommitCallbacks(execute=True):
+            approved, errors = approvals.approve_update_requests(UpdateRequest.objects.all(), self.staff)
+
+        self.assertEqual(approved, 3)
+        self.assertEqual(self.reasons(errors), {
+            bad_date.pk: "Invalid date format, use YYYY-MM-DD.",
+            processing.pk: "The picture is still being processed, try again in a moment.",
+            done.pk: "already approved",
+        })
+        student.refresh_from_db()
+        self.assertEqual((student.course, student.first_name, student.last_name), ("Physics", "Ada", "Lovelace"))
+        self.assertEqual(UpdateRequest.objects.filter(status='pending').count(), 2)
+
+    @override_settings(NOTIFICATION_BROKER='student_management.notifications.LocalBroker')
+    def test_bulk_notifications_without_ids_are_published_without_one(self):
+        notifications.reset_broker()
+        self.addCleanup(notifications.reset_broker)
+        notification = Notification(user=self.students[0], message="hello", notification_type='info')
+        # what bulk_create hands back on MySQL
+        with mock.patch.object(Notification.objects, 'bulk_create', return_value=[notification]), \
+                self.captureOnCommitCallbacks(execute=True):
+            notification.created_at = timezone.now()
+            notifications.bulk_save_notifications([notification])
+        [(_, payload)] = notifications.get_broker().published
+        self.assertNotIn('id', payload)
+        self.assertEqual(payload['message'], "hello")
+
+
+class PostCounterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(email='author@campus.test', password='pw', first_name='A', last_name='U')
+        self.reader = User.objects.create_user(email='fan@campus.test', password='pw', first_name='F', last_name='A')
+        self.post = Post.objects.create(user=self.author, content="hello", visibility='public')
+        self.client.force_login(self.reader)
+
+    def counters(self):
+        self.post.refresh_from_db(fields=['comments_count', 'likes'])
+        return self.post.comments_count, self.post.likes
+
+    def test_comments(self):
+        for text in ("first", "second"):
+            self.client.post(reverse('add_comment'), {'post_id': self.post.pk, 'comment_text': text})
+        self.assertEqual(self.counters(), (2, 0))
+        comment = Comment.objects.filter(post=self.post).first()
+        self.client.post(reverse('delete_comment', args=[comment.pk]))
+        self.assertEqual(self.counters(), (1, 0))
+        # deleting it again changes nothing
+        self.assertFalse(posts.delete_comment(comment))
+        self.assertEqual(self.counters(), (1, 0))
+
+    def test_likes(self):
+        url = reverse('like_post', args=[self.post.pk])
+        headers = {'HTTP_ACCEPT': 'application/json'}
+        self.assertEqual(self.client.post(url, **headers).json(), {'liked': True, 'likes': 1})
+        # a second like from the same user isn't counted
+        self.assertEqual(self.client.post(url, **headers).json(), {'liked': True, 'likes': 1})
+        self.assertTrue(posts.like_post(self.post, self.author))
+        self.assertEqual(self.counters(), (0, 2))
+        self.assertEqual(self.client.post(url, {'action': 'unlike'}, **headers).json(), {'liked': False, 'likes': 1})
+        self.assertFalse(posts.unlike_post(self.post, self.reader))
+        self.assertEqual(self.counters(), (0, 1))
+
+    def test_reconcile_repairs_drift(self):
+        posts.create_comment(self.post, self.reader, "counted")
+        Comment.objects.create(post=self.post, user=self.reader, comment_text="not counted")
+        PostLike.objects.create(post=self.post, user=self.reader)
+        other = Post.objects.create(user=self.author, content="other", visibility='public', likes=7)
+        self.assertEqual(set(posts.drifted_posts().values_list('pk', flat=True)), {self.post.pk, other.pk})
+
+        out = io.StringIO()
+        call_command('reconcile_post_counters', dry_run=True, stdout=out)
+        self.assertIn("2 posts have counters out of step.", out.getvalue())
+        self.assertEqual(self.counters(), (1, 0))
+
+        call_command('reconcile_post_counters', batch_size=1, stdout=io.StringIO())
+        self.assertEqual(self.counters(), (2, 1))
+        other.refresh_from_db()
+        self.assertEqual(other.likes, 0)
+        self.assertFalse(posts.drifted_posts().exists())
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(email='exports@campus.test', password='pw', first_name='E', last_name='X')
+        User.objects.filter(pk=self.staff.pk).update(is_staff=True)
+        self.member = User.objects.create_user(
+            email='member@campus.test', password='pw', first_name='Ann', last_name='Lee',
+        )
+        User.objects.filter(pk=self.member.pk).update(course='Maths')
+        self.society = Society.objects.create(
+            society_name="Chess", soc_leader="L", society_location="Library", description="d", is_approved=True,
+        )
+        self.society.members.add(self.member)
+        self.client.force_login(self.staff)
+
+    def download(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_society_members_csv(self):
+        response, body = self.download(reverse('export_society_members', args=[self.society.pk]))
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertEqual(
+            response['Content-Disposition'], f'attachment; filename="society-{self.society.pk}-members.csv"',
+        )
+        self.assertEqual(body.splitlines(), [
+            'user_id,first_name,last_name,email,course', f'{self.member.pk},Ann,Lee,member@campus.test,Maths',
+        ])
+
+    def test_event_attendees_jsonl_include_live_and_archived_bookings(self):
+        start = timezone.now() - timedelta(days=60)
+        event = Event.objects.create(
+            event_name="Old", info="", location_type='Online', start_time=start, end_time=start + timedelta(hours=1),
+        )
+        EventDetails.objects.create(event=event, user=self.member)
+        EventDetails.objects.create(event=event, user=self.staff, can_book=False)
+        archive.archive_finished_events(timezone.now())
+
+        url = reverse('export_event_attendees', args=[event.pk])
+        response, body = self.download(url, format='jsonl')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual([json.loads(line)['email'] for line in body.splitlines()], ['member@campus.test'])
+        _, body = self.download(url, format='jsonl', include_cancelled='true')
+        self.assertEqual([json.loads(line)['active'] for line in body.splitlines()], [True, False])
+
+    def test_request_history_filters_by_status(self):
+        CommunityRequest.objects.create(community_name="A", description="d", purpose="p", requester=self.member)
+        CommunityRequest.objects.create(
+            community_name="B", description="d", purpose="p", requester=self.member, status='approved',
+        )
+        _, body = self.download(reverse('export_request_history', args=['community']), status='approved')
+        rows = body.splitlines()
+        self.assertEqual(rows[0], 'id,requester__email,community_name,status,created_at,reviewed_by__email,reviewed_at')
+        self.assertEqual([row.split(',')[2] for row in rows[1:]], ['B'])
+
+    def test_errors(self):
+        self.assertEqual(
+            self.client.get(reverse('export_society_members', args=[self.society.pk]), {'format': 'xml'}).status_code,
+            400,
+        )
+        self.assertEqual(self.client.get(reverse('export_society_members', args=[0])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('export_event_attendees', args=[0])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('export_request_history', args=['nope'])).status_code, 404)
+        # staff only
+        self.client.force_login(self.member)
+        response = self.client.get(reverse('export_society_members', args=[self.society.pk]))
+        self.assertEqual(response.status_code, 302)
+
+    def test_command(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        output = os.path.join(directory, 'members.jsonl')
+        call_command('export_data', 'society-members', id=self.society.pk, format='jsonl', output=output)
+        with open(output, encoding='utf-8') as f:
+            self.assertEqual([json.loads(line)['user_id'] for line in f], [self.member.pk])
+        with self.assertRaisesMessage(CommandError, '--kind is required'):
+            call_command('export_data', 'requests')
+
+
+@override_settings(COMMUNITIES_PER_PAGE=2)
+class CommunityListingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.viewer = User.objects.create_user(email='viewer@campus.test', password='pw', first_name='V', last_name='W')
+        self.leader = User.objects.create_user(email='lead@campus.test', password='pw', first_name='L', last_name='D')
+        self.hiking = Interest.objects.create(interest_name="Hiking")
+        self.art, self.books, self.chess = [
+            Community.objects.create(community_name=name, description="d", is_approved=True, leader=self.leader)
+            for name in ("Art", "Books", "Chess")
+        ]
+        Community.objects.create(community_name="Pending", description="d")
+        for user in (self.viewer, self.leader):
+            CommunityMembership.objects.create(user=user, community=self.books)
+        self.chess.interests.add(self.hiking)
+        # approved before its request's interests were copied over
+        request = CommunityRequest.objects.create(
+            community_name="Art", description="d", purpose="p", requester=self.leader, status='approved',
+        )
+        request.interests.add(Interest.objects.create(interest_name="Painting"))
+        self.client.force_login(self.viewer)
+
+    def page(self, **params):
+        return self.client.get(reverse('community'), params).context['page']
+
+    def test_annotations(self):
+        listed = {community.community_name: community for community in communities.listing(self.viewer)}
+        self.assertEqual(list(listed), ["Art", "Books", "Chess"])
+        self.assertEqual({name: c.member_count for name, c in listed.items()}, {"Art": 0, "Books": 2, "Chess": 0})
+        self.assertEqual([name for name, c in listed.items() if c.is_member], ["Books"])
+        self.assertEqual(listed["Art"].leader, self.leader)
+
+    def test_pages_filters_and_fallback_interests(self):
+        first = self.page()
+        self.assertEqual(first.paginator.count, 3)
+        self.assertEqual(
+            [(c.community_name, c.display_interests) for c in first], [("Art", ["Painting"]), ("Books", [])],
+        )
+        self.assertEqual([c.community_name for c in self.page(page=2)], ["Chess"])
+        self.assertEqual([c.community_name for c in self.page(filter='joined')], ["Books"])
+        self.assertEqual([c.community_name for c in self.page(search='hik')], ["Chess"])
+        self.assertEqual(list(self.page(filter='my_requests')), [])
+
+    def test_one_query_per_page_and_one_for_interests(self):
+        self.client.get(reverse('community'))  # warm the caches
+        with CaptureQueriesContext(connections['default']) as captured:
+            self.client.get(reverse('community'))
+        selects = [
+            query['sql'] for query in captured.captured_queries
+            if query['sql'].startswith('SELECT') and 'django_session' not in query['sql']
+        ]
+        # the user, the count, the page (annotated) and the interests prefetch
+        self.assertEqual(len(selects), 4, '\n'.join(selects))
+        self.assertIn('AS "member_count"', selects[2])
+
+
+@override_settings(EVENTS_PER_PAGE=2)
+class EventListingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.viewer = User.objects.create_user(email='events@campus.test', password='pw', first_name='E', last_name='V')
+        self.other = User.objects.create_user(email='other@campus.test', password='pw', first_name='O', last_name='T')
+        self.society = Society.objects.create(
+            society_name="Drama", soc_leader="L", society_location="Theatre", description="d", is_approved=True,
+        )
+        start = timezone.now() + timedelta(days=1)
+
+        def event(name, days, approved=True, **fields):
+            return Event.objects.create(
+                event_name=name, info="", is_approved=approved, start_time=start + timedelta(days=days),
+                end_time=start + timedelta(days=days, hours=1), **fields,
+            )
+
+        self.full = event("Full talk", 0, location_type='On-Campus', actual_location='Hall', maximum_capacity=1)
+        self.open = event("Open workshop", 1, location_type='Online', maximum_capacity=5, society=self.society)
+        self.unlimited = event("Unlimited fair", 2, location_type='On-Campus', actual_location='Field')
+        event("Unapproved", 3, approved=False, location_type='Online')
+        event("Finished", -3, location_type='Online')
+        EventDetails.objects.create(event=self.full, user=self.other)
+        EventDetails.objects.create(event=self.open, user=self.viewer)
+        EventDetails.objects.create(event=self.open, user=self.other, can_book=False)  # cancelled
+        self.client.force_login(self.viewer)
+
+    def page(self, **params):
+        response = self.client.get(reverse('events'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.context
+
+    def names(self, **params):
+        return [event.event_name for event in self.page(**params)['page']]
+
+    def test_annotations(self):
+        listed = {event.event_name: event for event in event_listing.listing(self.viewer)}
+        self.assertEqual(list(listed), ["Unlimited fair", "Open workshop", "Full talk"])
+        self.assertEqual(
+            {name: e.active_bookings for name, e in listed.items()},
+            {"Unlimited fair": 0, "Open workshop": 1, "Full talk": 1},
+        )
+        self.assertEqual([name for name, e in listed.items() if e.is_full], ["Full talk"])
+        self.assertEqual([name for name, e in listed.items() if e.is_booked_by_me], ["Open workshop"])
+        self.assertEqual([event_listing.spots_left(e) for e in listed.values()], [None, 4, 0])
+
+    def test_pagination_and_context(self):
+        context = self.page()
+        self.assertEqual(context['page'].paginator.count, 3)
+        self.assertEqual([e.event_name for e in context['page']], ["Unlimited fair", "Open workshop"])
+        self.assertEqual(context['booked_event_ids'], {self.open.pk})
+        self.assertEqual([e.spots_left for e in context['page']], [None, 4])
+        self.assertEqual([s['society_name'] for s in context['societies']], ["Drama"])
+        self.assertEqual(self.names(page=2), ["Full talk"])
+        self.assertEqual(self.names(page=99), ["Full talk"])
+
+    def test_filters(self):
+        self.assertEqual(self.names(filter='online'), ["Open workshop"])
+        self.assertEqual(self.names(filter='on-campus'), ["Unlimited fair", "Full talk"])
+        self.assertEqual(self.names(search='hall'), ["Full talk"])
+        self.assertEqual(self.names(society=self.society.pk), ["Open workshop"])
+        # anything but an id is ignored
+        self.assertEqual(self.names(society='1 OR 1=1'), ["Unlimited fair", "Open workshop"])
+
+
+class StaticFilesTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.static_root, self.media_root = os.path.join(directory, 'static'), os.path.join(directory, 'media')
+        os.mkdir(self.static_root)
+        os.mkdir(self.media_root)
+        self.enterContext(override_settings(
+            STATIC_URL='/static/', STATIC_ROOT=self.static_root, MEDIA_URL='/media/', MEDIA_ROOT=self.media_root,
+        ))
+        self.css = b'body { color: red; }\n' * 50
+        self.write(self.static_root, 'app.css', self.css)
+        staticfiles.write_compressed_variants(os.path.join(self.static_root, 'app.css'))
+        self.write(self.static_root, 'app.0123456789ab.css', self.css)
+        self.write(self.media_root, 'clip.bin', bytes(range(10)))
+        self.write(directory, 'secret.txt', b'secret')
+        self.middleware = staticfiles.StaticFilesMiddleware(lambda request: HttpResponse("app", status=404))
+        self.middleware._hashed_names = {'app.0123456789ab.css'}
+
+    def write(self, root, name, data):
+        with open(os.path.join(root, name), 'wb') as f:
+            f.write(data)
+
+    def get(self, path, method='get', **headers):
+        response = self.middleware(getattr(RequestFactory(), method)(path, headers=headers))
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        return response, body
+
+    def test_whole_file(self):
+        response, body = self.get('/static/app.css')
+        self.assertEqual((response.status_code, body), (200, self.css))
+        self.assertEqual(response['Content-Type'], 'text/css; charset=utf-8')
+        self.assertEqual(response['Content-Length'], str(len(self.css)))
+        self.assertEqual(response['Cache-Control'], 'public, max-age=3600')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        hashed, _ = self.get('/static/app.0123456789ab.css')
+        self.assertEqual(hashed['Cache-Control'], f'public, max-age={staticfiles.YEAR}, immutable')
+
+    def test_encoding_negotiation(self):
+        response, body = self.get('/static/app.css', Accept_Encoding='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertNotIn('Accept-Ranges', response)
+        self.assertEqual(gzip.decompress(body), self.css)
+        response, body = self.get('/static/app.css', Accept_Encoding='identity')
+        self.assertNotIn('Content-Encoding', response)
+        self.assertEqual(body, self.css)
+
+    def test_ranges(self):
+        response, body = self.get('/media/clip.bin', Range='bytes=2-5')
+        self.assertEqual((response.status_code, body), (206, bytes([2, 3, 4, 5])))
+        self.assertEqual(response['Content-Range'], 'bytes 2-5/10')
+        self.assertEqual(response['Content-Length'], '4')
+        self.assertEqual(self.get('/media/clip.bin', Range='bytes=-3')[1], bytes([7, 8, 9]))
+        self.assertEqual(self.get('/media/clip.bin', Range='bytes=8-')[1], bytes([8, 9]))
+        response, _ = self.get('/media/clip.bin', Range='bytes=10-')
+        self.assertEqual((response.status_code, response['Content-Range']), (416, 'bytes */10'))
+        # an If-Range that no longer matches gets the whole file
+        response, body = self.get('/media/clip.bin', Range='bytes=2-5', If_Range='"stale"')
+        self.assertEqual((response.status_code, body), (200, bytes(range(10))))
+
+    def test_not_modified(self):
+        first, _ = self.get('/static/app.css')
+        response, body = self.get('/static/app.css', If_None_Match=first['ETag'])
+        self.assertEqual((response.status_code, body), (304, b''))
+        self.assertEqual(response['ETag'], first['ETag'])
+        response, _ = self.get('/static/app.css', If_Modified_Since=first['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+        # each encoding is its own representation
+        response, _ = self.get('/static/app.css', If_None_Match=first['ETag'], Accept_Encoding='gzip')
+        self.assertEqual(response.status_code, 200)
+
+    def test_head(self):
+        response, body = self.get('/media/clip.bin', method='head')
+        self.assertEqual((response.status_code, body, response['Content-Length']), (200, b'', '10'))
+
+    def test_anything_else_falls_through(self):
+        paths = ['/static/../secret.txt', '/static/%2e%2e/secret.txt', '/static/missing.css', '/static/', '/other/']
+        for path in paths:
+            with self.subTest(path=path):
+                self.assertEqual(self.get(path)[0].status_code, 404)
+        self.assertEqual(staticfiles.find_file(self.static_root, '../secret.txt'), (None, None))
+        self.assertEqual(staticfiles.find_file(self.static_root, 'app.css\x00.txt'), (None, None))
+        response = self.middleware(RequestFactory().post('/static/app.css'))
+        self.assertEqual(response.status_code, 404)
+
+    def test_missing_files_are_reported_once(self):
+        storage = staticfiles.CompressedManifestStaticFilesStorage(location=self.static_root)
+        self.enterContext(mock.patch.object(staticfiles, '_reported_missing', set()))
+        with self.assertLogs('student_management.staticfiles', 'WARNING') as logs:
+            for _ in range(3):
+                self.assertEqual(storage.stored_name('css/nowhere.css'), 'css/nowhere.css')
+        self.assertEqual(len(logs.records), 1)
+
+
+class ProfilingTests(TestCase):
+    @override_settings(PROFILING_ENABLED=False)
+    def test_off_unless_enabled(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            profiling.ProfilingMiddleware(lambda request: HttpResponse())
+        self.assertNotIn('Server-Timing', self.client.get(reverse('login')))
+
+    @override_settings(PROFILING_ENABLED=True)
+    def test_enabled_in_settings(self):
+        with self.assertLogs('student_management.profiling', 'INFO') as logs:
+            self.assertIn('Server-Timing', self.client.get(reverse('login')))
+        self.assertEqual(logs.records[0].profile['view'], 'login')
+
+    @override_settings(PROFILING_ENABLED=True, PROFILING_SLOW_MS=60_000, PROFILING_SAMPLE_RATE=0)
+    def test_server_timing_header(self):
+        def view(request):
+            list(User.objects.filter(pk=0))
+            list(User.objects.filter(pk=0))
+            cache.set('profiling:hit', 1)
+            cache.get('profiling:hit')
+            cache.get('profiling:miss')
+            return HttpResponse(Template('{{ name }}').render(Context({'name': 'probe'})))
+
+        middleware = profiling.ProfilingMiddleware(view)
+        with self.assertLogs('student_management.profiling', 'INFO') as logs:
+            response = middleware(RequestFactory().get('/probe/'))
+        self.assertEqual(response.content, b'probe')
+        header = response['Server-Timing']
+        self.assertRegex(
+            header, r'^total;dur=[0-9.]+, sql;dur=[0-9.]+;desc="2 queries, 1 duplicates", tpl;dur=[0-9.]+, ',
+        )
+        self.assertTrue(header.endswith(', cache;desc="1 hits, 1 misses"'), header)
+        self.assertEqual(logs.records[0].levelname, 'INFO')
+        self.assertEqual(logs.records[0].profile['sql_count'], 2)
+        self.assertEqual(logs.records[0].profile['path'], '/probe/')
+        # nothing is recorded outside a request
+        self.assertIsNone(profiling.current_profile())
+
+    @override_settings(PROFILING_ENABLED=True, PROFILING_SLOW_MS=0, PROFILING_SAMPLE_RATE=0)
+    def test_slow_requests_are_warnings(self):
+        middleware = profiling.ProfilingMiddleware(lambda request: HttpResponse())
+        with self.assertLogs('student_management.profiling', 'WARNING') as logs:
+            middleware(RequestFactory().get('/probe/'))
+        self.assertIn('path=/probe/', logs.output[0])
+
+
+class CampusGeneratorTests(TestCase):
+    def test_friendship_graph_has_a_long_tail(self):
+        user_ids = list(range(1, 501))
+        edges = generate_campus.preferential_attachment(user_ids, 3, random.Random(1))
+        self.assertTrue(all(a != b for a, b in edges))
+        self.assertEqual(len({frozenset(edge) for edge in edges}), len(edges))
+        degrees = collections.Counter(user for edge in edges for user in edge)
+        self.assertEqual(set(degrees), set(user_ids))
+        self.assertGreaterEqual(min(degrees.values()), 3)
+        self.assertGreater(max(degrees.values()), 10 * 3)
+
+    def test_generate_and_flush(self):
+        out = io.StringIO()
+        call_command('generate_campus', users=30, societies=3, communities=2, events=8, posts=10, stdout=out)
+        self.assertIn('Campus generated', out.getvalue())
+        users = User.objects.filter(email__endswith='@campus.test')
+        self.assertEqual(users.count(), 30)
+        self.assertTrue(users.first().check_password(generate_campus.PASSWORD))
+        self.assertEqual(Society.objects.filter(description="A generated society.").count(), 3)
+        self.assertEqual(Event.objects.filter(info="A generated event.").count(), 8)
+        self.assertEqual(Post.objects.count(), 10)
+        self.assertEqual(Comment.objects.count(), sum(Post.objects.values_list('comments_count', flat=True)))
+        self.assertTrue(Friendship.objects.exists())
+
+        call_command('generate_campus', users=5, societies=1, communities=1, events=1, posts=1, flush=True,
+                     stdout=io.StringIO())
+        self.assertEqual(users.count(), 5)
+        self.assertEqual(Event.objects.filter(info="A generated event.").count(), 1)
+
+
+class LoadTestTests(TransactionTestCase):
+    def test_percentile(self):
+        values = [0.1 * i for i in range(1, 101)]
+        self.assertEqual(loadtest.percentile([], 50), 0.0)
+        self.assertAlmostEqual(loadtest.percentile(values, 50), 5.0)
+        self.assertAlmostEqual(loadtest.percentile(values, 99), 9.9)
+        self.assertAlmostEqual(loadtest.percentile(values, 100), 10.0)
+
+    def test_needs_a_generated_campus(self):
+        with self.assertRaisesMessage(CommandError, "Run generate_campus first"):
+            call_command('loadtest', concurrency=2, stdout=io.StringIO())
+
+    def test_reports_every_scenario_it_ran(self):
+        call_command('generate_campus', users=10, societies=2, communities=1, events=10, posts=5, stdout=io.StringIO())
+        out = io.StringIO()
+        # one virtual user: the in-memory test database fails concurrent session writes instead of waiting
+        call_command('loadtest', concurrency=1, requests=6, scenario=['events', 'societies'], stdout=out)
+        rows = {line.split()[0]: line.split()[1:] for line in out.getvalue().splitlines()[2:] if line[:1].isalpha()}
+        self.assertEqual(set(rows), {'events', 'societies', 'total', 'Wall'})
+        self.assertEqual(rows['total'][:2], ['6', '0'])
@@ -1,25 +1,19 @@
-from django.urls import path, include
+from django.urls import path, include, reverse_lazy
+from django.contrib.auth import views as auth_views
 from django.conf import settings
 from django.conf.urls.static import static
 from rest_framework.routers import DefaultRouter
-from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
-
-from . import views
-from .views import (
-    homepage, home, register, login_view, logout_view,
-    events, booked_events, booked, cancel_booking,
-    community, CommunityRequestCreateView,
-    UpdateRequestViewSet, CommunityAdminViewSet, EventAdminViewSet,
-    EventSearchViewSet, CommunitySearchViewSet, PostSearchViewSet,
-    EventRequestCreateView, ProtectedEventsView, profile,
-    send_test_email, search_posts,
-    admin_community_requests, approve_community_request, reject_community_request,
-    join_society, leave_society, join_community, societies_view,
-    AdminSocietyRequestsView, CommentViewSet,
-    add_comment, delete_comment,cancel_membership,
-    friends_page, send_friend_request, accept_friend_request, reject_friend_request, remove_friend
+from rest_framework_simplejwt.views import TokenRefreshView
+
+# HTML views are imported on their first request (see views/__init__.py); the API
+# viewsets are needed up front to build the router, and the notification stream
+# must be seen to be async for Django to run it on the event loop
+from .views import lazy
+from .views.api import (
+    CommentViewSet, CommunityAdminViewSet, CommunitySearchViewSet, EventAdminViewSet, EventSearchViewSet,
+    NotificationViewSet, PostSearchViewSet, ProtectedEventsView, ThrottledTokenObtainPairView, UpdateRequestViewSet,
 )
-from .views import CommentViewSet
+from .views.notifications import notification_stream
 from django.urls import path
 from django.http import HttpResponse
 from django.core.mail import send_mail
@@ -33,6 +27,7 @@ router.register(r'search-events', EventSearchViewSet, basename='search-events')
 router.register(r'search-communities', CommunitySearchViewSet, basename='search-communities')
 router.register(r'search-posts', PostSearchViewSet, basename='search-posts')
 router.register(r'comments', CommentViewSet, basename='comments')
+router.register(r'notifications', NotificationViewSet, basename='notifications')
 
 def test_email(request):
     send_mail(
@@ -46,65 +41,90 @@ def test_email(request):
 
 urlpatterns = [
     # Public and Auth
-    path('', homepage, name='homepage'),
-    path('home/', home, name='home'),
-    path('register/', register, name='register'),
-    path('login/', login_view, name='login'),
-    path('logout/', logout_view, name='logout'),
+    path('', lazy('homepage'), name='homepage'),
+    path('home/', lazy('home'), name='home'),
+    path('register/', lazy('register'), name='register'),
+    path('login/', lazy('login_view'), name='login'),
+    path('logout/', lazy('logout_view'), name='logout'),
 
     # Events
-    path('events/', events, name='events'),
-    path('booked_events/', booked_events, name='booked_events'),
-    path('booked/<int:event_id>/', booked, name='booked'),
-    path('cancel_booking/<int:event_id>/', cancel_booking, name='cancel_booking'),
-    path('request-event/', EventRequestCreateView.as_view(), name='request-event'),
+    path('events/', lazy('events'), name='events'),
+    path('booked_events/', lazy('booked_events'), name='booked_events'),
+    path('booked/<int:event_id>/', lazy('booked'), name='booked'),
+    path('calendar/<str:token>/events.ics', lazy('calendar_feed'), name='calendar_feed'),
+    path('calendar/reset/', lazy('reset_calendar_feed'), name='reset_calendar_feed'),
+    path('cancel_booking/<int:event_id>/', lazy('cancel_booking'), name='cancel_booking'),
+    path('request-event/', lazy('EventRequestCreateView'), name='request-event'),
 
     # Communities
-    path('community/', community, name='community'),
-    path('request-community/', CommunityRequestCreateView.as_view(), name='request-community'),
-    path('join-community/<int:community_id>/', join_community, name='join_community'),
-    path('cancel_community/<int:community_id>/', views.cancel_membership, name='cancel_community'),
+    path('community/', lazy('community'), name='community'),
+    path('request-community/', lazy('CommunityRequestCreateView'), name='request-community'),
+    path('join-community/<int:community_id>/', lazy('join_community'), name='join_community'),
+    path('cancel_community/<int:community_id>/', lazy('cancel_membership'), name='cancel_community'),
 
     # Societies
-    path('societies/', societies_view, name='societies'),
-    path('societies/join/<int:society_id>/', join_society, name='join_society'),
-    path('societies/leave/<int:society_id>/', leave_society, name='leave_society'),
+    path('societies/', lazy('societies_view'), name='societies'),
+    path('societies/join/<int:society_id>/', lazy('join_society'), name='join_society'),
+    path('societies/leave/<int:society_id>/', lazy('leave_society'), name='leave_society'),
 
     # Profile & Updates
-    path('profile/', profile, name='profile'),
-    path('update-request/', views.UpdateRequestCreateView.as_view(), name='update_request'),
+    path('profile/', lazy('profile'), name='profile'),
+    path('update-request/', lazy('UpdateRequestCreateView'), name='update_request'),
 
     # Admin Approvals
-    path('admin/community-requests/', admin_community_requests, name='admin_community_requests'),
-    path('admin/community-requests/<int:request_id>/approve/', approve_community_request, name='approve_community'),
-    path('admin/community-requests/<int:request_id>/reject/', reject_community_request, name='reject_community'),
-    path('admin/update-requests/', views.approve_update_request, name='admin_update_requests'),
-    path('admin/reject-update-request/<int:request_id>/', views.reject_update_request, name='reject_update_request'),
-    path('admin_society_requests/', AdminSocietyRequestsView.as_view(), name='admin_society_requests'),
-    path('admin_society_requests/<int:request_id>/', AdminSocietyRequestsView.as_view(), name='review_society_request'),
+    path('admin/community-requests/', lazy('admin_community_requests'), name='admin_community_requests'),
+    path('admin/community-requests/<int:request_id>/approve/', lazy('approve_community_request'), name='approve_community'),
+    path('admin/community-requests/<int:request_id>/reject/', lazy('reject_community_request'), name='reject_community'),
+    path('admin/update-requests/', lazy('approve_update_request'), name='admin_update_requests'),
+    path('admin/reject-update-request/<int:request_id>/', lazy('reject_update_request'), name='reject_update_request'),
+    path('admin_society_requests/', lazy('AdminSocietyRequestsView'), name='admin_society_requests'),
+    path('admin_society_requests/<int:request_id>/', lazy('AdminSocietyRequestsView'), name='review_society_request'),
+
+    # Imports
+    path('imports/', lazy('import_data'), name='import_data'),
+    path('invite/<uidb64>/<token>/', auth_views.PasswordResetConfirmView.as_view(
+        template_name='student_management/accept_invite.html',
+        success_url=reverse_lazy('login'),
+    ), name='accept_invite'),
+
+    # Exports
+    path('exports/societies/<int:society_id>/members/', lazy('export_society_members'), name='export_society_members'),
+    path('exports/events/<int:event_id>/attendees/', lazy('export_event_attendees'), name='export_event_attendees'),
+    path('exports/requests/<slug:kind>/', lazy('export_request_history'), name='export_request_history'),
 
     # Friends System
-    path('friends/', friends_page, name='friends'),
-    path('friends/send/<int:user_id>/', send_friend_request, name='send_friend_request'),
-    path('friends/accept/<int:request_id>/', accept_friend_request, name='accept_friend_request'),
-    path('friends/reject/<int:request_id>/', reject_friend_request, name='reject_friend_request'),
-    path('friends/remove/<int:user_id>/', remove_friend, name='remove_friend'),
+    path('friends/', lazy('friends_page'), name='friends'),
+    path('friends/send/<int:user_id>/', lazy('send_friend_request'), name='send_friend_request'),
+    path('friends/accept/<int:request_id>/', lazy('accept_friend_request'), name='accept_friend_request'),
+    path('friends/reject/<int:request_id>/', lazy('reject_friend_request'), name='reject_friend_request'),
+    path('friends/remove/<int:user_id>/', lazy('remove_friend'), name='remove_friend'),
+
+    # Notifications
+    path('notifications/stream/', notification_stream, name='notification_stream'),
+    path('notifications/preferences/', lazy('notification_preferences'), name='notification_preferences'),
+
+    # Metrics
+    path('metrics', lazy('metrics_view'), name='metrics'),
 
     # Search
-    path('search-posts/', search_posts, name='search_posts'),
+    path('search-posts/', lazy('search_posts'), name='search_posts'),
 
     # Comments
-    path('add_comment/', add_comment, name='add_comment'),
-    path('comment/<int:comment_id>/delete/', delete_comment, name='delete_comment'),
+    path('add_comment/', lazy('add_comment'), name='add_comment'),
+    path('comment/<int:comment_id>/delete/', lazy('delete_comment'), name='delete_comment'),
+    path('posts/<int:post_id>/comments/', lazy('post_comments'), name='post_comments'),
+
+    # Likes
+    path('posts/<int:post_id>/like/', lazy('like_post'), name='like_post'),
 
     # API Auth
     path('api/', include(router.urls)),
-    path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
+    path('api/token/', ThrottledTokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('api/protected-events/', ProtectedEventsView.as_view(), name='protected_events'),
 
     # Test email
-    path('send-test-email/', send_test_email, name='send_test_email'),
+    path('send-test-email/', lazy('send_test_email'), name='send_test_email'),
 
     path('send-test-email/', test_email),
 ]
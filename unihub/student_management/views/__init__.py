@@ -0,0 +1,93 @@
+import importlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# === Views ===
+# The views are split into one module per feature. urls.py refers to the
+# HTML views through lazy(), so starting a worker (and loading the URLconf)
+# doesn't import every feature module and what they pull in (csv/xlsx
+# exports, image processing, the scheduling index...); each module is
+# imported by the first request that needs it. Importing a view by name from
+# this package still works, it just imports that view's module on access.
+# Workers that warm up while booting (TEMPLATE_WARMUP) import them all up
+# front with import_all() instead.
+
+MODULES = {
+    'accounts': (
+        'homepage', 'register', 'login_view', 'logout_view', 'profile', 'UpdateRequestCreateView',
+    ),
+    'api': (
+        'UpdateRequestViewSet', 'NotificationPagination', 'NotificationViewSet', 'CommunityAdminViewSet',
+        'EventAdminViewSet', 'EventSearchViewSet', 'CommunitySearchViewSet', 'PostSearchViewSet',
+        'ProtectedEventsView', 'ThrottledTokenObtainPairView', 'IsOwnerOrReadOnly', 'CommentViewSet',
+    ),
+    'communities': ('community', 'cancel_membership', 'CommunityRequestCreateView', 'join_community'),
+    'events': (
+        'events', 'EventRequestCreateView', 'booked_events', 'booked', 'cancel_booking', 'calendar_feed',
+        'reset_calendar_feed',
+    ),
+    'feed': ('home', 'search_posts', 'add_comment', 'delete_comment', 'post_comments', 'like_post'),
+    'friends': (
+        'friends', 'send_friend_request', 'accept_friend_request', 'reject_friend_request', 'remove_friend',
+        'friends_page', 'handle_friend_action',
+    ),
+    'notifications': (
+        'create_notification', 'send_test_email', 'send_pretty_email', 'notification_stream',
+        'notification_preferences',
+    ),
+    'societies': ('join_society', 'leave_society', 'societies_view'),
+    'staff': (
+        'admin_community_requests', 'approve_community_request', 'reject_community_request',
+        'approve_update_request', 'reject_update_request', 'AdminSocietyRequestsView', 'admin_update_requests',
+        'invite_url', 'import_data', 'export_response', 'export_society_members', 'export_event_attendees',
+        'export_request_history', 'metrics_view',
+    ),
+}
+VIEW_MODULES = {name: module for module, names in MODULES.items() for name in names}
+
+
+def __getattr__(name):
+    module = VIEW_MODULES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(f'{__name__}.{module}'), name)
+
+
+def __dir__():
+    return sorted(list(globals()) + list(VIEW_MODULES))
+
+
+def import_all():
+    """Import every feature module, so no request pays for the first import. Returns how many imported."""
+    imported = 0
+    for module in MODULES:
+        try:
+            importlib.import_module(f'{__name__}.{module}')
+        except Exception:
+            # the views in it fail with the full error on their first request; the worker still boots
+            logger.exception("View module %s doesn't import", module)
+            continue
+        imported += 1
+    return imported
+
+
+def lazy(name, **initkwargs):
+    """A view function that imports the view ``name`` on its first request.
+
+    Class-based views are turned into a view with ``as_view(**initkwargs)``.
+    """
+    module = f'{__name__}.{VIEW_MODULES[name]}'
+    view = None
+
+    def lazy_view(request, *args, **kwargs):
+        nonlocal view
+        if view is None:
+            target = getattr(importlib.import_module(module), name)
+            view = target.as_view(**initkwargs) if isinstance(target, type) else target
+        return view(request, *args, **kwargs)
+
+    lazy_view.__name__ = lazy_view.__qualname__ = name
+    lazy_view.__module__ = module
+    return lazy_view
@@ -0,0 +1,127 @@
+# Account views: landing page, registration, login and profile
+
+from datetime import datetime
+
+from django.contrib import messages
+from django.contrib.auth import authenticate, get_user_model, login, logout
+from django.contrib.auth.decorators import login_required
+from django.shortcuts import redirect, render
+from django.utils.timezone import now
+from django.views import View
+
+from ..forms import UpdateRequestForm, UserRegisterForm
+from ..images import schedule_processing
+from ..models import UpdateRequest, User
+
+
+def homepage(request):
+    if request.user.is_authenticated:
+        return redirect('home')
+    return render(request, 'student_management/index.html')
+
+
+@login_required
+def profile(request):
+    request.user.refresh_from_db()
+    user = get_user_model().objects.get(pk=request.user.pk)  # Reload from DB
+    return render(request, 'student_management/profile.html', {
+        'user': user,
+        'digest_choices': User.DIGEST_CHOICES,
+    })
+
+
+def register(request):
+    if request.method == 'POST':
+        form = UserRegisterForm(request.POST)
+        if form.is_valid():
+            user = form.save()
+            login(request, user)
+            return redirect('home')
+    else:
+        form = UserRegisterForm()
+    return render(request, 'student_management/register.html', {'form': form})
+
+
+def login_view(request):
+    if request.method == 'POST':
+        email = request.POST['email']
+        password = request.POST['password']
+        user = authenticate(request, email=email, password=password)
+        if user is not None:
+            login(request, user)
+            return redirect('home')
+        else:
+            return render(request, 'student_management/login.html', {'error': 'Invalid email or password'})
+    
+    if 'next' in request.GET:
+        messages.warning(request, "Your session has expired. Please log in again.") #session expired message
+    return render(request, 'student_management/login.html')
+
+
+def logout_view(request):
+    logout(request)
+    return redirect('homepage')
+
+
+class UpdateRequestCreateView(View):
+    def get(self, request):
+        form = UpdateRequestForm()
+        return render(request, 'student_management/update_request.html', {'form': form})
+
+    def post(self, request):
+        form = UpdateRequestForm(request.POST, request.FILES)
+        if form.is_valid():
+            user = request.user
+            field = form.cleaned_data['field_to_update'].lower()
+            new_value = form.cleaned_data.get('new_value', '')
+            profile_picture = request.FILES.get('profile_picture')
+            date_value = request.POST.get('date_value')
+
+            # Safely get old value from user
+            old_value = getattr(user, field, '') if hasattr(user, field) else ''
+
+            try:
+                if field == 'profile_picture' and profile_picture:
+                    update_request = UpdateRequest.objects.create(
+                        user=user,
+                        field_to_update=field,
+                        old_value=str(old_value),
+                        new_value='',
+                        profile_picture=profile_picture,
+                        status='pending',
+                        created_at=now()
+                    )
+                    # validation, metadata stripping and thumbnails happen off the request path
+                    schedule_processing(update_request)
+                elif field == 'date_of_birth' and date_value:
+                    try:
+                        parsed_date = datetime.strptime(date_value, "%Y-%m-%d").date()
+                        update_request = UpdateRequest.objects.create(
+                            user=user,
+                            field_to_update=field,
+                            old_value=str(old_value),
+                            new_value=parsed_date.strftime("%Y-%m-%d"),
+                            status='pending',
+                            created_at=now()
+                        )
+                    except ValueError:
+                        messages.error(request, "⚠️ Invalid date format. Please use YYYY-MM-DD.")
+                        return render(request, 'student_management/update_request.html', {'form': form})
+                else:
+                    update_request = UpdateRequest.objects.create(
+                        user=user,
+                        field_to_update=field,
+                        old_value=str(old_value),
+                        new_value=new_value,
+                        status='pending',
+                        created_at=now()
+                    )
+
+                messages.success(request, "✅ Your update request has been submitted.")
+                return redirect('home')
+
+            except Exception as e:
+                messages.error(request, f"❌ Something went wrong: {str(e)}")
+                return render(request, 'student_management/update_request.html', {'form': form})
+
+        return render(request, 'student_management/update_request.html', {'form': form})
@@ -0,0 +1,179 @@
+# REST API views
+
+from django.db import transaction
+
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework import filters, permissions, viewsets
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.decorators import action
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.views import TokenObtainPairView
+
+from .. import events as event_listing, posts as post_actions, scheduling
+from ..images import schedule_processing
+from ..models import Comment, Community, Event, Notification, Post, UpdateRequest
+from ..notifications import mark_read as mark_notifications_read, unread_count
+from ..serializers import (
+    CommentSerializer,
+    CommunitySerializer,
+    EventSerializer,
+    MarkReadSerializer,
+    NotificationSerializer,
+    PostSerializer,
+    UpdateRequestSerializer,
+)
+
+
+class UpdateRequestViewSet(viewsets.ModelViewSet):
+    queryset = UpdateRequest.objects.all()
+    serializer_class = UpdateRequestSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        if self.request.user.is_staff:
+            return UpdateRequest.objects.all()
+        return UpdateRequest.objects.filter(user=self.request.user)
+
+    def perform_create(self, serializer):
+        update_request = serializer.save(user=self.request.user)
+        if update_request.profile_picture:
+            schedule_processing(update_request)
+
+
+class NotificationPagination(PageNumberPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
+    serializer_class = NotificationSerializer
+    permission_classes = [IsAuthenticated]
+    # session auth too, so the home page can mark notifications as read
+    authentication_classes = [JWTAuthentication, SessionAuthentication]
+    pagination_class = NotificationPagination
+
+    def get_queryset(self):
+        notifications = Notification.objects.filter(user=self.request.user).order_by('-created_at')
+        if self.request.query_params.get('unread') == 'true':
+            notifications = notifications.filter(is_read=False)
+        return notifications
+
+    @action(detail=False, methods=['get'])
+    def unread_count(self, request):
+        return Response({'unread_count': unread_count(request.user.pk)})
+
+    @action(detail=False, methods=['post'])
+    def mark_read(self, request):
+        serializer = MarkReadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        updated = mark_notifications_read(request.user, serializer.validated_data.get('ids'))
+        return Response({'marked_read': updated, 'unread_count': unread_count(request.user.pk)})
+
+
+class CommunityAdminViewSet(viewsets.ModelViewSet):
+    queryset = Community.objects.all()
+    serializer_class = CommunitySerializer
+    permission_classes = [IsAdminUser]
+
+    @action(detail=True, methods=['post'])
+    def approve(self, request, pk=None):
+        community = self.get_object()
+        community.is_approved = True
+        community.save()
+        event_listing.invalidate_filter_choices()
+        return Response({'status': 'approved'})
+    @action(detail=True, methods=['post'])
+    def reject(self, request, pk=None):
+        community = self.get_object()
+        community.is_approved = False
+        community.save()
+        event_listing.invalidate_filter_choices()
+        return Response({'status': 'rejected'})
+
+
+class EventAdminViewSet(viewsets.ModelViewSet):
+    queryset = Event.objects.all()
+    serializer_class = EventSerializer
+    permission_classes = [IsAdminUser]
+
+    @action(detail=True, methods=['post'])
+    def approve(self, request, pk=None):
+        event = self.get_object()
+        clashes = scheduling.approve_event(event)
+        if clashes:
+            return Response(
+                {'error': "Venue already booked.", 'conflicts': [clash.event_id for clash in clashes]}, status=409,
+            )
+        return Response({'status': 'approved'})
+
+    @action(detail=True, methods=['post'])
+    def reject(self, request, pk=None):
+        event = self.get_object()
+        event.is_approved = False
+        event.save()
+        return Response({'status': 'rejected'})
+
+
+class EventSearchViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = Event.objects.filter(is_approved=True).order_by('start_time')
+    serializer_class = EventSerializer
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    filterset_fields = ['location_type', 'start_time']
+    search_fields = ['event_name', 'info']
+
+
+class CommunitySearchViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = Community.objects.filter(is_approved=True)
+    serializer_class = CommunitySerializer
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
+    search_fields = ['community_name', 'description']
+
+
+class PostSearchViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = Post.objects.filter(visibility='public')
+    serializer_class = PostSerializer
+    filter_backends = [filters.SearchFilter]
+    search_fields = ['content', 'user__first_name', 'user__last_name', 'timestamp']
+
+
+class ProtectedEventsView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        events = Event.objects.all()
+        serializer = EventSerializer(events, many=True)
+        return Response(serializer.data)
+
+
+class ThrottledTokenObtainPairView(TokenObtainPairView):
+    # password guessing: a much smaller budget than the rest of the API, per IP
+    throttle_scope = 'token'
+
+
+class IsOwnerOrReadOnly(permissions.BasePermission):
+    def has_object_permission(self, request, view, obj):
+        # Allow read-only for GET, HEAD, OPTIONS
+        if request.method in permissions.SAFE_METHODS:
+            return True
+        # Allow write/delete only if user is the comment owner
+        return obj.user == request.user
+
+
+class CommentViewSet(viewsets.ModelViewSet):
+    queryset = Comment.objects.all()
+    serializer_class = CommentSerializer
+    permission_classes = [IsOwnerOrReadOnly]
+
+    def perform_create(self, serializer):
+        # keep Post.comments_count in step with the new row
+        with transaction.atomic():
+            comment = serializer.save()
+            post_actions.comment_created(comment)
+
+    def perform_destroy(self, instance):
+        post_actions.delete_comment(instance)
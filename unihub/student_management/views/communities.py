@@ -0,0 +1,106 @@
+# Community views: listing, requests and membership
+
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.paginator import Paginator
+from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse_lazy
+from django.views.generic import CreateView
+
+from .. import communities
+from ..forms import CommunityForm
+from ..models import Community, CommunityMembership, CommunityRequest
+from .notifications import create_notification
+
+
+@login_required
+def community(request):
+    #filters and searches for communities
+    search_query = request.GET.get('search', '')
+    filter_option = request.GET.get('filter', '')
+    requests_status = request.GET.get('status', '')
+
+    # one annotated queryset: leader, member count, membership and interests per community
+    paginator = Paginator(
+        communities.listing(request.user, search_query, filter_option),
+        getattr(settings, 'COMMUNITIES_PER_PAGE', 24),
+    )
+    page = paginator.get_page(request.GET.get('page'))
+
+    # communities without interests of their own show the ones from their approved request
+    request_interests = None
+    for item in page:
+        item.display_interests = [interest.interest_name for interest in item.interests.all()]
+        if not item.display_interests:
+            if request_interests is None:
+                request_interests = communities.approved_request_interests()
+            item.display_interests = request_interests.get(item.community_name, [])
+
+    #added the filter for my requests for specific users so they can easily find it and cancel it
+    community_requests = []
+    if filter_option == 'my_requests':
+        community_requests = communities.user_requests(request.user, search_query, requests_status)
+
+    #RENDER THIS IN THE HTML 
+    return render(request, 'student_management/community.html', {
+        'communities': page,
+        'page': page,
+        'community_requests': community_requests,
+        'query': search_query,
+        'filter_option': filter_option,
+        'requests_status': requests_status,
+    })
+
+
+def cancel_membership(request, community_id):
+    community = get_object_or_404(Community, pk=community_id)
+    membership = CommunityMembership.objects.filter(user=request.user, community=community).first() 
+    
+    if membership:
+        membership.delete()
+        messages.success(request, f"You have left the community '{community.community_name}'.")
+    else:
+        messages.info(request, "You are not a member of this community.")
+    
+    return redirect('community')
+
+
+class CommunityRequestCreateView(LoginRequiredMixin, CreateView):
+    model = CommunityRequest
+    form_class = CommunityForm
+    template_name = 'student_management/community_form.html'
+    success_url = reverse_lazy('community')
+
+    def form_valid(self, form):
+        form.instance.requester = self.request.user
+        response = super().form_valid(form)
+        
+        create_notification(
+            self.request.user,
+            f"Your community creation request for '{form.instance.community_name}' has been submitted and is pending approval.",
+            'info'
+        )
+
+        messages.success(self.request, "Your request has been submitted!")
+        return response
+
+
+@login_required
+def join_community(request, community_id):
+    community = get_object_or_404(Community, community_id=community_id, is_approved=True)
+    already_member = CommunityMembership.objects.filter(user=request.user, community=community).exists()
+
+    if not already_member:
+        CommunityMembership.objects.create(user=request.user, community=community)
+        messages.success(request, f"You joined {community.community_name} 🎉")
+        
+        # Create a notification for the user when they join a community
+        create_notification(request.user, f"You successfully joined the community '{community.community_name}'!", 'success')
+
+        
+    else:
+        messages.info(request, f"You're already a member of {community.community_name}")
+    
+    return redirect('community')
@@ -0,0 +1,187 @@
+# Event views: listing, requests, bookings and calendar feeds
+
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.http import Http404, HttpResponse
+from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse, reverse_lazy
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.views.decorators.http import require_POST
+from django.views.generic import CreateView
+
+from .. import archive, events as event_listing, ical, scheduling
+from ..forms import EventForm
+from ..metrics import BOOKINGS, CALENDAR_FEEDS, CANCELLATIONS
+from ..models import Event, EventDetails
+from ..ratelimit import ratelimit
+from .notifications import create_notification
+
+
+@login_required
+def events(request):
+    #filters and searches for events
+    query = request.GET.get('search', '')
+    filter_option = request.GET.get('filter', '')
+    society_filter = request.GET.get('society', '')
+    community_filter = request.GET.get('community', '')
+    # ids come straight from the dropdowns, ignore anything else
+    society_filter = society_filter if society_filter.isdigit() else ''
+    community_filter = community_filter if community_filter.isdigit() else ''
+
+    # one query for the page: booking counts, fullness and the user's own booking are annotated
+    listing = event_listing.listing(request.user, query, filter_option, society_filter, community_filter)
+    page = Paginator(listing, getattr(settings, 'EVENTS_PER_PAGE', 20)).get_page(request.GET.get('page'))
+    for event in page:
+        event.spots_left = event_listing.spots_left(event)
+
+    # dropdown options, cached
+    choices = event_listing.filter_choices()
+
+    return render(request, 'student_management/event.html', {
+        'events': page,
+        'page': page,
+        'query': query,
+        'filter_option': filter_option,
+        'society_filter': society_filter,
+        'community_filter': community_filter,
+        'societies': choices['societies'],
+        'communities': choices['communities'],
+        'booked_event_ids': {event.event_id for event in page if event.is_booked_by_me},
+    })
+
+
+class EventRequestCreateView(LoginRequiredMixin, CreateView):
+    #event form 
+    model = Event
+    form_class = EventForm
+    template_name = 'student_management/event_form.html'
+    success_url = reverse_lazy('events')
+
+    def form_valid(self, form):
+        form.instance.requester = self.request.user
+        response = super().form_valid(form)
+        # Create a notification for the user
+        create_notification(
+            self.request.user,
+            f"Your event request for '{form.instance.event_name}' has been submitted and is awaiting approval.",
+            'info'
+        )
+
+        messages.success(self.request, f"Your event request '{form.instance.event_name}' has been submitted!")
+        return response
+
+
+@login_required
+def booked_events(request):
+    booked = EventDetails.objects.filter(
+        #filters booked events for the user
+        #also shows bookings that are still active 
+        user_id=request.user.user_id,can_book=True,event__start_time__gte=timezone.now()  
+    ).select_related('event').order_by('event__start_time') #sorts by start time
+    
+    # private calendar subscription links, so the schedule doesn't have to be checked here
+    feed_url = request.build_absolute_uri(reverse('calendar_feed', args=[ical.feed_token(request.user)]))
+    #render the booked events in html
+    return render(request, "student_management/booked_event.html", {
+        'booked': booked,
+        # finished events, read through the archive
+        'past_events': archive.past_bookings(request.user, getattr(settings, 'BOOKING_HISTORY_LIMIT', 20)),
+        'calendar_url': feed_url,
+        'joined_calendar_url': f"{feed_url}?scope=joined",
+    })
+
+
+@login_required
+@ratelimit('booking', methods=None)  # booking links are plain GETs
+def booked(request, event_id):
+    user = request.user
+    # the checks below and the booking itself happen with the event and the user locked
+    with transaction.atomic():
+        event = scheduling.lock_for_booking(user, event_id)
+        if event is None:
+            raise Http404("No such event.")
+
+        #counts how many ppl booked the event
+        current_bookings = EventDetails.objects.filter(event=event, can_book=True).count()
+        #checks if the event is fully booked 
+        if event.maximum_capacity is not None and current_bookings >= event.maximum_capacity:
+            BOOKINGS.inc(outcome='full')
+            messages.error(request, f"⚠️ Sorry, '{event.event_name}' is fully booked.")
+            return redirect('events')
+
+        #checks if the user already booked the event
+        if not EventDetails.objects.filter(event=event, user=user, can_book=True).exists():
+            #checks the user isn't booked on something else at the same time
+            clashes = scheduling.booking_conflicts(user, event)
+            if clashes:
+                BOOKINGS.inc(outcome='conflict')
+                messages.error(request, f"⚠️ '{event.event_name}' overlaps with {scheduling.describe(clashes)}, which you already booked.")
+                return redirect('events')
+            EventDetails.objects.create(event=event, user=user) #adds entry to the EventDetails table
+            BOOKINGS.inc(outcome='booked')
+            #creates a notification for the user when they book an event
+            create_notification(user, f"You booked the event '{event.event_name}'!", 'success')
+            messages.success(request, f"✅ You have successfully booked '{event.event_name}'!")
+        else:
+            BOOKINGS.inc(outcome='already_booked')
+            messages.info(request, f"ℹ️ You already booked '{event.event_name}'.")
+    
+    return redirect('events')
+
+
+@login_required
+def cancel_booking(request, event_id):
+    event = get_object_or_404(Event, event_id=event_id)
+    user = request.user
+    #gets the booking entry for the user and event
+    booking = EventDetails.objects.filter(event=event, user=user, can_book=True).first()
+    if booking: #checks if the booking exists
+        booking.can_book = False #sets the booking to false
+        booking.save() #saves the changes to the database
+        CANCELLATIONS.inc(outcome='cancelled')
+        #creates a notification for the user when they cancel a booking
+        create_notification(user, f"You canceled booking for '{event.event_name}'.", 'info')
+        messages.success(request, f"You canceled your booking for '{event.event_name}'.")
+    else:
+        CANCELLATIONS.inc(outcome='not_booked')
+        messages.error(request, "You don't have a booking for this event.")
+
+    return redirect('booked_events')
+
+
+def calendar_feed(request, token):
+    # polled by calendar apps: the signed token stands in for a login
+    user = ical.user_from_token(token)
+    if user is None:
+        raise Http404("Unknown calendar.")
+    scope = request.GET.get('scope', 'booked')
+    if scope not in ical.SCOPES:
+        scope = 'booked'
+
+    feed = ical.Feed(user.user_id, scope)
+    # no Last-Modified: an event leaving the feed doesn't move any timestamp
+    # still in it, so If-Modified-Since would keep answering 304
+    response = get_conditional_response(request, etag=feed.etag)
+    if response is None:
+        CALENDAR_FEEDS.inc(outcome='rendered')
+        response = HttpResponse(feed.render(), content_type='text/calendar; charset=utf-8')
+        response['Content-Disposition'] = 'inline; filename="unihub.ics"'
+    else:
+        CALENDAR_FEEDS.inc(outcome='not_modified')
+    response['ETag'] = feed.etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+@login_required
+@require_POST
+def reset_calendar_feed(request):
+    # for a calendar link that got out: the old URLs stop working, the page shows new ones
+    ical.reset_feed_key(request.user)
+    messages.success(request, "Your calendar links have been reset. Subscribe again with the new ones.")
+    return redirect('booked_events')
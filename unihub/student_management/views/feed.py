@@ -0,0 +1,198 @@
+# Home feed views: posts, search, comments and likes
+
+import logging
+from datetime import datetime
+
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.http import HttpResponseForbidden, JsonResponse
+from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
+from django.utils.timezone import make_aware
+from django.views.decorators.http import require_POST
+
+from .. import posts as post_actions
+from ..metrics import FEED_QUERY_SECONDS
+from ..models import Comment, CommunityMembership, Notification, Post, PostLike, UpdateRequest
+from ..notifications import unread_count
+from ..ratelimit import ratelimit
+from .notifications import create_notification
+
+logger = logging.getLogger(__name__)
+
+
+@login_required
+@ratelimit('post')
+def home(request):
+    request.user.refresh_from_db()
+    
+    if request.method == 'POST':
+        content = request.POST.get('post_content')
+        visibility = request.POST.get('visibility', 'public')
+        if content:
+            Post.objects.create(user=request.user, content=content, visibility=visibility)
+            create_notification(request.user, "Your post has been successfully created!", 'success')
+            messages.success(request, "✅ Your post has been created successfully!")
+            return redirect('home')
+
+    latest_update = UpdateRequest.objects.filter(user=request.user).order_by('-created_at').first()
+    friends = request.user.friends.all()
+
+    joined_communities = CommunityMembership.objects.filter(user=request.user).select_related('community')
+    joined_societies = request.user.joined_societies.all()
+    notifications = Notification.objects.filter(user=request.user).order_by('-created_at')[:5]
+
+    # One page of the feed, each post with only its latest few comments
+    posts = post_actions.visible_posts(request.user).select_related('user').prefetch_related(
+        post_actions.latest_comments()
+    ).order_by('-timestamp')
+    paginator = Paginator(posts, getattr(settings, 'HOME_POSTS_PER_PAGE', 20))
+    with FEED_QUERY_SECONDS.time(view='home'):
+        page = paginator.get_page(request.GET.get('page'))
+        posts = list(page)
+    liked_post_ids = set(
+        PostLike.objects.filter(user=request.user, post__in=[post.post_id for post in posts]).values_list('post_id', flat=True)
+    )
+
+    return render(request, 'student_management/home.html', {
+        'user': request.user,  
+        'posts': posts,
+        'latest_update': latest_update,
+        'friends': friends,
+        'joined_communities': [m.community for m in joined_communities],
+        'joined_societies': joined_societies,
+        'notifications': notifications,
+        'unread_count': unread_count(request.user.pk),
+        'liked_post_ids': liked_post_ids,
+        'page': page,
+    })
+
+
+@login_required
+def search_posts(request):
+    query = request.GET.get('search', '').strip()
+    sort = request.GET.get('sort')
+    posts = Post.objects.filter(visibility='public').select_related('user')
+
+    if query:
+        parsed_date = None
+        today_year = datetime.now().year
+        date_formats = ["%d/%m", "%d-%m", "%d/%m/%Y", "%Y-%m-%d", "%d %b %Y", "%d %B %Y"]
+
+        for fmt in date_formats:
+            try:
+                parsed_date = datetime.strptime(query, fmt)
+                if "%Y" not in fmt:
+                    parsed_date = parsed_date.replace(year=today_year)
+                parsed_date = make_aware(parsed_date)
+                break
+            except ValueError:
+                continue
+
+        if parsed_date:
+            posts = posts.filter(timestamp__date=parsed_date.date())
+        else:
+            posts = posts.filter(
+                Q(content__icontains=query) |
+                Q(user__first_name__icontains=query) |
+                Q(user__last_name__icontains=query) |
+                Q(user__email__icontains=query) |
+                Q(timestamp__icontains=query) |
+                Q(likes__icontains=query) |
+                Q(comments_count__icontains=query)
+            )
+
+    if sort == 'oldest':
+        posts = posts.order_by('timestamp')
+    else:
+        posts = posts.order_by('-timestamp')
+    with FEED_QUERY_SECONDS.time(view='search_posts'):
+        posts = list(posts)
+
+    return render(request, 'student_management/search_posts.html', {
+        'posts': posts,
+        'query': query,
+        'sort': sort
+    })
+
+
+@require_POST
+@login_required
+@ratelimit('comment')
+def add_comment(request):
+    logger.debug("add_comment POST for post %s by user %s", request.POST.get("post_id"), request.user.pk)
+    
+    post_id = request.POST.get("post_id")
+    comment_text = request.POST.get("comment_text")
+
+    if post_id and comment_text:
+        try:
+            post = Post.objects.get(post_id=post_id)
+            post_actions.create_comment(post, request.user, comment_text)
+            messages.success(request, "✅ Your comment was posted.")
+        except Post.DoesNotExist:
+            messages.error(request, "Post not found.")
+    else:
+        messages.error(request, "Invalid form submission.")
+
+    return redirect("home")
+
+
+@login_required
+@require_POST
+def delete_comment(request, comment_id):
+    comment = get_object_or_404(Comment, pk=comment_id)
+    if comment.user != request.user:
+        return HttpResponseForbidden("You can't delete someone else's comment.")
+    post_actions.delete_comment(comment)
+    messages.success(request, "Your comment was deleted.")
+    return redirect('home')
+
+
+@login_required
+def post_comments(request, post_id):
+    # "load more comments": older comments of a post, one page at a time
+    post = get_object_or_404(post_actions.visible_posts(request.user), post_id=post_id)
+    before = None
+    if request.GET.get('before', '').isdigit():
+        before = get_object_or_404(Comment, pk=request.GET['before'], post=post)
+    try:
+        limit = int(request.GET.get('limit', 0))
+    except ValueError:
+        limit = 0
+    # 0, negative or missing: the default page size
+    limit = max(1, min(limit, 100)) if limit > 0 else None
+    comments, has_more = post_actions.comments_before(post, before, limit)
+    return JsonResponse({
+        'comments': [
+            {
+                'id': comment.id,
+                'user': f"{comment.user.first_name} {comment.user.last_name}",
+                'comment_text': comment.comment_text,
+                'created_at': comment.created_at.isoformat(),
+                'delete_url': reverse('delete_comment', args=[comment.id]) if comment.user_id == request.user.pk else None,
+            }
+            for comment in comments
+        ],
+        'has_more': has_more,
+    })
+
+
+@login_required
+@require_POST
+def like_post(request, post_id):
+    post = get_object_or_404(Post, post_id=post_id)
+    if request.POST.get('action') == 'unlike':
+        post_actions.unlike_post(post, request.user)
+        liked = False
+    else:
+        post_actions.like_post(post, request.user)
+        liked = True
+
+    if request.headers.get('Accept') == 'application/json':
+        post.refresh_from_db(fields=['likes'])
+        return JsonResponse({'liked': liked, 'likes': post.likes})
+    return redirect('home')
@@ -0,0 +1,117 @@
+# Friends views
+
+from django.contrib.auth.decorators import login_required
+from django.db.models import Count, Q
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404, redirect, render
+from django.views.decorators.http import require_POST
+
+from ..models import FriendRequest, Friendship, User
+from ..ratelimit import ratelimit
+
+
+def friends(request):
+    friends = User.objects.exclude(user_id=request.user.user_id)
+    return render(request, 'student_management/friends.html', {'friends': friends})
+
+
+@login_required
+@require_POST
+@ratelimit('friend-request')
+def send_friend_request(request, user_id):
+    to_user = get_object_or_404(User, user_id=user_id)
+    if to_user != request.user and not FriendRequest.objects.filter(from_user=request.user, to_user=to_user, status='pending').exists():
+        FriendRequest.objects.create(from_user=request.user, to_user=to_user)
+
+
+    return redirect('friends')
+
+
+@login_required
+@require_POST
+def accept_friend_request(request, request_id):
+    fr = get_object_or_404(FriendRequest, id=request_id, to_user=request.user)
+    fr.status = 'accepted'
+    fr.save()
+
+    # Add to User.friends field (symmetrical)
+    request.user.friends.add(fr.from_user)
+    fr.from_user.friends.add(request.user)
+
+    # Optionally keep Friendship objects if you want
+    Friendship.objects.get_or_create(user=request.user, friend=fr.from_user)
+    Friendship.objects.get_or_create(user=fr.from_user, friend=request.user)
+
+    return redirect('friends')
+
+
+@login_required
+@require_POST
+def reject_friend_request(request, request_id):
+    fr = get_object_or_404(FriendRequest, id=request_id, to_user=request.user)
+    fr.status = 'rejected'
+    fr.save()
+    return redirect('friends')
+
+
+@login_required
+@require_POST
+def remove_friend(request, user_id):
+    friend = get_object_or_404(User, user_id=user_id)
+
+    # Remove from User.friends field (symmetrical)
+    request.user.friends.remove(friend)
+    friend.friends.remove(request.user)
+
+    # Optional: remove Friendship objects
+    Friendship.objects.filter(user=request.user, friend=friend).delete()
+    Friendship.objects.filter(user=friend, friend=request.user).delete()
+
+    return redirect('friends')
+
+
+@login_required
+def friends_page(request):
+    user = request.user
+    sent_requests = FriendRequest.objects.filter(from_user=user, status='pending')
+    received_requests = FriendRequest.objects.filter(to_user=user, status='pending')
+    friends = Friendship.objects.filter(user=user).select_related('friend')
+
+    mutual_friends = {}
+    your_friends = set(friends.values_list('friend_id', flat=True))
+    for f in friends:
+        their_friends = set(Friendship.objects.filter(user=f.friend).values_list('friend_id', flat=True))
+        shared = their_friends.intersection(your_friends)
+        mutual_friends[f.friend.user_id] = User.objects.filter(user_id__in=shared)
+
+    shared_interests = user.interests.all()
+    potential_users = User.objects.exclude(user_id=user.user_id).exclude(friendships__friend=user)
+    suggestions = potential_users.annotate(shared_count=Count('interests')).order_by('-shared_count')[:5]
+
+    search = request.GET.get('search', '')
+    if search:
+        friends = friends.filter(Q(friend__first_name__icontains=search) | Q(friend__last_name__icontains=search))
+
+    sort = request.GET.get('sort', '')
+    if sort == 'name':
+        friends = friends.order_by('friend__first_name')
+    elif sort == 'recent':
+        friends = friends.order_by('-created_at')
+    sent_to_ids = list(sent_requests.values_list('to_user__user_id', flat=True))
+
+
+    return render(request, 'student_management/friends.html', {
+        'friends': friends,
+        'sent_requests': sent_requests,
+        'received_requests': received_requests,
+        'mutual_friends': mutual_friends,
+        'suggestions': suggestions,
+        'search': search,
+        'sort': sort,
+        'sent_to_ids': sent_to_ids,  
+    })
+
+
+@require_POST
+def handle_friend_action(request, action, user_id):
+    return JsonResponse({'message': 'Friend action placeholder!'})
@@ -1,62 +1,32 @@
-# Django Core
-from django.shortcuts import render, redirect, get_object_or_404
-from django.contrib import messages
-from django.urls import reverse_lazy
-
-# Auth
-from django.contrib.auth import login, authenticate, logout
-from django.contrib.auth.decorators import login_required
-from django.contrib.auth.mixins import LoginRequiredMixin
-
-# Forms & Models
-from .forms import UserRegisterForm, CommunityForm, UpdateRequestForm, EventForm, JoinSocietyForm
-from .models import (
-    Event, EventDetails, User, CommunityRequest, UpdateRequest,
-    Community, Post, Society, CommunityMembership, Interest,
-    SocietyJoinRequest, Notification, Comment, FriendRequest, Friendship
-)
+# Notification views: creating and emailing notifications, the live stream and preferences
 
-# REST Framework
-from rest_framework import viewsets, filters
-from rest_framework.decorators import action
-from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated, IsAdminUser
-from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.views import APIView
+import asyncio
+import time
 
-# Serializers
-from .serializers import (
-    UpdateRequestSerializer, CommunitySerializer, EventSerializer, PostSerializer
-)
-
-# Django Tools
-from django.utils import timezone
-from django.db.models import Q, Count, Prefetch
-from django.views.generic import CreateView
-from django.views import View
-from django.views.decorators.http import require_POST
-from django.contrib.admin.views.decorators import staff_member_required
-from django.utils.decorators import method_decorator
-from django.http import HttpResponse, JsonResponse
 from django.conf import settings
-from django.utils.timezone import make_aware
-from datetime import datetime
-from itertools import chain
-import random
-from django.contrib.auth import get_user_model
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.core.handlers.asgi import ASGIRequest
 from django.core.mail import send_mail
+from django.http import HttpResponse, StreamingHttpResponse
+from django.shortcuts import redirect
+from django.views.decorators.http import require_POST
 
-from django.views import View
-from django.utils.timezone import now
-from django.contrib import messages
-from django.shortcuts import render, redirect
-from datetime import datetime
-from .forms import UpdateRequestForm
-from .models import UpdateRequest
+from asgiref.sync import sync_to_async
+
+from ..digests import queue_for_digest
+from ..metrics import EMAIL_SEND_SECONDS, EMAILS, NOTIFICATIONS
+from ..models import User
+from ..notifications import format_event, get_broker, save_notification, unread_count
 
-# Notifications and Email
 
 def create_notification(user, message, notification_type='info'):
+    # Users on an hourly/daily digest get this later as part of one email
+    if queue_for_digest(user, message, notification_type):
+        NOTIFICATIONS.inc(type=notification_type, delivery='digest')
+        return
+    NOTIFICATIONS.inc(type=notification_type, delivery='immediate')
+
     subject_prefix = {
         'success': '🎉 Success!',
         'info': 'ℹ️ Info',
@@ -65,16 +35,13 @@ def create_notification(user, message, notification_type='info'):
     }
     subject = f"[UWE Hub] {subject_prefix.get(notification_type, 'Notification')}"
 
-    # Save notification in database
-    Notification.objects.create(
-        user=user,
-        message=message,
-        notification_type=notification_type,
-    )
+    # Save notification in database and push it to connected clients
+    save_notification(user, message, notification_type)
 
     # Send pretty HTML email
     send_pretty_email(user, subject, message)
 
+
 @login_required
 def send_test_email(request):
     subject = "🎉 Welcome to UWE Hub!"
@@ -105,7 +72,6 @@ def send_test_email(request):
     return HttpResponse(f"✅ Pretty email sent to {recipient}")
 
 
-
 def send_pretty_email(user, subject, message):
     # Hardcode your local domain and image path
     domain = "localhost:8000"
@@ -133,1000 +99,68 @@ def send_pretty_email(user, subject, message):
         </div>
     </div>
     """
-    send_mail(
-        subject=subject,
-        message="This is a plain-text fallback for non-HTML clients.",
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        recipient_list=[user.email],
-        html_message=html_content,
-        fail_silently=False,
-    )
-    
-    # if not settings.DEBUG:
-    #     try:
-    #         send_mail(
-    #             subject=subject,
-    #             message="This is a plain-text fallback for non-HTML clients.",
-    #             from_email=settings.DEFAULT_FROM_EMAIL,
-    #             recipient_list=[user.email],
-    #             html_message=html_content,
-    #             fail_silently=False,
-    #         )
-    #     except Exception as e:
-    #         print(f"[Email Error] Failed to send email to {user.email}: {e}")
-    # else:
-    #     print(f"[EMAIL MOCK] To: {user.email} | Subject: {subject} | Message: {message}")
-
-
-# Home Views
-
-def homepage(request):
-    if request.user.is_authenticated:
-        return redirect('home')
-    return render(request, 'student_management/index.html')
-
-@login_required
-def home(request):
-    from django.contrib.auth import get_user_model
-    request.user.refresh_from_db()
-    user = get_user_model().objects.get(pk=request.user.pk)
-    
-    if request.method == 'POST':
-        content = request.POST.get('post_content')
-        visibility = request.POST.get('visibility', 'public')
-        if content:
-            Post.objects.create(user=request.user, content=content, visibility=visibility)
-            create_notification(request.user, "Your post has been successfully created!", 'success')
-            messages.success(request, "✅ Your post has been created successfully!")
-            return redirect('home')
-
-    latest_update = UpdateRequest.objects.filter(user=request.user).order_by('-created_at').first()
-    friends = request.user.friends.all()
-
-    joined_communities = CommunityMembership.objects.filter(user=request.user).select_related('community')
-    joined_societies = request.user.joined_societies.all()
-    notifications = Notification.objects.filter(user=request.user).order_by('-created_at')[:5]
-
-    # Get IDs for filtering
-    joined_community_ids = [m.community_id for m in joined_communities]
-
-    visibility_filter = (
-        Q(user=request.user)|
-        Q(visibility='public') |
-        Q(visibility='friends', user__in=friends) |
-        Q(visibility='community', user__communitymembership__community_id__in=joined_community_ids) |
-        Q(visibility='club', user__joined_societies__in=joined_societies)
-    )
-
-    posts = Post.objects.select_related('user').prefetch_related(
-        Prefetch('comment_set', queryset=Comment.objects.select_related('user'))
-    ).filter(visibility_filter).distinct().order_by('-timestamp')
-
-    return render(request, 'student_management/home.html', {
-        'user': request.user,  
-        'posts': posts,
-        'latest_update': latest_update,
-        'friends': friends,
-        'joined_communities': [m.community for m in joined_communities],
-        'joined_societies': joined_societies,
-        'notifications': notifications,
-    })
-
-
-@login_required
-def profile(request):
-    from django.contrib.auth import get_user_model
-    request.user.refresh_from_db()
-    user = get_user_model().objects.get(pk=request.user.pk)  # Reload from DB
-    return render(request, 'student_management/profile.html', {'user': user})
-
-    
-# Authentication Views
-
-def register(request):
-    if request.method == 'POST':
-        form = UserRegisterForm(request.POST)
-        if form.is_valid():
-            user = form.save()
-            login(request, user)
-            return redirect('home')
-    else:
-        form = UserRegisterForm()
-    return render(request, 'student_management/register.html', {'form': form})
-
-def login_view(request):
-    if request.method == 'POST':
-        email = request.POST['email']
-        password = request.POST['password']
-        user = authenticate(request, email=email, password=password)
-        if user is not None:
-            login(request, user)
-            return redirect('home')
-        else:
-            return render(request, 'student_management/login.html', {'error': 'Invalid email or password'})
-    
-    if 'next' in request.GET:
-        messages.warning(request, "Your session has expired. Please log in again.") #session expired message
-    return render(request, 'student_management/login.html')
-
-def logout_view(request):
-    logout(request)
-    return redirect('homepage')
-
-
-
-# Event Views
-
-@login_required
-def events(request):
-    #filters and searches for events
-    query = request.GET.get('search', '')
-    filter_option = request.GET.get('filter', '')
-    society_filter = request.GET.get('society', '')
-    community_filter = request.GET.get('community', '')
-    # Get the list of approved communities, community requests and societies
-    approved_communities = Community.objects.filter(is_approved=True)
-    community_requests = CommunityRequest.objects.filter(status='approved')
-    approved_societies = Society.objects.filter(is_approved=True)   
-    # Get the list of events that are approved and upcoming
-    events = Event.objects.filter(start_time__gte=timezone.now(), is_approved=True).order_by('-start_time')
-
-    # Filter events based on the search query and filter options
-    if query:
-        events = events.filter(
-            Q(event_name__icontains=query) |
-            Q(info__icontains=query) |
-            Q(actual_location__icontains=query)
-        )
-
-    if filter_option == 'online':
-        events = events.filter(location_type='Online')
-    elif filter_option == 'on-campus':
-        events = events.filter(location_type='On-Campus')
-
-    if society_filter:
-        events = events.filter(society__society_id=society_filter)
-
-    if community_filter:
-        events = events.filter(community__community_id=community_filter)
-        selected_community = Community.objects.filter(community_id=community_filter).first()
-        if selected_community:
-            community_requests = community_requests.filter(community_name=selected_community.community_name)
-
-    #checks if the user already books the event
-    booked_event_ids = EventDetails.objects.filter(user=request.user, can_book=True).values_list('event__event_id', flat=True)
-
-    # Get the list of societies
-    societies = approved_societies
-    # Get the list of communities
-    communities = approved_communities
-    
-    for event in events:
-        #checks those that are going to the booking 
-        active_bookings = EventDetails.objects.filter(event=event, can_book=True).count()
-        #sets an attribute
-        event.active_bookings = active_bookings
-        #checks for max capacity and calculates it 
-        if event.maximum_capacity:
-            event.is_full = active_bookings >= event.maximum_capacity
-            event.spots_left = event.maximum_capacity - active_bookings
-        else:
-            event.is_full = False 
-            event.spots_left = None  
-
-    return render(request, 'student_management/event.html', {
-        'events': events,
-        'community_requests': community_requests,
-        'societies': societies,
-        'communities': communities,
-        'booked_event_ids': booked_event_ids,  # Send it to the template
-    })
-
-
-class EventRequestCreateView(LoginRequiredMixin, CreateView):
-    #event form 
-    model = Event
-    form_class = EventForm
-    template_name = 'student_management/event_form.html'
-    success_url = reverse_lazy('events')
-    
-    def get_form(self, form_class=None):
-        form = super().get_form(form_class)
-        #filter only approved societies
-        form.fields['society'].queryset = Society.objects.filter(is_approved=True)
-        return form
-
-    def form_valid(self, form):
-        form.instance.requester = self.request.user
-        response = super().form_valid(form)
-        # Create a notification for the user
-        create_notification(
-            self.request.user,
-            f"Your event request for '{form.instance.event_name}' has been submitted and is awaiting approval.",
-            'info'
-        )
-
-        messages.success(self.request, f"Your event request '{form.instance.event_name}' has been submitted!")
-        return response
-
-
-
-@login_required
-def booked_events(request):
-    booked = EventDetails.objects.filter(
-        #filters booked events for the user
-        #also shows bookings that are still active 
-        user_id=request.user.user_id,can_book=True,event__start_time__gte=timezone.now()  
-    ).select_related('event').order_by('event__start_time') #sorts by start time
-    
-    #render the booked events in html
-    return render(request, "student_management/booked_event.html", {
-        'booked': booked
-    })
-    
-@login_required
-def booked(request, event_id):
-    event = get_object_or_404(Event, event_id=event_id)
-    user = request.user
-
-    #counts how many ppl booked the event
-    current_bookings = EventDetails.objects.filter(event=event, can_book=True).count()
-    #checks if the event is fully booked 
-    if event.maximum_capacity is not None and current_bookings >= event.maximum_capacity:
-        messages.error(request, f"⚠️ Sorry, '{event.event_name}' is fully booked.")
-        return redirect('events')
-
-    #checks if the user already booked the event
-    if not EventDetails.objects.filter(event=event, user=user, can_book=True).exists():
-        EventDetails.objects.create(event=event, user=user) #adds entry to the EventDetails table
-        #creates a notification for the user when they book an event
-        create_notification(user, f"You booked the event '{event.event_name}'!", 'success')
-        messages.success(request, f"✅ You have successfully booked '{event.event_name}'!")
-    else:
-        messages.info(request, f"ℹ️ You already booked '{event.event_name}'.")
-    
-    return redirect('events')
-
-
-@login_required
-def cancel_booking(request, event_id):
-    event = get_object_or_404(Event, event_id=event_id)
-    user = request.user
-    #gets the booking entry for the user and event
-    booking = EventDetails.objects.filter(event=event, user=user, can_book=True).first()
-    if booking: #checks if the booking exists
-        booking.can_book = False #sets the booking to false
-        booking.save() #saves the changes to the database
-        #creates a notification for the user when they cancel a booking
-        create_notification(user, f"You canceled booking for '{event.event_name}'.", 'info')
-        messages.success(request, f"You canceled your booking for '{event.event_name}'.")
-    else:
-        messages.error(request, "You don't have a booking for this event.")
-
-    return redirect('booked_events')
-
-
-@login_required
-def community(request):
-    #filters and searches for communities
-    search_query = request.GET.get('search', '')
-    filter_option = request.GET.get('filter', '')
-    requests_status = request.GET.get('status', '')
-
-    communities = Community.objects.filter(is_approved=True)
-    approved_requests = CommunityRequest.objects.filter(status='approved')
-    community_requests = []
-
-    #search query for communities
-    if search_query:
-        communities = communities.filter(
-            Q(community_name__icontains=search_query) |
-            Q(description__icontains=search_query) |
-            Q(interests__interest_name__icontains=search_query)
-        ).distinct()
-
-    #added the filter for my requests for specific users so they can easily find it and cancel it
-    if filter_option == 'my_requests' and request.user.is_authenticated:
-        communities = communities.filter(com_leader=request.user)
-        community_requests = CommunityRequest.objects.filter(requester=request.user)
-
-        #filters requests status for community requests
-        if requests_status:
-            community_requests = community_requests.filter(status=requests_status)
-        #search query for community requests
-        if search_query:
-            communities = communities.filter(
-                Q(community_name__icontains=search_query) |
-                Q(description__icontains=search_query) |
-                Q(interests__interest_name__icontains=search_query)
-            ).distinct()
-
-    #added the filter for joined communities for specific users so they can easily find it and cancel it 
-    if filter_option == 'joined' and request.user.is_authenticated:
-        communities = communities.filter(communitymembership__user=request.user)
-        
-        #search query for joined communities
-        if search_query:
-            communities = communities.filter(
-                Q(community_name__icontains=search_query) |
-                Q(description__icontains=search_query) |
-                Q(interests__interest_name__icontains=search_query)
-            ).distinct()
-    
-    #this is for all filter options
-    combined = list(chain(communities, community_requests))
-
-    # Create a set of community IDs that the current user has joined
-    joined_ids = set()
-    # If the user is authenticated get the IDs of communities they are a member of
-    if request.user.is_authenticated:
-        joined_ids = set(
-            CommunityMembership.objects.filter(user=request.user)
-            .values_list('community__community_id', flat=True)
+    started = time.perf_counter()
+    try:
+        send_mail(
+            subject=subject,
+            message="This is a plain-text fallback for non-HTML clients.",
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            recipient_list=[user.email],
+            html_message=html_content,
+            fail_silently=False,
         )
-    #RENDER THIS IN THE HTML 
-    return render(request, 'student_management/community.html', {
-        'communities': combined,
-        'joined_ids': joined_ids,
-        'query': search_query,
-        'filter_option': filter_option,
-        'requests_status': requests_status,
-        'approved_requests': approved_requests, 
-    })
-
-
-def cancel_membership(request, community_id):
-    community = get_object_or_404(Community, pk=community_id)
-    membership = CommunityMembership.objects.filter(user=request.user, community=community).first() 
-    
-    if membership:
-        membership.delete()
-        messages.success(request, f"You have left the community '{community.community_name}'.")
-    else:
-        messages.info(request, "You are not a member of this community.")
-    
-    return redirect('community')
-
-class CommunityRequestCreateView(LoginRequiredMixin, CreateView):
-    model = CommunityRequest
-    form_class = CommunityForm
-    template_name = 'student_management/community_form.html'
-    success_url = reverse_lazy('community')
-
-    def form_valid(self, form):
-        form.instance.requester = self.request.user
-        response = super().form_valid(form)
-        
-        create_notification(
-            self.request.user,
-            f"Your community creation request for '{form.instance.community_name}' has been submitted and is pending approval.",
-            'info'
+    except Exception:
+        EMAILS.inc(outcome='error')
+        raise
+    finally:
+        EMAIL_SEND_SECONDS.observe(time.perf_counter() - started)
+    EMAILS.inc(outcome='sent')
+
+
+@login_required
+async def notification_stream(request):
+    user = await request.auser()
+    keepalive = getattr(settings, 'NOTIFICATION_STREAM_KEEPALIVE', 15)
+    count = await sync_to_async(unread_count)(user.user_id)
+
+    if not isinstance(request, ASGIRequest):
+        # WSGI workers can't hold the connection open: send the current count
+        # and let the browser reconnect after the retry interval
+        response = HttpResponse(
+            f"retry: {keepalive * 1000}\n\n" + format_event('unread_count', {'unread_count': count}),
+            content_type='text/event-stream',
         )
-
-        messages.success(self.request, "Your request has been submitted!")
+        response['Cache-Control'] = 'no-cache'
         return response
 
-
-@login_required
-def join_society(request, society_id):
-    society = get_object_or_404(Society, pk=society_id)
-
-    if request.method == 'POST':
-        reason = request.POST.get('reason', '').strip()
-
-        # Check if a pending request already exists
-        existing = SocietyJoinRequest.objects.filter(user=request.user, society=society)
-        if existing.exists():
-            messages.info(request, "You've already submitted a request for this society.")
-            return redirect('societies')
-
-        # Create the join request
-        SocietyJoinRequest.objects.create(
-            user=request.user,
-            society=society,
-            reason=reason,
-            status='pending'
-        )
-        messages.success(request, f"✅ Your join request for {society.society_name} has been submitted.")
-        return redirect('societies')
-
-    return render(request, 'student_management/join_form.html', {
-        'society': society
-    })
-
-
-@login_required
-def leave_society(request, society_id):
-    society = get_object_or_404(Society, pk=society_id)
-    society.members.remove(request.user)
-    messages.info(request, f"You've left {society.society_name}.")
-    return redirect('societies')
-
-@login_required
-def join_community(request, community_id):
-    community = get_object_or_404(Community, community_id=community_id, is_approved=True)
-    already_member = CommunityMembership.objects.filter(user=request.user, community=community).exists()
-
-    if not already_member:
-        CommunityMembership.objects.create(user=request.user, community=community)
-        messages.success(request, f"You joined {community.community_name} 🎉")
-        
-        # Create a notification for the user when they join a community
-        create_notification(request.user, f"You successfully joined the community '{community.community_name}'!", 'success')
-
-        
-    else:
-        messages.info(request, f"You're already a member of {community.community_name}")
-    
-    return redirect('community')
-
-
-@login_required
-def societies_view(request):
-    user = request.user
-
-    tag_filter = request.GET.get('tag')
-    sort = request.GET.get('sort')
-
-    all_tags = Interest.objects.all()
-    joined_societies = user.joined_societies.all()
-    new_societies = Society.objects.exclude(
-        society_id__in=joined_societies.values_list('society_id', flat=True)
-    )
-
-    if tag_filter:
-        new_societies = new_societies.filter(interests__interest_name=tag_filter)
-
-    if sort == 'popular':
-        new_societies = new_societies.annotate(num_members=Count('members')).order_by('-num_members')
-    elif sort == 'newest':
-        new_societies = new_societies.order_by('-created_at')
-    elif sort == 'alphabetical':
-        new_societies = new_societies.order_by('society_name')
-
-    user_tags = Interest.objects.filter(societies__in=joined_societies).distinct()
-    recommended_societies = Society.objects.filter(
-        interests__in=user_tags
-    ).exclude(
-        society_id__in=joined_societies.values_list('society_id', flat=True)
-    ).distinct()[:5]
-
-    for society in new_societies:
-        society.mutual_friends = random.randint(0, 5)
-
-    featured_society = Society.objects.annotate(num_members=Count('members')).order_by('-num_members').first()
-    upcoming_events = Event.objects.filter(start_time__gte=timezone.now()).order_by('start_time')[:3]
-    join_requests = SocietyJoinRequest.objects.filter(user=request.user)
-    join_status_map = {req.society.society_id: req.status for req in join_requests}
-
-
-
-    context = {
-        'all_tags': all_tags,
-        'joined_societies': joined_societies,
-        'new_societies': new_societies,
-        'featured_society': featured_society,
-        'upcoming_events': upcoming_events,
-        'recommended_societies': recommended_societies,
-        'join_status_map': join_status_map,
-    }
-
-    return render(request, 'student_management/societies.html', context)
-
-# Admin Views
-
-@staff_member_required
-def admin_community_requests(request):
-    pending = CommunityRequest.objects.filter(status='pending')
-    return render(request, 'student_management/admin_community_requests.html', {'requests': pending})
-
-@staff_member_required
-@require_POST
-def approve_community_request(request, request_id):
-    req = get_object_or_404(CommunityRequest, id=request_id)
-    req.status = 'approved'
-    req.reviewed_by = request.user
-    req.save()
-
-
-    create_notification(req.requester, f"Your community request for '{req.community_name}' has been approved!", 'success')
-
-    return redirect('admin_community_requests')
-
-
-@staff_member_required
-@require_POST
-def reject_community_request(request, request_id):
-    req = get_object_or_404(CommunityRequest, id=request_id)
-    req.status = 'rejected'
-    req.reviewed_by = request.user
-    req.save()
-    create_notification(req.requester, f"Your community request for '{req.community_name}' has been rejected.", 'error')
-
-    return redirect('admin_community_requests')
-
-# REST API Views
-
-class UpdateRequestViewSet(viewsets.ModelViewSet):
-    queryset = UpdateRequest.objects.all()
-    serializer_class = UpdateRequestSerializer
-    permission_classes = [IsAuthenticated]
-
-    def get_queryset(self):
-        if self.request.user.is_staff:
-            return UpdateRequest.objects.all()
-        return UpdateRequest.objects.filter(user=self.request.user)
-
-    def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
-
-class CommunityAdminViewSet(viewsets.ModelViewSet):
-    queryset = Community.objects.all()
-    serializer_class = CommunitySerializer
-    permission_classes = [IsAdminUser]
-
-    @action(detail=True, methods=['post'])
-    def approve(self, request, pk=None):
-        community = self.get_object()
-        community.is_approved = True
-        community.save()
-        return Response({'status': 'approved'})
-    @action(detail=True, methods=['post'])
-    def reject(self, request, pk=None):
-        community = self.get_object()
-        community.is_approved = False
-        community.save()
-        return Response({'status': 'rejected'})
-    
-
-
-class UpdateRequestCreateView(View):
-    def get(self, request):
-        form = UpdateRequestForm()
-        return render(request, 'student_management/update_request.html', {'form': form})
-
-    def post(self, request):
-        form = UpdateRequestForm(request.POST, request.FILES)
-        if form.is_valid():
-            user = request.user
-            field = form.cleaned_data['field_to_update'].lower()
-            new_value = form.cleaned_data.get('new_value', '')
-            profile_picture = request.FILES.get('profile_picture')
-            date_value = request.POST.get('date_value')
-
-            # Safely get old value from user
-            old_value = getattr(user, field, '') if hasattr(user, field) else ''
-
-            try:
-                if field == 'profile_picture' and profile_picture:
-                    update_request = UpdateRequest.objects.create(
-                        user=user,
-                        field_to_update=field,
-                        old_value=str(old_value),
-                        new_value='',
-                        profile_picture=profile_picture,
-                        status='pending',
-                        created_at=now()
-                    )
-                elif field == 'date_of_birth' and date_value:
-                    try:
-                        parsed_date = datetime.strptime(date_value, "%Y-%m-%d").date()
-                        update_request = UpdateRequest.objects.create(
-                            user=user,
-                            field_to_update=field,
-                            old_value=str(old_value),
-                            new_value=parsed_date.strftime("%Y-%m-%d"),
-                            status='pending',
-                            created_at=now()
-                        )
-                    except ValueError:
-                        messages.error(request, "⚠️ Invalid date format. Please use YYYY-MM-DD.")
-                        return render(request, 'student_management/update_request.html', {'form': form})
-                else:
-                    update_request = UpdateRequest.objects.create(
-                        user=user,
-                        field_to_update=field,
-                        old_value=str(old_value),
-                        new_value=new_value,
-                        status='pending',
-                        created_at=now()
-                    )
-
-                messages.success(request, "✅ Your update request has been submitted.")
-                return redirect('home')
-
-            except Exception as e:
-                messages.error(request, f"❌ Something went wrong: {str(e)}")
-                return render(request, 'student_management/update_request.html', {'form': form})
-
-        return render(request, 'student_management/update_request.html', {'form': form})
-
-
-class ProtectedEventsView(APIView):
-    permission_classes = [IsAuthenticated]
-
-    def get(self, request):
-        events = Event.objects.all()
-        serializer = EventSerializer(events, many=True)
-        return Response(serializer.data)
-
-
-class EventAdminViewSet(viewsets.ModelViewSet):
-    queryset = Event.objects.all()
-    serializer_class = EventSerializer
-    permission_classes = [IsAdminUser]
-
-    @action(detail=True, methods=['post'])
-    def approve(self, request, pk=None):
-        event = self.get_object()
-        event.is_approved = True
-        event.save()
-        return Response({'status': 'approved'})
-
-    @action(detail=True, methods=['post'])
-    def reject(self, request, pk=None):
-        event = self.get_object()
-        event.is_approved = False
-        event.save()
-        return Response({'status': 'rejected'})
-class EventSearchViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = Event.objects.filter(is_approved=True).order_by('start_time')
-    serializer_class = EventSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
-    filterset_fields = ['location_type', 'start_time']
-    search_fields = ['event_name', 'info']
-
-class CommunitySearchViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = Community.objects.filter(is_approved=True)
-    serializer_class = CommunitySerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter]
-    search_fields = ['community_name', 'description']
-
-class PostSearchViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = Post.objects.filter(visibility='public')
-    serializer_class = PostSerializer
-    filter_backends = [filters.SearchFilter]
-    search_fields = ['content', 'user__first_name', 'user__last_name', 'timestamp']
-
-class ProtectedEventsView(APIView):
-    permission_classes = [IsAuthenticated]
-
-    def get(self, request):
-        events = Event.objects.all()
-        serializer = EventSerializer(events, many=True)
-        return Response(serializer.data)
-
-@login_required
-def search_posts(request):
-    query = request.GET.get('search', '').strip()
-    sort = request.GET.get('sort')
-    posts = Post.objects.filter(visibility='public').select_related('user')
-
-    if query:
-        parsed_date = None
-        today_year = datetime.now().year
-        date_formats = ["%d/%m", "%d-%m", "%d/%m/%Y", "%Y-%m-%d", "%d %b %Y", "%d %B %Y"]
-
-        for fmt in date_formats:
-            try:
-                parsed_date = datetime.strptime(query, fmt)
-                if "%Y" not in fmt:
-                    parsed_date = parsed_date.replace(year=today_year)
-                parsed_date = make_aware(parsed_date)
-                break
-            except ValueError:
-                continue
-
-        if parsed_date:
-            posts = posts.filter(timestamp__date=parsed_date.date())
-        else:
-            posts = posts.filter(
-                Q(content__icontains=query) |
-                Q(user__first_name__icontains=query) |
-                Q(user__last_name__icontains=query) |
-                Q(user__email__icontains=query) |
-                Q(timestamp__icontains=query) |
-                Q(likes__icontains=query) |
-                Q(comments_count__icontains=query)
-            )
-
-    if sort == 'oldest':
-        posts = posts.order_by('timestamp')
-    else:
-        posts = posts.order_by('-timestamp')
-
-    return render(request, 'student_management/search_posts.html', {
-        'posts': posts,
-        'query': query,
-        'sort': sort
-    })
-
-
-@staff_member_required
-@require_POST
-def approve_update_request(request, request_id):
-    update_request = get_object_or_404(UpdateRequest, id=request_id)
-    update_request.status = 'approved'
-    update_request.reviewed_at = timezone.now()
-    update_request.reviewed_by = request.user
-
-    user = update_request.user
-    field = update_request.field_to_update.lower()
-    value = update_request.new_value
-
-    try:
-        if field == 'name':
-            parts = value.strip().split(' ', 1)
-            user.first_name = parts[0]
-            user.last_name = parts[1] if len(parts) > 1 else ''
-        elif field == 'course':
-            user.course = value
-        elif field == 'bio':
-            user.bio = value
-        elif field == 'gender':
-            user.gender = value
-        elif field == 'facebook':
-            user.facebook = value
-        elif field == 'twitter':
-            user.twitter = value
-        elif field == 'instagram':
-            user.instagram = value
-        elif field == 'date_of_birth':
-            from datetime import datetime
-            user.date_of_birth = datetime.strptime(value, "%Y-%m-%d").date()
-        elif field == 'profile_picture' and update_request.profile_picture:
-            # Save profile picture
-            from django.core.files.base import ContentFile
-            import os
-            filename = os.path.basename(update_request.profile_picture.name)
-            update_request.profile_picture.open()
-            user.profile_picture.save(
-                filename,
-                ContentFile(update_request.profile_picture.read()),
-                save=False
-            )
-        else:
-            messages.error(request, f"❌ Unknown field: {field}")
-            return redirect('admin_update_requests')
-
-        user.save()
-        update_request.save()
-
-        create_notification(user, f"Your update request for '{update_request.field_to_update}' has been approved!", 'success')
-        messages.success(request, f"{user.get_full_name()}'s update request has been approved.")
-
-    except Exception as e:
-        messages.error(request, f"❌ Error while updating {field}: {str(e)}")
-
-    return redirect('admin_update_requests')
-
-@staff_member_required
-@require_POST
-def reject_update_request(request, request_id):
-    update_request = get_object_or_404(UpdateRequest, id=request_id)
-    update_request.status = 'rejected'
-    update_request.save()
-
-
-    create_notification(update_request.user, f"Your update request for '{update_request.field_to_update}' has been rejected.", 'error')
-
-    messages.warning(request, f"{update_request.user.username}'s update request has been rejected.")
-    return redirect('admin_update_requests')
-
-
-
-
-
-User = get_user_model()
-
-def friends(request):
-    friends = User.objects.exclude(user_id=request.user.user_id)
-    return render(request, 'student_management/friends.html', {'friends': friends})
-
-
-@method_decorator(staff_member_required, name='dispatch')
-class AdminSocietyRequestsView(View):
-    def get(self, request):
-        join_requests = SocietyJoinRequest.objects.all().order_by('-created_at')
-        return render(request, 'admin_society_requests.html', {'join_requests': join_requests})
-
-    def post(self, request, request_id):
-        join_request = get_object_or_404(SocietyJoinRequest, id=request_id)
-        action = request.POST.get('action')
-
-        if action == 'approve':
-            join_request.status = 'approved'
-            join_request.save()
-            # Creating a notification for the user when their join request is approved
-
-            create_notification(join_request.user, f"Your join request to '{join_request.society.society_name}' has been approved!", 'success')
-
-            messages.success(request, f"{join_request.user.username}'s join request to {join_request.society.society_name} has been approved.")
-
-        elif action == 'reject':
-            join_request.status = 'rejected'
-            join_request.save()
-            # Creating a notification for the user when their join request is rejected
-
-            create_notification(join_request.user, f"Your join request to '{join_request.society.society_name}' has been rejected!", 'error')
-
-
-            messages.warning(request, f"{join_request.user.username}'s join request to {join_request.society.society_name} has been rejected.")
-
-        return redirect('admin_society_requests')
-    
-@staff_member_required
-def admin_update_requests(request):
-    updates = UpdateRequest.objects.all().order_by('-created_at')
-    return render(request, 'student_management/admin_update_requests.html', {'updates': updates})
-
-
-from rest_framework import viewsets
-from .models import Comment
-from .serializers import CommentSerializer
-from rest_framework import filters
-
-class CommentViewSet(viewsets.ModelViewSet):
-    queryset = Comment.objects.all()
-    serializer_class = CommentSerializer
-    filter_backends = [filters.SearchFilter]
-    search_fields = ['post__post_id']
-    
-from django.shortcuts import redirect, get_object_or_404
-from django.contrib.auth.decorators import login_required
-from django.views.decorators.http import require_POST
-from .models import Comment, Post
-
-from django.views.decorators.http import require_POST
-from django.contrib import messages
-
-@require_POST
-@login_required
-def add_comment(request):
-    print("POST received: ", request.POST)
-    
-    post_id = request.POST.get("post_id")
-    comment_text = request.POST.get("comment_text")
-
-    if post_id and comment_text:
+    async def stream():
+        subscription = get_broker().subscribe(user.user_id)
         try:
-            post = Post.objects.get(post_id=post_id)
-            Comment.objects.create(user=request.user, post=post, comment_text=comment_text)
-            messages.success(request, "✅ Your comment was posted.")
-        except Post.DoesNotExist:
-            messages.error(request, "Post not found.")
-    else:
-        messages.error(request, "Invalid form submission.")
-
-    return redirect("home")
-
-
-
-from rest_framework import permissions, viewsets
-from .models import Comment
-from .serializers import CommentSerializer
-
-class IsOwnerOrReadOnly(permissions.BasePermission):
-    def has_object_permission(self, request, view, obj):
-        # Allow read-only for GET, HEAD, OPTIONS
-        if request.method in permissions.SAFE_METHODS:
-            return True
-        # Allow write/delete only if user is the comment owner
-        return obj.user == request.user
-
-class CommentViewSet(viewsets.ModelViewSet):
-    queryset = Comment.objects.all()
-    serializer_class = CommentSerializer
-    permission_classes = [IsOwnerOrReadOnly]
-    
-from django.contrib import messages
-from django.http import HttpResponseForbidden
-from django.shortcuts import redirect
-
-@login_required
-@require_POST
-def delete_comment(request, comment_id):
-    comment = get_object_or_404(Comment, pk=comment_id)
-    if comment.user != request.user:
-        return HttpResponseForbidden("You can't delete someone else's comment.")
-    comment.delete()
-    messages.success(request, "Your comment was deleted.")
-    return redirect('home')
-
-@login_required
-@require_POST
-def send_friend_request(request, user_id):
-    to_user = get_object_or_404(User, user_id=user_id)
-    if to_user != request.user and not FriendRequest.objects.filter(from_user=request.user, to_user=to_user, status='pending').exists():
-        FriendRequest.objects.create(from_user=request.user, to_user=to_user)
-
-
-    return redirect('friends')
-
-@login_required
-@require_POST
-def accept_friend_request(request, request_id):
-    fr = get_object_or_404(FriendRequest, id=request_id, to_user=request.user)
-    fr.status = 'accepted'
-    fr.save()
-
-    # Add to User.friends field (symmetrical)
-    request.user.friends.add(fr.from_user)
-    fr.from_user.friends.add(request.user)
-
-    # Optionally keep Friendship objects if you want
-    Friendship.objects.get_or_create(user=request.user, friend=fr.from_user)
-    Friendship.objects.get_or_create(user=fr.from_user, friend=request.user)
-
-    return redirect('friends')
-
-
-@login_required
-@require_POST
-def reject_friend_request(request, request_id):
-    fr = get_object_or_404(FriendRequest, id=request_id, to_user=request.user)
-    fr.status = 'rejected'
-    fr.save()
-    return redirect('friends')
-
-@login_required
-@require_POST
-def remove_friend(request, user_id):
-    friend = get_object_or_404(User, user_id=user_id)
-
-    # Remove from User.friends field (symmetrical)
-    request.user.friends.remove(friend)
-    friend.friends.remove(request.user)
+            yield format_event('unread_count', {'unread_count': count})
+            while True:
+                try:
+                    payload = await subscription.get(timeout=keepalive)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield format_event(payload.get('event', 'notification'), payload)
+        finally:
+            subscription.close()
 
-    # Optional: remove Friendship objects
-    Friendship.objects.filter(user=request.user, friend=friend).delete()
-    Friendship.objects.filter(user=friend, friend=request.user).delete()
-
-    return redirect('friends')
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # stop nginx from buffering the stream
+    return response
 
 
 @login_required
-def friends_page(request):
-    user = request.user
-    sent_requests = FriendRequest.objects.filter(from_user=user, status='pending')
-    received_requests = FriendRequest.objects.filter(to_user=user, status='pending')
-    friends = Friendship.objects.filter(user=user).select_related('friend')
-
-    mutual_friends = {}
-    your_friends = set(friends.values_list('friend_id', flat=True))
-    for f in friends:
-        their_friends = set(Friendship.objects.filter(user=f.friend).values_list('friend_id', flat=True))
-        shared = their_friends.intersection(your_friends)
-        mutual_friends[f.friend.user_id] = User.objects.filter(user_id__in=shared)
-
-    shared_interests = user.interests.all()
-    potential_users = User.objects.exclude(user_id=user.user_id).exclude(friendships__friend=user)
-    suggestions = potential_users.annotate(shared_count=Count('interests')).order_by('-shared_count')[:5]
-
-    search = request.GET.get('search', '')
-    if search:
-        friends = friends.filter(Q(friend__first_name__icontains=search) | Q(friend__last_name__icontains=search))
-
-    sort = request.GET.get('sort', '')
-    if sort == 'name':
-        friends = friends.order_by('friend__first_name')
-    elif sort == 'recent':
-        friends = friends.order_by('-created_at')
-    sent_to_ids = list(sent_requests.values_list('to_user__user_id', flat=True))
-
-
-    return render(request, 'student_management/friends.html', {
-        'friends': friends,
-        'sent_requests': sent_requests,
-        'received_requests': received_requests,
-        'mutual_friends': mutual_friends,
-        'suggestions': suggestions,
-        'search': search,
-        'sort': sort,
-        'sent_to_ids': sent_to_ids,  
-    })
-
-
 @require_POST
-def handle_friend_action(request, action, user_id):
-    return JsonResponse({'message': 'Friend action placeholder!'})
\ No newline at end of file
+def notification_preferences(request):
+    digest = request.POST.get('notification_digest')
+    if digest not in dict(User.DIGEST_CHOICES):
+        messages.error(request, "Please pick a valid notification setting.")
+        return redirect('profile')
+
+    User.objects.filter(pk=request.user.pk).update(notification_digest=digest)
+    messages.success(request, "✅ Your notification settings have been saved.")
+    return redirect('profile')
@@ -0,0 +1,102 @@
+# Society views: listing and membership
+
+import random
+
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.db.models import Count
+from django.shortcuts import get_object_or_404, redirect, render
+from django.utils import timezone
+
+from ..models import Event, Interest, Society, SocietyJoinRequest
+from ..ratelimit import ratelimit
+
+
+@login_required
+@ratelimit('society-join')
+def join_society(request, society_id):
+    society = get_object_or_404(Society, pk=society_id)
+
+    if request.method == 'POST':
+        reason = request.POST.get('reason', '').strip()
+
+        # Check if a pending request already exists
+        existing = SocietyJoinRequest.objects.filter(user=request.user, society=society)
+        if existing.exists():
+            messages.info(request, "You've already submitted a request for this society.")
+            return redirect('societies')
+
+        # Create the join request
+        SocietyJoinRequest.objects.create(
+            user=request.user,
+            society=society,
+            reason=reason,
+            status='pending'
+        )
+        messages.success(request, f"✅ Your join request for {society.society_name} has been submitted.")
+        return redirect('societies')
+
+    return render(request, 'student_management/join_form.html', {
+        'society': society
+    })
+
+
+@login_required
+def leave_society(request, society_id):
+    society = get_object_or_404(Society, pk=society_id)
+    society.members.remove(request.user)
+    messages.info(request, f"You've left {society.society_name}.")
+    return redirect('societies')
+
+
+@login_required
+def societies_view(request):
+    user = request.user
+
+    tag_filter = request.GET.get('tag')
+    sort = request.GET.get('sort')
+
+    all_tags = Interest.objects.all()
+    joined_societies = user.joined_societies.all()
+    new_societies = Society.objects.exclude(
+        society_id__in=joined_societies.values_list('society_id', flat=True)
+    )
+
+    if tag_filter:
+        new_societies = new_societies.filter(interests__interest_name=tag_filter)
+
+    if sort == 'popular':
+        new_societies = new_societies.annotate(num_members=Count('members')).order_by('-num_members')
+    elif sort == 'newest':
+        new_societies = new_societies.order_by('-created_at')
+    elif sort == 'alphabetical':
+        new_societies = new_societies.order_by('society_name')
+
+    user_tags = Interest.objects.filter(societies__in=joined_societies).distinct()
+    recommended_societies = Society.objects.filter(
+        interests__in=user_tags
+    ).exclude(
+        society_id__in=joined_societies.values_list('society_id', flat=True)
+    ).distinct()[:5]
+
+    for society in new_societies:
+        society.mutual_friends = random.randint(0, 5)
+
+    featured_society = Society.objects.annotate(num_members=Count('members')).order_by('-num_members').first()
+    upcoming_events = Event.objects.filter(start_time__gte=timezone.now()).order_by('start_time')[:3]
+    join_requests = SocietyJoinRequest.objects.filter(user=request.user)
+    join_status_map = {req.society.society_id: req.status for req in join_requests}
+
+
+
+    context = {
+        'all_tags': all_tags,
+        'joined_societies': joined_societies,
+        'new_societies': new_societies,
+        'featured_society': featured_society,
+        'upcoming_events': upcoming_events,
+        'recommended_societies': recommended_societies,
+        'join_status_map': join_status_map,
+    }
+
+    return render(request, 'student_management/societies.html', context)
@@ -0,0 +1,212 @@
+# Staff views: approvals, imports, exports and metrics
+
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.mail import send_mass_mail
+from django.http import Http404, HttpResponse, HttpResponseForbidden, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.http import require_POST
+
+from .. import archive, communities, exports, imports, metrics
+from ..approvals import apply_update_request
+from ..models import CommunityRequest, Society, SocietyJoinRequest, UpdateRequest
+from .notifications import create_notification
+
+
+@staff_member_required
+def admin_community_requests(request):
+    pending = CommunityRequest.objects.filter(status='pending')
+    return render(request, 'student_management/admin_community_requests.html', {'requests': pending})
+
+
+@staff_member_required
+@require_POST
+def approve_community_request(request, request_id):
+    req = get_object_or_404(CommunityRequest, id=request_id)
+    req.status = 'approved'
+    req.reviewed_by = request.user
+    req.save()
+    communities.invalidate_approved_requests()
+
+
+    create_notification(req.requester, f"Your community request for '{req.community_name}' has been approved!", 'success')
+
+    return redirect('admin_community_requests')
+
+
+@staff_member_required
+@require_POST
+def reject_community_request(request, request_id):
+    req = get_object_or_404(CommunityRequest, id=request_id)
+    req.status = 'rejected'
+    req.reviewed_by = request.user
+    req.save()
+    communities.invalidate_approved_requests()
+    create_notification(req.requester, f"Your community request for '{req.community_name}' has been rejected.", 'error')
+
+    return redirect('admin_community_requests')
+
+
+@staff_member_required
+@require_POST
+def approve_update_request(request, request_id):
+    update_request = get_object_or_404(UpdateRequest, id=request_id)
+    update_request.status = 'approved'
+    update_request.reviewed_at = timezone.now()
+    update_request.reviewed_by = request.user
+
+    user = update_request.user
+    field = update_request.field_to_update.lower()
+
+    try:
+        apply_update_request(user, update_request)
+        user.save()
+        update_request.save()
+
+        create_notification(user, f"Your update request for '{update_request.field_to_update}' has been approved!", 'success')
+        messages.success(request, f"{user.get_full_name()}'s update request has been approved.")
+
+    except Exception as e:
+        messages.error(request, f"❌ Error while updating {field}: {str(e)}")
+
+    return redirect('admin_update_requests')
+
+
+@staff_member_required
+@require_POST
+def reject_update_request(request, request_id):
+    update_request = get_object_or_404(UpdateRequest, id=request_id)
+    update_request.status = 'rejected'
+    update_request.save()
+
+
+    create_notification(update_request.user, f"Your update request for '{update_request.field_to_update}' has been rejected.", 'error')
+
+    messages.warning(request, f"{update_request.user.username}'s update request has been rejected.")
+    return redirect('admin_update_requests')
+
+
+@method_decorator(staff_member_required, name='dispatch')
+class AdminSocietyRequestsView(View):
+    def get(self, request):
+        join_requests = SocietyJoinRequest.objects.all().order_by('-created_at')
+        return render(request, 'admin_society_requests.html', {'join_requests': join_requests})
+
+    def post(self, request, request_id):
+        join_request = get_object_or_404(SocietyJoinRequest, id=request_id)
+        action = request.POST.get('action')
+
+        if action == 'approve':
+            join_request.status = 'approved'
+            join_request.save()
+            # Creating a notification for the user when their join request is approved
+
+            create_notification(join_request.user, f"Your join request to '{join_request.society.society_name}' has been approved!", 'success')
+
+            messages.success(request, f"{join_request.user.username}'s join request to {join_request.society.society_name} has been approved.")
+
+        elif action == 'reject':
+            join_request.status = 'rejected'
+            join_request.save()
+            # Creating a notification for the user when their join request is rejected
+
+            create_notification(join_request.user, f"Your join request to '{join_request.society.society_name}' has been rejected!", 'error')
+
+
+            messages.warning(request, f"{join_request.user.username}'s join request to {join_request.society.society_name} has been rejected.")
+
+        return redirect('admin_society_requests')
+
+
+@staff_member_required
+def admin_update_requests(request):
+    updates = UpdateRequest.objects.all().order_by('-created_at')
+    return render(request, 'student_management/admin_update_requests.html', {'updates': updates})
+
+
+def invite_url(uid, token):
+    return f"{getattr(settings, 'SITE_URL', 'http://localhost:8000')}{reverse('accept_invite', args=[uid, token])}"
+
+
+@staff_member_required
+def import_data(request):
+    result = None
+    if request.method == 'POST':
+        dataset = request.POST.get('dataset')
+        upload = request.FILES.get('file')
+        file_format = (upload.name.rsplit('.', 1)[-1].lower() if upload else '')
+        if dataset not in imports.IMPORTERS or file_format not in ('csv', 'jsonl'):
+            messages.error(request, "Pick a dataset and upload a .csv or .jsonl file.")
+        else:
+            result = imports.IMPORTERS[dataset](imports.read_rows(upload.file, file_format))
+            messages.success(request, f"✅ Imported {result.created} {dataset} ({result.skipped} skipped).")
+            if result.invites:
+                # mailed in one SMTP session rather than one connection per user
+                send_mass_mail(
+                    [
+                        (
+                            "🎓 Your UWE Hub account",
+                            f"An account has been created for you. Choose your password here: {invite_url(uid, token)}",
+                            settings.DEFAULT_FROM_EMAIL,
+                            [email],
+                        )
+                        for email, uid, token in result.invites
+                    ],
+                    fail_silently=True,
+                )
+
+    return render(request, 'student_management/admin_import.html', {
+        'datasets': sorted(imports.IMPORTERS),
+        'result': result,
+    })
+
+
+def export_response(request, filename, dataset):
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in exports.FORMATS:
+        return HttpResponse("Unsupported format, use csv or jsonl.", status=400)
+
+    header, rows = dataset
+    lines, content_type = exports.FORMATS[export_format]
+    response = StreamingHttpResponse(lines(header, rows), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{export_format}"'
+    return response
+
+
+@staff_member_required
+def export_society_members(request, society_id):
+    society = get_object_or_404(Society, pk=society_id)
+    return export_response(request, f"society-{society.pk}-members", exports.society_members(society.pk))
+
+
+@staff_member_required
+def export_event_attendees(request, event_id):
+    event = archive.find_event(event_id)
+    if event is None:
+        raise Http404("No such event.")
+    include_cancelled = request.GET.get('include_cancelled') == 'true'
+    return export_response(request, f"event-{event.pk}-attendees", exports.event_attendees(event.pk, include_cancelled))
+
+
+@staff_member_required
+def export_request_history(request, kind):
+    if kind not in exports.REQUEST_HISTORIES:
+        return HttpResponse("Unknown request type.", status=404)
+    return export_response(request, f"{kind}-requests", exports.request_history(kind, request.GET.get('status')))
+
+
+def metrics_view(request):
+    # scraped by Prometheus with a bearer token, or viewed by staff in the browser
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    authorised = request.user.is_staff or (
+        token and constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}')
+    )
+    if not authorised:
+        return HttpResponseForbidden("Metrics are only available to staff.")
+    return HttpResponse(metrics.registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')